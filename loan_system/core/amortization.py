@@ -0,0 +1,73 @@
+"""Loan repayment schedules.
+
+``build_schedule`` is pure arithmetic so it can be used for previews as well
+as for the installments written when a loan is approved. Amounts are rounded
+to cents and the principal column always sums to the loan amount exactly,
+with no installment below zero however small the loan.
+"""
+import calendar
+from datetime import date
+from decimal import ROUND_DOWN, ROUND_HALF_UP, Decimal
+
+FLAT = 'FLAT'
+REDUCING = 'REDUCING'
+
+CENT = Decimal('0.01')
+
+
+def _cents(value):
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def add_months(start, months):
+    """Return ``start`` moved forward by ``months``, clamped to the end of shorter months."""
+    month_index = start.month - 1 + months
+    year = start.year + month_index // 12
+    month = month_index % 12 + 1
+    day = min(start.day, calendar.monthrange(year, month)[1])
+    return date(year, month, day)
+
+
+def build_schedule(principal, annual_rate, months, method=REDUCING, start=None):
+    """Return ``[(number, due_date, principal, interest), ...]`` for a loan.
+
+    ``annual_rate`` is a percentage. ``FLAT`` charges interest on the original
+    principal for the whole term; ``REDUCING`` uses equal (annuity) payments
+    with interest on the remaining balance each month.
+    """
+    principal = Decimal(principal)
+    months = int(months)
+    if months < 1:
+        raise ValueError("A loan needs at least one installment.")
+    start = start or date.today()
+    monthly_rate = Decimal(annual_rate) / Decimal(1200)
+
+    schedule = []
+    balance = principal
+    if method == FLAT:
+        # Whole cents that don't divide evenly go one each to the last installments
+        principal_part = (principal / months).quantize(CENT, rounding=ROUND_DOWN)
+        spare_cents = int((principal - principal_part * months) / CENT)
+        interest_part = _cents(principal * monthly_rate)
+        for number in range(1, months + 1):
+            if number == months:
+                part = balance
+            elif number > months - spare_cents:
+                part = principal_part + CENT
+            else:
+                part = principal_part
+            balance -= part
+            schedule.append((number, add_months(start, number), part, interest_part))
+    elif method == REDUCING:
+        if monthly_rate:
+            payment = principal * monthly_rate / (1 - (1 + monthly_rate) ** -months)
+        else:
+            payment = principal / months
+        for number in range(1, months + 1):
+            interest = _cents(balance * monthly_rate)
+            part = balance if number == months else min(_cents(payment) - interest, balance)
+            balance -= part
+            schedule.append((number, add_months(start, number), part, interest))
+    else:
+        raise ValueError(f"Unknown interest method {method!r}.")
+    return schedule
@@ -0,0 +1,59 @@
+"""Third-party front-end assets, served from our own static files.
+
+Each vendored file is pinned to a release and kept under
+``core/static/core/vendor/``, so ``collectstatic`` fingerprints and
+precompresses it like our own files (see ``core.storage``) and pages work
+without internet access. ``python manage.py vendor_assets`` downloads any
+that are missing. Until a file has been vendored, ``asset_url`` falls back to
+the same pinned release on the CDN.
+"""
+from functools import lru_cache
+
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+
+CDN = 'https://cdn.jsdelivr.net/npm'
+
+# Static path -> where to download it from
+VENDOR_FILES = {
+    'core/vendor/bootstrap-5.3.3/bootstrap.min.css':
+        f'{CDN}/bootstrap@5.3.3/dist/css/bootstrap.min.css',
+    'core/vendor/bootstrap-5.3.3/bootstrap.bundle.min.js':
+        f'{CDN}/bootstrap@5.3.3/dist/js/bootstrap.bundle.min.js',
+    # Named by the sourceMappingURL comments above; the manifest storage
+    # refuses to collect a file whose source map is missing.
+    'core/vendor/bootstrap-5.3.3/bootstrap.min.css.map':
+        f'{CDN}/bootstrap@5.3.3/dist/css/bootstrap.min.css.map',
+    'core/vendor/bootstrap-5.3.3/bootstrap.bundle.min.js.map':
+        f'{CDN}/bootstrap@5.3.3/dist/js/bootstrap.bundle.min.js.map',
+    'core/vendor/bootstrap-icons-1.11.3/bootstrap-icons.css':
+        f'{CDN}/bootstrap-icons@1.11.3/font/bootstrap-icons.css',
+    # Referenced from bootstrap-icons.css as ./fonts/...
+    'core/vendor/bootstrap-icons-1.11.3/fonts/bootstrap-icons.woff2':
+        f'{CDN}/bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff2',
+    'core/vendor/bootstrap-icons-1.11.3/fonts/bootstrap-icons.woff':
+        f'{CDN}/bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff',
+    'core/vendor/chart.js-4.4.0/chart.umd.js':
+        f'{CDN}/chart.js@4.4.0/dist/chart.umd.js',
+}
+
+# The names templates include with {% asset %}
+ASSETS = {
+    'bootstrap.css': 'core/vendor/bootstrap-5.3.3/bootstrap.min.css',
+    'bootstrap.js': 'core/vendor/bootstrap-5.3.3/bootstrap.bundle.min.js',
+    'bootstrap-icons.css': 'core/vendor/bootstrap-icons-1.11.3/bootstrap-icons.css',
+    'chart.js': 'core/vendor/chart.js-4.4.0/chart.umd.js',
+}
+
+
+@lru_cache(maxsize=None)
+def is_vendored(path):
+    return finders.find(path) is not None
+
+
+def asset_url(name):
+    """The URL to load asset ``name`` from: our static copy, or the CDN until it is vendored."""
+    path = ASSETS[name]
+    if is_vendored(path):
+        return static(path)
+    return VENDOR_FILES[path]
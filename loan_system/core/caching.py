@@ -0,0 +1,53 @@
+"""Per-member cache of the computed dashboard context.
+
+Entries are keyed by member and month plus the ``DataVersion`` of the
+member's savings and targets, the only data the dashboard shows. The version
+is read before the figures are built, so an entry can only ever hold figures
+at least as new as its key, and any write moves later requests on to a fresh
+key. Superseded entries age out of the cache. The backend is the
+``dashboard`` alias in ``settings.CACHES``.
+"""
+import threading
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+
+from .models import DataVersion, MonthlyRollup
+
+CACHE_ALIAS = 'dashboard'
+
+_lock = threading.Lock()
+stats = {'hits': 0, 'misses': 0}
+
+
+def _count(name):
+    with _lock:
+        stats[name] += 1
+
+
+def data_version(user_id):
+    """Moves whenever the member's savings or targets change."""
+    etag, _ = DataVersion.objects.stamp([
+        DataVersion.scope_for(MonthlyRollup.SAVINGS, user_id),
+        DataVersion.scope_for(DataVersion.TARGETS, user_id),
+    ])
+    return etag
+
+
+def dashboard_key(user_id, year, month, version):
+    return f'dashboard:{user_id}:{year}:{month:02}:{version}'
+
+
+async def aget_dashboard_context(user_id, year, month, build):
+    """Return the cached context for the member's month, awaiting ``build()`` on a miss."""
+    cache = caches[CACHE_ALIAS]
+    key = dashboard_key(user_id, year, month, await sync_to_async(data_version)(user_id))
+    context = await cache.aget(key)
+    if context is not None:
+        _count('hits')
+        return context
+    _count('misses')
+    context = await build()
+    await cache.aset(key, context)
+    return context
+
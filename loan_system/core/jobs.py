@@ -0,0 +1,148 @@
+"""A small database-backed job queue.
+
+Functions decorated with ``@task`` can be queued with ``enqueue`` and are run
+by the ``runworker`` command, which claims due ``Job`` rows in batches (see
+``JobManager.claim``). A task that raises is retried with exponential backoff
+until it has used up ``max_attempts``; whatever it returns is stored on the
+job as JSON.
+
+A job still held by its worker after its task's ``stale_after`` is taken to
+belong to a crashed worker and is queued again. If the original worker was
+only slow, its outcome is discarded when it finishes, because it no longer
+holds the job.
+"""
+import logging
+import os
+import random
+import socket
+import time
+from datetime import timedelta
+
+from django.db import connections
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE = 30  # seconds before the first retry, doubled on each attempt
+RETRY_MAX = 60 * 60
+STALE_AFTER = timedelta(minutes=10)  # default for tasks that don't set stale_after
+
+_registry = {}
+
+
+class UnknownTask(LookupError):
+    pass
+
+
+def task(name=None, max_attempts=5, stale_after=STALE_AFTER):
+    """Register the decorated function as a queueable task.
+
+    ``stale_after`` must comfortably exceed the task's longest run.
+    """
+    def decorator(func):
+        func.task_name = name or f'{func.__module__}.{func.__name__}'
+        func.max_attempts = max_attempts
+        func.stale_after = stale_after
+        _registry[func.task_name] = func
+        return func
+    return decorator
+
+
+def enqueue(func, run_at=None, unique_key=None, **payload):
+    """Queue the ``@task`` function ``func`` with keyword arguments ``payload``."""
+    return Job.objects.enqueue(
+        func.task_name, payload, run_at=run_at, unique_key=unique_key, max_attempts=func.max_attempts,
+    )
+
+
+def backoff(attempts):
+    delay = min(RETRY_BASE * 2 ** (attempts - 1), RETRY_MAX)
+    return timedelta(seconds=delay * random.uniform(1, 1.25))
+
+
+def run(job):
+    """Run one claimed job and record the outcome.
+
+    The outcome is only saved while ``job`` is still held by the worker that
+    claimed it; returns the job either way.
+    """
+    claim = {'status': Job.RUNNING, 'locked_by': job.locked_by, 'attempts': job.attempts}
+    job.finished_at = None
+    try:
+        func = _registry.get(job.task)
+        if func is None:
+            raise UnknownTask(f"No task named {job.task!r}.")
+        job.result = func(**job.payload)
+    except Exception as exc:
+        job.last_error = f'{type(exc).__name__}: {exc}'
+        if isinstance(exc, UnknownTask) or job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+            job.finished_at = timezone.now()
+            logger.error("Job %s failed for good: %s", job, job.last_error)
+        else:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + backoff(job.attempts)
+            logger.warning("Job %s failed, retrying at %s: %s", job, job.run_at, job.last_error)
+    else:
+        job.status = Job.DONE
+        job.finished_at = timezone.now()
+    job.locked_by, job.locked_at = '', None
+    fields = ['status', 'result', 'last_error', 'run_at', 'finished_at', 'locked_by', 'locked_at']
+    saved = Job.objects.filter(pk=job.pk, **claim).update(**{field: getattr(job, field) for field in fields})
+    if not saved:
+        logger.warning("Job %s was requeued while it ran; its outcome was discarded.", job)
+    return job
+
+
+def requeue_stale(now=None):
+    """Requeue (or fail) jobs held for longer than their task's ``stale_after``."""
+    now = now or timezone.now()
+    custom = {name: func.stale_after for name, func in _registry.items() if func.stale_after != STALE_AFTER}
+    requeued, failed = Job.objects.requeue_stale(now - STALE_AFTER, exclude_tasks=custom)
+    for name, stale_after in custom.items():
+        more_requeued, more_failed = Job.objects.requeue_stale(now - stale_after, tasks=[name])
+        requeued, failed = requeued + more_requeued, failed + more_failed
+    return requeued, failed
+
+
+def _close_old_connections():
+    """Drop broken or expired connections between batches, as Django does between requests.
+
+    A connection inside a transaction (e.g. when ``work`` is called from a
+    test or another command) is left alone.
+    """
+    for conn in connections.all(initialized_only=True):
+        if not conn.in_atomic_block:
+            conn.close_if_unusable_or_obsolete()
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def work(batch=10, poll=2.0, once=False, should_stop=lambda: False):
+    """Claim and run jobs until ``should_stop()``, or until the queue is drained with ``once``.
+
+    Returns the number of jobs run.
+    """
+    worker = worker_name()
+    done = 0
+    while not should_stop():
+        _close_old_connections()
+        jobs = Job.objects.claim(worker, batch)
+        for index, job in enumerate(jobs):
+            if should_stop():
+                Job.objects.release(jobs[index:])
+                break
+            run(job)
+            done += 1
+        if not jobs:
+            requeued, _ = requeue_stale()
+            if requeued:
+                continue
+            if once:
+                break
+            time.sleep(poll)
+    return done
@@ -0,0 +1,97 @@
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from core.metrics import percentile
+
+# The async read-only pages, and whether they need a staff session
+PAGES = [
+    ('dashboard', False),
+    ('user_loans', False),
+    ('target_history', False),
+    ('admin_dashboard', True),
+    ('admin_savings', True),
+    ('admin_welfare', True),
+]
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare p50/p99 latency of the read-only pages across running deployments, e.g. "
+        "--target wsgi=http://127.0.0.1:8000 --target asgi=http://127.0.0.1:8001. "
+        "Signs in a member and a staff user by creating sessions in the shared database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', required=True, metavar='NAME=URL')
+        parser.add_argument('--requests', type=int, default=200, help="Requests per page per target.")
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--member', default='benchmark-member')
+        parser.add_argument('--staff', default='benchmark-staff')
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options['target']:
+            name, sep, url = target.partition('=')
+            if not sep or not url:
+                raise CommandError(f"Expected NAME=URL, got {target!r}.")
+            targets.append((name, url.rstrip('/')))
+
+        cookies = {
+            False: self.session_cookie(options['member'], is_staff=False),
+            True: self.session_cookie(options['staff'], is_staff=True),
+        }
+        opener = urllib.request.build_opener(_NoRedirect)
+
+        self.stdout.write(f"{'page':<18}" + ''.join(f"{name + ' p50/p99 ms':>24}" for name, _ in targets))
+        failures = 0
+        for url_name, staff in PAGES:
+            row = f"{url_name:<18}"
+            for _, base in targets:
+                latencies, errors = self.measure(
+                    opener, base + reverse(url_name), cookies[staff], options,
+                )
+                failures += errors
+                row += f"{percentile(latencies, 50) * 1000:>15.1f} / {percentile(latencies, 99) * 1000:>6.1f}"
+            self.stdout.write(row)
+
+        if failures:
+            raise CommandError(f"{failures} requests did not return 200.")
+
+    def session_cookie(self, username, is_staff):
+        user, _ = User.objects.get_or_create(username=username, defaults={'is_staff': is_staff})
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        return f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+
+    def measure(self, opener, url, cookie, options):
+        def fetch(_):
+            request = urllib.request.Request(url, headers={'Cookie': cookie})
+            started = time.perf_counter()
+            try:
+                with opener.open(request, timeout=30) as response:
+                    response.read()
+                    ok = response.status == 200
+            except (urllib.error.URLError, OSError):
+                ok = False
+            return time.perf_counter() - started, ok
+
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(fetch, range(options['requests'])))
+        return [elapsed for elapsed, _ in results], sum(1 for _, ok in results if not ok)
@@ -0,0 +1,201 @@
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import urls
+from core.caching import CACHE_ALIAS
+from core.models import Loan
+
+# How each URL name in core/urls.py is exercised: (who, method, data).
+# Every request runs in a savepoint that is rolled back, so the actions
+# that change data can be measured too.
+CASES = {
+    'home': ('anonymous', 'get', None),
+    'register': ('anonymous', 'get', None),
+    'login': ('anonymous', 'get', None),
+    'logout': ('member', 'get', None),
+    'dashboard': ('member', 'get', None),
+    'dashboard_chart': ('member', 'get', None),
+    'apply_loan': ('member', 'get', None),
+    'admin_dashboard': ('staff', 'get', None),
+    'export_loans': ('staff', 'get', None),
+    'approve_loan': ('staff', 'get', None),
+    'reject_loan': ('staff', 'get', None),
+    'batch_loan_action': ('staff', 'post', {'action': 'approve', 'loan_ids': 'pending'}),
+    'record_repayment': ('staff', 'post', {'amount': '500'}),
+    'savings': ('member', 'get', None),
+    'reset_password': ('anonymous', 'get', None),
+    'password_reset_done': ('anonymous', 'get', None),
+    'password_reset_confirm': ('anonymous', 'get', None),
+    'password_reset_complete': ('anonymous', 'get', None),
+    'set_target': ('member', 'get', None),
+    'target_history': ('member', 'get', None),
+    'user_loans': ('member', 'get', None),
+    'admin_savings': ('staff', 'get', None),
+    'admin_savings_chart': ('staff', 'get', None),
+    'export_savings': ('staff', 'get', None),
+    'admin_import_statement': ('staff', 'get', None),
+    'welfare_contribution': ('member', 'get', None),
+    'statements': ('member', 'get', None),
+    'statement_download': ('member', 'get', None),
+    'admin_welfare': ('staff', 'get', None),
+    'admin_welfare_chart': ('staff', 'get', None),
+    'export_welfare': ('staff', 'get', None),
+    'metrics': ('staff', 'get', None),
+}
+
+# Growth below these absolute amounts is treated as noise, whatever the threshold
+NOISE_FLOOR = {'queries': 0, 'time_ms': 5.0, 'peak_kib': 64.0}
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every view in core/urls.py with the test client and record query count, "
+        "median wall time and peak memory. Writes the results as JSON and, given --baseline, "
+        "fails if any view regressed by more than --threshold. Run generate_sacco_data first "
+        "for realistic volumes. Clears the dashboard cache so every run starts cold."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help="Write the results to this JSON file.")
+        parser.add_argument('--baseline', help="Compare against results saved earlier with --output.")
+        parser.add_argument('--threshold', type=float, default=0.25, help="Allowed growth in queries and memory, as a fraction.")
+        parser.add_argument('--time-threshold', type=float, default=1.0, help="Allowed growth in wall time, as a fraction.")
+        parser.add_argument('--repeat', type=int, default=9)
+        parser.add_argument('--member', default='synthetic-00000')
+        parser.add_argument('--staff', default='benchmark-staff')
+
+    def handle(self, *args, **options):
+        names = [pattern.name for pattern in urls.urlpatterns]
+        missing = [name for name in names if name not in CASES]
+        if missing:
+            raise CommandError(f"No benchmark case for: {', '.join(missing)}. Add them to CASES.")
+
+        caches[CACHE_ALIAS].clear()
+        # The benchmark users and their sessions are rolled back with everything else
+        with transaction.atomic():
+            results = self.run(names, options)
+            transaction.set_rollback(True)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'views': results}, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Wrote {options['output']}")
+
+        if options['baseline']:
+            thresholds = {
+                'queries': options['threshold'],
+                'time_ms': options['time_threshold'],
+                'peak_kib': options['threshold'],
+            }
+            self.compare(results, options['baseline'], thresholds)
+
+    def run(self, names, options):
+        users = {
+            'anonymous': None,
+            'member': User.objects.get_or_create(username=options['member'])[0],
+            'staff': User.objects.get_or_create(username=options['staff'], defaults={'is_staff': True})[0],
+        }
+
+        results = {}
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for name in names:
+                who, method, data = CASES[name]
+                args = self.url_args(name)
+                if None in args:
+                    self.stdout.write(f"{name:<25} skipped, no loan in a suitable state")
+                    continue
+                request = (users[who], method, reverse(name, args=args), self.post_data(data))
+                results[name] = self.measure(*request, options['repeat'])
+                self.stdout.write(
+                    f"{name:<25} {results[name]['queries']:>4} queries "
+                    f"{results[name]['time_ms']:>9.1f} ms {results[name]['peak_kib']:>9.0f} KiB"
+                )
+        return results
+
+    def url_args(self, name):
+        if name in ('approve_loan', 'reject_loan'):
+            return [self.loan_id('PENDING')]
+        if name == 'record_repayment':
+            return [self.loan_id('APPROVED')]
+        if name == 'statement_download':
+            return [timezone.localtime().year]
+        if name == 'password_reset_confirm':
+            return ['MQ', 'set-password']
+        return []
+
+    def loan_id(self, status):
+        return Loan.objects.filter(status=status).values_list('id', flat=True).first()
+
+    def post_data(self, data):
+        if data and data.get('loan_ids') == 'pending':
+            ids = list(Loan.objects.filter(status='PENDING').values_list('id', flat=True)[:20])
+            return {**data, 'loan_ids': ids}
+        return data
+
+    def measure(self, user, method, url, data, repeat):
+        timings, queries = [], []
+        for _ in range(repeat):
+            elapsed, count = self.request(user, method, url, data)
+            timings.append(elapsed)
+            queries.append(count)
+
+        # A separate run for memory, since tracing slows everything down
+        tracemalloc.start()
+        try:
+            self.request(user, method, url, data)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'queries': max(queries),
+            'time_ms': round(statistics.median(timings) * 1000, 2),
+            'peak_kib': round(peak / 1024, 1),
+        }
+
+    def request(self, user, method, url, data):
+        """Make one request in a rolled-back savepoint; return its wall time and query count."""
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        with transaction.atomic(), CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = getattr(client, method)(url, data)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        return elapsed, len(captured)
+
+    def compare(self, results, path, thresholds):
+        with open(path) as f:
+            baseline = json.load(f)['views']
+
+        regressions = []
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            for metric, floor in NOISE_FLOOR.items():
+                growth = result[metric] - before[metric]
+                if growth > floor and result[metric] > before[metric] * (1 + thresholds[metric]):
+                    regressions.append(
+                        f"{name} {metric}: {before[metric]} -> {result[metric]} (over {thresholds[metric]:.0%})"
+                    )
+
+        if regressions:
+            raise CommandError(f"{len(regressions)} regression(s):\n" + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS("No view regressed beyond its threshold."))
@@ -0,0 +1,108 @@
+import random
+from datetime import datetime
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Installment, Loan, Savings, SavingsTarget, WelfareContribution
+from core.services.loans import LOAN_TERMS
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic members with years of monthly savings, targets, welfare "
+        "contributions and loans for load testing. Rows are written with bulk_create, "
+        "then balances and rollups are rebuilt."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=100)
+        parser.add_argument('--years', type=int, default=2, help="Months of history per member, in years.")
+        parser.add_argument('--prefix', default='synthetic-', help="Username prefix of the generated members.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--clear', action='store_true', help="Delete earlier members with the same prefix first.")
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        existing = User.objects.filter(username__startswith=prefix)
+        if existing.exists():
+            if not options['clear']:
+                raise CommandError(f"Members named {prefix}* already exist; pass --clear to replace them.")
+            existing.delete()
+
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        months = self.months(options['years'])
+
+        with transaction.atomic():
+            password = make_password(None)
+            members = User.objects.bulk_create(
+                [User(username=f'{prefix}{i:05}', password=password) for i in range(options['members'])],
+                batch_size=batch_size,
+            )
+
+            savings, targets, welfare, loans = [], [], [], []
+            for member in members:
+                monthly = Decimal(rng.randrange(500, 5000, 50))
+                for year, month in months:
+                    targets.append(SavingsTarget(user=member, year=year, month=month, amount=monthly))
+                    # Most members hit roughly their target; some skip a month
+                    if rng.random() < 0.9:
+                        savings.append(Savings(
+                            user=member,
+                            amount=(monthly * Decimal(rng.uniform(0.5, 1.3))).quantize(Decimal('1')),
+                            date_saved=self.moment(rng, year, month),
+                            description='Monthly savings',
+                        ))
+                    if rng.random() < 0.8:
+                        welfare.append(WelfareContribution(
+                            user=member, amount=Decimal('200'), date_contributed=self.moment(rng, year, month),
+                        ))
+                    if rng.random() < 0.08:
+                        loans.append(self.loan(rng, member, monthly, year, month))
+
+            Savings.objects.bulk_create(savings, batch_size=batch_size)
+            SavingsTarget.objects.bulk_create(targets, batch_size=batch_size)
+            WelfareContribution.objects.bulk_create(welfare, batch_size=batch_size)
+            Loan.objects.bulk_create(loans, batch_size=batch_size)
+            # date_applied is auto_now_add, so backdate it after the insert
+            for loan in loans:
+                loan.date_applied = loan.approval_date or loan.due_date
+            Loan.objects.bulk_update(loans, ['date_applied'], batch_size=batch_size)
+            Installment.objects.create_schedules([loan for loan in loans if loan.status == 'APPROVED'])
+
+        call_command('rebuild_balances', stdout=self.stdout)
+        call_command('rebuild_rollups', stdout=self.stdout)
+        call_command('rebuild_loan_summary', stdout=self.stdout)
+        call_command('rebuild_member_search', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(members)} members, {len(savings)} savings, {len(targets)} targets, "
+            f"{len(welfare)} welfare contributions and {len(loans)} loans."
+        ))
+
+    def months(self, years):
+        now = timezone.localtime()
+        index = now.year * 12 + now.month - 1
+        return [(i // 12, i % 12 + 1) for i in range(index - years * 12 + 1, index + 1)]
+
+    def moment(self, rng, year, month):
+        return timezone.make_aware(datetime(year, month, rng.randint(1, 28), rng.randint(7, 20), rng.randint(0, 59)))
+
+    def loan(self, rng, member, monthly, year, month):
+        applied = self.moment(rng, year, month)
+        status = rng.choices(['APPROVED', 'REJECTED', 'PENDING'], weights=[7, 2, 1])[0]
+        return Loan(
+            user=member,
+            amount=(monthly * rng.randint(1, 3)).quantize(Decimal('1')),
+            purpose=rng.choice(['School fees', 'Business stock', 'Medical bills', 'Farm inputs', 'Rent']),
+            status=status,
+            approval_date=applied if status != 'PENDING' else None,
+            due_date=applied,
+            term_months=rng.choice(LOAN_TERMS),
+        )
@@ -0,0 +1,60 @@
+import os
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.models import StatementRequest
+from core.statements import FORMATS, build_many
+
+
+class Command(BaseCommand):
+    help = (
+        "Render queued member statements on a pool of worker processes. With --year "
+        "and --all-members, queue and render that year's statement for every member."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help="Worker processes; 0 renders in this process.")
+        parser.add_argument('--limit', type=int, help="Render at most this many queued statements.")
+        parser.add_argument('--year', type=int)
+        parser.add_argument('--all-members', action='store_true', help="Queue --year for every member first.")
+        parser.add_argument('--format', choices=sorted(FORMATS), default='html')
+
+    def handle(self, *args, **options):
+        if options['all_members']:
+            if not options['year']:
+                raise CommandError("--all-members needs --year.")
+            members = User.objects.filter(is_staff=False).values_list('id', flat=True)
+            StatementRequest.objects.bulk_create(
+                [
+                    StatementRequest(user_id=user_id, year=options['year'], format=options['format'])
+                    for user_id in members.iterator()
+                ],
+                batch_size=1000,
+                ignore_conflicts=True,  # already queued
+            )
+
+        requests = StatementRequest.objects.claim(options['limit'])
+        by_job = {(r.user_id, r.year, r.format): r for r in requests}
+
+        started = time.perf_counter()
+        done = failed = 0
+        for job, size, error in build_many(list(by_job), options['workers']):
+            request = by_job[job]
+            request.finished_at = timezone.now()
+            if error:
+                request.status, request.error = StatementRequest.FAILED, error
+                failed += 1
+                self.stderr.write(f"{job}: {error}")
+            else:
+                request.status = StatementRequest.DONE
+                done += 1
+            request.save(update_fields=['status', 'error', 'finished_at'])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {done} statement(s) in {elapsed:.1f}s on {options['workers'] or 1} worker(s); {failed} failed."
+        ))
@@ -0,0 +1,33 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.mpesa import STREAMS, StatementError, import_statement
+
+
+class Command(BaseCommand):
+    help = "Import an M-PESA paybill statement CSV into Savings or WelfareContribution."
+
+    def add_arguments(self, parser):
+        parser.add_argument('statement', help="Path to the statement CSV.")
+        parser.add_argument('--stream', choices=sorted(STREAMS), default='savings')
+        parser.add_argument('--rejects', help="Where to write rejected rows (default: <statement>.rejects.csv).")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rejects_path = options['rejects'] or f"{options['statement']}.rejects.csv"
+        try:
+            with open(options['statement'], newline='', encoding='utf-8-sig') as statement, \
+                    open(rejects_path, 'w', newline='') as rejects:
+                result = import_statement(
+                    statement,
+                    stream=options['stream'],
+                    rejects=csv.writer(rejects),
+                    batch_size=options['batch_size'],
+                )
+        except (OSError, StatementError) as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(f"{options['statement']}: {result}"))
+        if result.rejected:
+            self.stdout.write(f"Rejected rows written to {rejects_path}")
@@ -0,0 +1,161 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, suppress
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections
+from django.db.models import Sum
+
+from core.metrics import percentile
+from core.models import MemberBalance, Savings
+
+# What a fresh SQLite database does without core.signals.tune_sqlite.
+STOCK_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+
+def scratch_database(path, pragmas, options):
+    """Settings for the SQLite file at ``path``, tuned with ``pragmas`` and connection ``options``."""
+    return connections.configure_settings({
+        DEFAULT_DB_ALIAS: {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': path,
+            'PRAGMAS': pragmas,
+            'OPTIONS': options,
+        },
+    })[DEFAULT_DB_ALIAS]
+
+
+@contextmanager
+def using_database(database):
+    """Point the default connection at ``database`` in every thread, then put it back."""
+    original = connections.settings[DEFAULT_DB_ALIAS]
+
+    def switch(settings_dict):
+        # Journal mode can only change while no other connection is open.
+        connections.close_all()
+        with suppress(AttributeError):  # not connected yet in this thread
+            del connections[DEFAULT_DB_ALIAS]
+        connections.settings[DEFAULT_DB_ALIAS] = settings_dict
+
+    switch(database)
+    try:
+        yield
+    finally:
+        switch(original)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a mixed read/write workload against scratch SQLite databases, first with "
+        "SQLite's stock journal and transaction settings and then with SQLITE_PRAGMAS and "
+        "the configured connection options, and compare throughput. The configured "
+        "database is not touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=5.0)
+        parser.add_argument('--username', default='load-test-member')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("load_test_database compares SQLite settings; the configured database is not SQLite.")
+
+        results = {}
+        with tempfile.TemporaryDirectory() as scratch:
+            stock_path, tuned_path = os.path.join(scratch, 'stock.sqlite3'), os.path.join(scratch, 'tuned.sqlite3')
+            passes = [
+                # Django's default deferred transactions, as on a stock install
+                ('stock', scratch_database(stock_path, STOCK_PRAGMAS, {})),
+                ('tuned', scratch_database(
+                    tuned_path, settings.SQLITE_PRAGMAS, settings.DATABASES[DEFAULT_DB_ALIAS].get('OPTIONS', {}),
+                )),
+            ]
+            # Migrate once; the tuned pass starts from a copy in the stock journal mode
+            with using_database(passes[0][1]):
+                call_command('migrate', verbosity=0, interactive=False)
+            shutil.copyfile(stock_path, tuned_path)
+
+            for label, database in passes:
+                with using_database(database):
+                    results[label] = self.run_pass(options)
+                    journal = self.journal_mode()
+                self.stdout.write(self.format_result(label, journal, results[label]))
+
+        stock, tuned = results['stock'], results['tuned']
+        self.stdout.write(self.style.SUCCESS(
+            f"Tuned vs stock: reads {_ratio(tuned['reads'], stock['reads'])}, "
+            f"writes {_ratio(tuned['writes'], stock['writes'])}, "
+            f"errors {stock['errors']} -> {tuned['errors']}"
+        ))
+
+    def run_pass(self, options):
+        member, _ = User.objects.get_or_create(username=options['username'])
+        counts = {'reads': 0, 'writes': 0, 'errors': 0}
+        read_latencies = []
+        lock = threading.Lock()
+        deadline = time.perf_counter() + options['seconds']
+
+        def read():
+            balance = MemberBalance.objects.for_user(member)
+            Savings.objects.filter(user=member).aggregate(total=Sum('amount'))
+            return balance
+
+        def write():
+            Savings.objects.create(user=member, amount=Decimal('10'), description='load test')
+
+        def worker(kind):
+            operation = read if kind == 'reads' else write
+            try:
+                while time.perf_counter() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        operation()
+                        outcome = kind
+                    except OperationalError:
+                        outcome = 'errors'
+                    with lock:
+                        counts[outcome] += 1
+                        if outcome == 'reads':
+                            read_latencies.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+
+        kinds = ['reads'] * options['readers'] + ['writes'] * options['writers']
+        try:
+            with ThreadPoolExecutor(max_workers=len(kinds)) as pool:
+                list(pool.map(worker, kinds))
+        finally:
+            member.delete()
+
+        seconds = options['seconds']
+        return {
+            'reads': counts['reads'] / seconds,
+            'writes': counts['writes'] / seconds,
+            'errors': counts['errors'],
+            'p99_ms': percentile(read_latencies, 99) * 1000,
+        }
+
+    def journal_mode(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            return cursor.fetchone()[0]
+
+    def format_result(self, label, journal, result):
+        return (
+            f"{label:>6} ({journal}): {result['reads']:.0f} reads/s, {result['writes']:.0f} writes/s, "
+            f"read p99 {result['p99_ms']:.1f}ms, {result['errors']} errors"
+        )
+
+
+def _ratio(value, baseline):
+    return f"{value / baseline:.1f}x" if baseline else 'n/a'
@@ -0,0 +1,27 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Loan
+
+
+class Command(BaseCommand):
+    help = "Approve or reject a batch of pending loans in one transaction."
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['approve', 'reject'])
+        parser.add_argument('loan_ids', nargs='+', type=int)
+        parser.add_argument('--by', required=True, help="Username of the staff member recorded as approver.")
+
+    def handle(self, *args, **options):
+        try:
+            staff = User.objects.get(username=options['by'], is_staff=True)
+        except User.DoesNotExist:
+            raise CommandError(f"No staff user named {options['by']!r}.")
+
+        status = 'APPROVED' if options['action'] == 'approve' else 'REJECTED'
+        results = Loan.objects.transition(options['loan_ids'], status, staff)
+
+        for loan_id in sorted(results):
+            self.stdout.write(f"{loan_id}\t{results[loan_id]}")
+        done = sum(1 for result in results.values() if result == status)
+        self.stdout.write(self.style.SUCCESS(f"{done} of {len(results)} loan(s) {status.lower()}."))
@@ -0,0 +1,77 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Sum
+
+from core.models import Installment, Loan, MemberBalance, Savings, WelfareContribution
+
+
+FIELDS = ('savings_total', 'welfare_total', 'loan_exposure')
+
+
+class Command(BaseCommand):
+    help = "Rebuild MemberBalance rows from Savings, WelfareContribution and Loan, or verify them with --verify."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help="Only report mismatches, do not write.")
+
+    def expected_balances(self):
+        """Compute every member's balance with one grouped query per source table."""
+        expected = {}
+
+        def collect(queryset, field):
+            for row in queryset.values('user_id').annotate(total=Sum('amount')):
+                expected.setdefault(row['user_id'], dict.fromkeys(FIELDS, 0))[field] = row['total']
+
+        collect(Savings.objects.all(), 'savings_total')
+        collect(WelfareContribution.objects.all(), 'welfare_total')
+        collect(Loan.objects.filter(status__in=MemberBalance.EXPOSURE_STATUSES), 'loan_exposure')
+
+        repaid = (
+            Installment.objects.filter(loan__status='APPROVED')
+            .values('loan__user_id').annotate(total=Sum('principal_paid'))
+        )
+        for row in repaid:
+            expected.setdefault(row['loan__user_id'], dict.fromkeys(FIELDS, 0))['loan_exposure'] -= row['total']
+        return expected
+
+    def handle(self, *args, **options):
+        expected = self.expected_balances()
+        stored = {b.user_id: b for b in MemberBalance.objects.all()}
+
+        mismatches = []
+        for user_id in set(expected) | set(stored):
+            want = expected.get(user_id, dict.fromkeys(FIELDS, 0))
+            have = stored.get(user_id)
+            if have is None or any(getattr(have, f) != want[f] for f in FIELDS):
+                mismatches.append((user_id, want))
+
+        if options['verify']:
+            for user_id, want in mismatches:
+                have = stored.get(user_id)
+                current = {f: getattr(have, f) for f in FIELDS} if have else None
+                self.stdout.write(f"user {user_id}: stored {current}, expected {want}")
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} member balance(s) out of sync.")
+            self.stdout.write(self.style.SUCCESS(f"All {len(stored)} member balances match."))
+            return
+
+        existing_users = set(User.objects.filter(pk__in=[u for u, _ in mismatches]).values_list('pk', flat=True))
+        with transaction.atomic():
+            to_create, to_update = [], []
+            for user_id, want in mismatches:
+                if user_id not in existing_users:
+                    continue
+                if user_id in stored:
+                    balance = stored[user_id]
+                    for field in FIELDS:
+                        setattr(balance, field, want[field])
+                    to_update.append(balance)
+                else:
+                    to_create.append(MemberBalance(user_id=user_id, **want))
+            MemberBalance.objects.bulk_create(to_create, batch_size=1000)
+            MemberBalance.objects.bulk_update(to_update, FIELDS, batch_size=1000)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(to_create) + len(to_update)} member balance(s)."
+        ))
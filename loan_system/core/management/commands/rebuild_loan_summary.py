@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import LoanStatusSummary
+
+FIELDS = ('count', 'total', 'principal_repaid')
+
+
+class Command(BaseCommand):
+    help = "Rebuild the LoanStatusSummary counters from Loan and Installment, or verify them with --verify."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help="Only report mismatches, do not write.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            expected = LoanStatusSummary.objects.compute()
+            stored = {row.status: row for row in LoanStatusSummary.objects.select_for_update()}
+
+            mismatches = []
+            for status in set(expected) | set(stored):
+                want = dict(zip(FIELDS, expected.get(status, (0, 0, 0))))
+                have = stored.get(status)
+                current = {field: getattr(have, field) for field in FIELDS} if have else dict.fromkeys(FIELDS, 0)
+                if current != want:
+                    mismatches.append((status, current, want))
+
+            if options['verify']:
+                for status, current, want in mismatches:
+                    self.stdout.write(f"{status}: stored {current}, expected {want}")
+                if mismatches:
+                    raise CommandError(f"{len(mismatches)} loan status counter(s) out of sync.")
+                self.stdout.write(self.style.SUCCESS(f"All {len(stored)} loan status counters match."))
+                return
+
+            for status, _, want in mismatches:
+                LoanStatusSummary.objects.update_or_create(status=status, defaults=want)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(mismatches)} loan status counter(s)."))
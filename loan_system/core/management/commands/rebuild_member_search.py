@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the member search index used by the admin filters from auth_user. "
+        "Only needed after members were written without signals, e.g. by bulk_create."
+    )
+
+    def handle(self, *args, **options):
+        if not search.uses_fts():
+            self.stdout.write("This database searches auth_user through its trigram indexes; nothing to rebuild.")
+            return
+        count = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} member(s)."))
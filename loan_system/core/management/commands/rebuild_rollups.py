@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from core.models import DataVersion, MonthlyRollup, Savings, WelfareContribution
+
+
+SOURCES = (
+    (MonthlyRollup.SAVINGS, Savings, 'date_saved'),
+    (MonthlyRollup.WELFARE, WelfareContribution, 'date_contributed'),
+)
+
+
+class Command(BaseCommand):
+    help = "Back-fill MonthlyRollup from Savings and WelfareContribution, or check it with --verify."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help="Only report mismatches, do not write.")
+
+    def expected_rollups(self):
+        """Group every source table by member and month, plus a SACCO-wide total per month."""
+        expected = {}
+        for stream, model, date_field in SOURCES:
+            rows = (
+                model.objects
+                .annotate(year=ExtractYear(date_field), month=ExtractMonth(date_field))
+                .values('user_id', 'year', 'month')
+                .annotate(total=Sum('amount'), entries=Count('id'))
+                .order_by()
+            )
+            for row in rows.iterator(chunk_size=2000):
+                expected[(row['user_id'], stream, row['year'], row['month'])] = (row['total'], row['entries'])
+                total, entries = expected.get((None, stream, row['year'], row['month']), (0, 0))
+                expected[(None, stream, row['year'], row['month'])] = (total + row['total'], entries + row['entries'])
+        return expected
+
+    def handle(self, *args, **options):
+        expected = self.expected_rollups()
+
+        if options['verify']:
+            stored = {
+                (r.user_id, r.stream, r.year, r.month): (r.total, r.entries)
+                for r in MonthlyRollup.objects.iterator(chunk_size=2000)
+            }
+            mismatches = [key for key in set(expected) | set(stored) if expected.get(key) != stored.get(key)]
+            for key in sorted(mismatches, key=str):
+                self.stdout.write(f"{key}: stored {stored.get(key)}, expected {expected.get(key)}")
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} monthly rollup(s) out of sync.")
+            self.stdout.write(self.style.SUCCESS(f"All {len(stored)} monthly rollups match."))
+            return
+
+        with transaction.atomic():
+            MonthlyRollup.objects.all().delete()
+            MonthlyRollup.objects.bulk_create(
+                [
+                    MonthlyRollup(user_id=user_id, stream=stream, year=year, month=month, total=total, entries=entries)
+                    for (user_id, stream, year, month), (total, entries) in expected.items()
+                ],
+                batch_size=1000,
+            )
+            # Charts drawn from the old rows must not be revalidated as current
+            DataVersion.objects.bump([
+                *DataVersion.objects.values_list('scope', flat=True),
+                *(DataVersion.scope_for(stream, user_id) for user_id, stream, _, _ in expected),
+            ])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(expected)} monthly rollup(s)."))
@@ -0,0 +1,64 @@
+import multiprocessing
+import signal
+import time
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import jobs
+
+
+def _child(stop, done, batch, poll, once):
+    """Entry point of one worker process."""
+    django.setup()
+    # Ctrl-C reaches the whole process group; let the parent decide when to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    count = jobs.work(batch=batch, poll=poll, once=once, should_stop=stop.is_set)
+    with done.get_lock():
+        done.value += count
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (statement imports, reminder emails). Each process "
+        "claims due jobs in batches, so several workers, on one machine or many, can "
+        "share the queue. SIGTERM or Ctrl-C finishes the job in hand and releases the rest."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help="Worker processes to run.")
+        parser.add_argument('--batch', type=int, default=10, help="Jobs claimed at a time.")
+        parser.add_argument('--poll', type=float, default=2.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument('--once', action='store_true', help="Exit once no job is due.")
+
+    def handle(self, *args, **options):
+        stop = multiprocessing.Event()
+        done = multiprocessing.Value('i', 0)
+        args = (stop, done, options['batch'], options['poll'], options['once'])
+        previous = {sig: signal.signal(sig, lambda *a: stop.set()) for sig in (signal.SIGINT, signal.SIGTERM)}
+
+        started = time.perf_counter()
+        try:
+            if options['processes'] <= 1:
+                done.value = jobs.work(*args[2:], should_stop=stop.is_set)
+            else:
+                # Forked children must not share this process's connections
+                connections.close_all()
+                children = [
+                    multiprocessing.Process(target=_child, args=args, name=f'runworker-{i}')
+                    for i in range(options['processes'])
+                ]
+                for child in children:
+                    child.start()
+                for child in children:
+                    child.join()
+        finally:
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Ran {done.value} job(s) in {elapsed:.1f}s on {max(options['processes'], 1)} process(es)."
+        ))
@@ -0,0 +1,35 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import notifications
+from core.models import Notification
+
+
+class Command(BaseCommand):
+    help = (
+        "Warn members who have saved nothing by mid-month and members with overdue loan "
+        "repayments. Records a notification per warning and emails the unsent ones in chunks. "
+        "Safe to run daily from cron; nobody is warned twice about the same thing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Run as of this date (YYYY-MM-DD) instead of today.")
+        parser.add_argument('--chunk-size', type=int, default=notifications.CHUNK_SIZE,
+                            help="Emails sent per batch.")
+        parser.add_argument('--no-email', action='store_true', help="Only record the notifications.")
+
+    def handle(self, *args, **options):
+        try:
+            today = date.fromisoformat(options['date']) if options['date'] else None
+        except ValueError:
+            raise CommandError(f"Invalid --date {options['date']!r}; use YYYY-MM-DD.")
+
+        found = notifications.create(today)
+        self.stdout.write(
+            f"{found[Notification.MID_MONTH_WARNING]} member(s) without savings this month, "
+            f"{found[Notification.OVERDUE_LOAN]} overdue loan(s)."
+        )
+        if not options['no_email']:
+            sent = notifications.send(options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(f"Sent {sent} email(s)."))
@@ -0,0 +1,66 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.db.models import Sum
+
+from core.models import Loan, LoanLimitExceeded, MemberBalance, Savings
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent loan applications for one member from many threads and check "
+        "that their total never exceeds the loan limit. Creates its own member."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--applications', type=int, default=200)
+        parser.add_argument('--savings', type=Decimal, default=Decimal('1000'))
+        parser.add_argument('--amount', type=Decimal, default=Decimal('70'))
+        parser.add_argument('--username', default='stress-member')
+
+    def handle(self, *args, **options):
+        if options['amount'] <= 0:
+            raise CommandError("--amount must be greater than zero.")
+        member, _ = User.objects.get_or_create(username=options['username'])
+        Loan.objects.filter(user=member).delete()
+        Savings.objects.filter(user=member).delete()
+        Savings.objects.create(user=member, amount=options['savings'], description='stress test')
+        limit = MemberBalance.objects.for_user(member).available_limit
+
+        outcomes = {'accepted': 0, 'rejected': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def apply(_):
+            try:
+                Loan.objects.apply(member, options['amount'], 'stress test')
+                outcome = 'accepted'
+            except LoanLimitExceeded:
+                outcome = 'rejected'
+            except OperationalError:
+                outcome = 'errors'
+            finally:
+                connection.close()
+            with lock:
+                outcomes[outcome] += 1
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            list(pool.map(apply, range(options['applications'])))
+        elapsed = time.perf_counter() - started
+
+        exposure = Loan.objects.filter(user=member).aggregate(total=Sum('amount'))['total'] or 0
+        self.stdout.write(
+            f"{options['applications']} applications on {options['threads']} threads in {elapsed:.2f}s "
+            f"({options['applications'] / elapsed:.0f}/s): {outcomes['accepted']} accepted, "
+            f"{outcomes['rejected']} rejected, {outcomes['errors']} errors"
+        )
+        self.stdout.write(f"Limit KES {limit:.2f}, total applied KES {exposure:.2f}")
+        if exposure > limit:
+            raise CommandError("Concurrent applications exceeded the loan limit.")
+        self.stdout.write(self.style.SUCCESS("Limit held under concurrency."))
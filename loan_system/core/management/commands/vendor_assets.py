@@ -0,0 +1,37 @@
+from pathlib import Path
+from urllib.request import urlopen
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from core.assets import VENDOR_FILES
+
+
+class Command(BaseCommand):
+    help = (
+        "Download the pinned third-party CSS, JS and fonts into core/static/core/vendor/. "
+        "Commit the files so deployments serve them without internet access."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Download files that are already vendored again.")
+
+    def handle(self, *args, **options):
+        static_dir = Path(apps.get_app_config('core').path) / 'static'
+        fetched = 0
+        for path, url in VENDOR_FILES.items():
+            target = static_dir / path
+            if target.exists() and not options['force']:
+                continue
+            try:
+                with urlopen(url, timeout=30) as response:
+                    data = response.read()
+            except OSError as exc:
+                raise CommandError(f"Could not download {url}: {exc}")
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(data)
+            fetched += 1
+            self.stdout.write(f"{path} ({len(data):,} bytes)")
+        self.stdout.write(self.style.SUCCESS(
+            f"Downloaded {fetched} file(s); {len(VENDOR_FILES) - fetched} already vendored."
+        ))
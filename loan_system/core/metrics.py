@@ -0,0 +1,152 @@
+"""Per-view request metrics: query count, database time and render time.
+
+``RequestMetricsMiddleware`` opens a ``Recorder`` for each request. Queries
+are counted by ``record_query``, which ``core.signals`` installs on every
+database connection, and template rendering is timed by the
+``TimedDjangoTemplates`` backend. Both find the request's recorder through a
+context variable, so async views whose queries run on another thread are
+counted too. Finished requests are kept in a rolling window per URL name and
+exposed in Prometheus text format by ``prometheus_text``.
+"""
+import logging
+import statistics
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+logger = logging.getLogger(__name__)
+
+# Requests kept per URL name for the percentiles
+WINDOW = 1000
+QUANTILES = (50, 90, 99)
+
+# (metric name, recorder attribute, help text)
+SERIES = [
+    ('sacco_request_duration_seconds', 'total', 'Time spent handling the request.'),
+    ('sacco_request_db_seconds', 'db', 'Time spent in database queries.'),
+    ('sacco_request_render_seconds', 'render', 'Time spent rendering templates.'),
+    ('sacco_request_queries', 'queries', 'Database queries per request.'),
+]
+
+_current = ContextVar('request_metrics', default=None)
+_lock = threading.Lock()
+_windows = defaultdict(lambda: deque(maxlen=WINDOW))
+_totals = defaultdict(lambda: dict.fromkeys(['count', *(attr for _, attr, _ in SERIES)], 0))
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def percentile(values, pct):
+    """Return the ``pct``-th percentile of ``values`` (0 for an empty list)."""
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method='inclusive')[pct - 1]
+
+
+class Recorder:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.render = 0.0
+        self.total = 0.0
+
+    def start(self):
+        return _current.set(self)
+
+    def stop(self, token):
+        self.total = time.perf_counter() - self.started
+        _current.reset(token)
+
+    def server_timing(self):
+        return (
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries", '
+            f'render;dur={self.render * 1000:.1f}, total;dur={self.total * 1000:.1f}'
+        )
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper adding each query to the current request's recorder."""
+    recorder = _current.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        recorder.queries += 1
+        recorder.db += time.perf_counter() - started
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        recorder = _current.get()
+        if recorder is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            recorder.render += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing each top-level render."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def observe(view, recorder):
+    """Add a finished request to ``view``'s window and check its query budget."""
+    with _lock:
+        _windows[view].append(recorder)
+        totals = _totals[view]
+        totals['count'] += 1
+        for _, attr, _ in SERIES:
+            totals[attr] += getattr(recorder, attr)
+
+    budget = getattr(settings, 'QUERY_BUDGETS', {}).get(view)
+    if budget is not None and recorder.queries > budget:
+        message = f"{view} ran {recorder.queries} queries, over its budget of {budget}"
+        if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+def reset():
+    with _lock:
+        _windows.clear()
+        _totals.clear()
+
+
+def prometheus_text():
+    """Render the collected metrics in the Prometheus text exposition format."""
+    with _lock:
+        windows = {view: list(window) for view, window in _windows.items()}
+        totals = {view: dict(values) for view, values in _totals.items()}
+
+    lines = []
+    for name, attr, help_text in SERIES:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} summary')
+        for view in sorted(windows):
+            values = sorted(getattr(recorder, attr) for recorder in windows[view])
+            for pct in QUANTILES:
+                lines.append(f'{name}{{view="{view}",quantile="{pct / 100}"}} {percentile(values, pct):g}')
+            lines.append(f'{name}_sum{{view="{view}"}} {totals[view][attr]:g}')
+            lines.append(f'{name}_count{{view="{view}"}} {totals[view]["count"]}')
+    return '\n'.join(lines) + '\n'
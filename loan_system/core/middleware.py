@@ -0,0 +1,46 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .metrics import Recorder, observe
+
+
+class RequestMetricsMiddleware:
+    """Record query count, database time and render time per URL name.
+
+    Adds a ``Server-Timing`` header to every response and feeds the
+    ``/metrics`` endpoint. Place it first so the other middleware's queries
+    (session, user) are counted too.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = Recorder()
+        token = recorder.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            recorder.stop(token)
+        return self.finish(request, response, recorder)
+
+    async def __acall__(self, request):
+        recorder = Recorder()
+        token = recorder.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            recorder.stop(token)
+        return self.finish(request, response, recorder)
+
+    def finish(self, request, response, recorder):
+        response['Server-Timing'] = recorder.server_timing()
+        match = request.resolver_match
+        observe(match.url_name if match and match.url_name else 'unresolved', recorder)
+        return response
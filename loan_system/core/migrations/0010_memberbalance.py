@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_balances(apps, schema_editor):
+    MemberBalance = apps.get_model('core', 'MemberBalance')
+    balances = {}
+
+    def collect(queryset, field):
+        for row in queryset.values('user_id').annotate(total=Sum('amount')):
+            balances.setdefault(row['user_id'], {})[field] = row['total']
+
+    collect(apps.get_model('core', 'Savings').objects.all(), 'savings_total')
+    collect(apps.get_model('core', 'WelfareContribution').objects.all(), 'welfare_total')
+    collect(apps.get_model('core', 'Loan').objects.filter(status__in=('PENDING', 'APPROVED')), 'loan_exposure')
+
+    MemberBalance.objects.bulk_create(
+        [MemberBalance(user_id=user_id, **totals) for user_id, totals in balances.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_welfarecontribution'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('savings_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('welfare_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('loan_exposure', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='balance', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_memberbalance'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['status', 'date_applied'], name='loan_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['user', 'status', 'date_applied'], name='loan_user_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['user', 'date_applied'], name='loan_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['date_applied'], name='loan_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savings',
+            index=models.Index(fields=['user', 'date_saved'], name='savings_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savings',
+            index=models.Index(fields=['date_saved'], name='savings_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='welfarecontribution',
+            index=models.Index(fields=['date_contributed'], name='welfare_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='welfarecontribution',
+            index=models.Index(fields=['user', 'date_contributed'], name='welfare_user_date_idx'),
+        ),
+    ]
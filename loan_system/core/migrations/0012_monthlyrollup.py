@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def backfill_rollups(apps, schema_editor):
+    MonthlyRollup = apps.get_model('core', 'MonthlyRollup')
+    rollups = {}
+
+    for stream, model_name, date_field in (
+        ('SAVINGS', 'Savings', 'date_saved'),
+        ('WELFARE', 'WelfareContribution', 'date_contributed'),
+    ):
+        rows = (
+            apps.get_model('core', model_name).objects
+            .annotate(year=ExtractYear(date_field), month=ExtractMonth(date_field))
+            .values('user_id', 'year', 'month')
+            .annotate(total=Sum('amount'), entries=Count('id'))
+            .order_by()
+        )
+        for row in rows:
+            for user_id in (row['user_id'], None):
+                key = (user_id, stream, row['year'], row['month'])
+                total, entries = rollups.get(key, (0, 0))
+                rollups[key] = (total + row['total'], entries + row['entries'])
+
+    MonthlyRollup.objects.bulk_create(
+        [
+            MonthlyRollup(user_id=user_id, stream=stream, year=year, month=month, total=total, entries=entries)
+            for (user_id, stream, year, month), (total, entries) in rollups.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stream', models.CharField(choices=[('SAVINGS', 'Savings'), ('WELFARE', 'Welfare')], max_length=10)),
+                ('year', models.IntegerField()),
+                ('month', models.IntegerField()),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('entries', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('user__isnull', False)), fields=('user', 'stream', 'year', 'month'), name='rollup_member_month_uniq'), models.UniqueConstraint(condition=models.Q(('user__isnull', True)), fields=('stream', 'year', 'month'), name='rollup_global_month_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
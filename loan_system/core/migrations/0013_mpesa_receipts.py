@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:24
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_monthlyrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='savings',
+            name='mpesa_receipt',
+            field=models.CharField(blank=True, max_length=20, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='welfarecontribution',
+            name='mpesa_receipt',
+            field=models.CharField(blank=True, max_length=20, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='savings',
+            name='date_saved',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:28
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_mpesa_receipts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loan',
+            name='interest_method',
+            field=models.CharField(choices=[('REDUCING', 'Reducing balance'), ('FLAT', 'Flat rate')], default='REDUCING', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='loan',
+            name='interest_rate',
+            field=models.DecimalField(decimal_places=2, default=Decimal('12.00'), max_digits=5),
+        ),
+        migrations.AddField(
+            model_name='loan',
+            name='term_months',
+            field=models.PositiveSmallIntegerField(default=1),
+        ),
+        migrations.CreateModel(
+            name='Installment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveSmallIntegerField()),
+                ('due_date', models.DateField()),
+                ('principal', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('interest', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('principal_paid', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('interest_paid', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('paid_at', models.DateTimeField(blank=True, null=True)),
+                ('loan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='installments', to='core.loan')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('paid_at__isnull', True)), fields=['due_date'], name='installment_unpaid_due_idx')],
+                'unique_together': {('loan', 'number')},
+            },
+        ),
+    ]
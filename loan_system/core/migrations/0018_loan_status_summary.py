@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:56
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_summary(apps, schema_editor):
+    Loan = apps.get_model('core', 'Loan')
+    Installment = apps.get_model('core', 'Installment')
+    LoanStatusSummary = apps.get_model('core', 'LoanStatusSummary')
+    loans = {
+        row['status']: row
+        for row in Loan.objects.values('status').annotate(count=Count('id'), total=Sum('amount')).order_by()
+    }
+    repaid = {
+        row['loan__status']: row['total']
+        for row in Installment.objects.values('loan__status').annotate(total=Sum('principal_paid')).order_by()
+    }
+    # A row for every status, so the counters never need creating on the hot path
+    LoanStatusSummary.objects.bulk_create([
+        LoanStatusSummary(
+            status=status,
+            count=loans.get(status, {}).get('count', 0),
+            total=loans.get(status, {}).get('total', 0),
+            principal_repaid=repaid.get(status) or 0,
+        )
+        for status in ('PENDING', 'APPROVED', 'REJECTED')
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_notifications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoanStatusSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('APPROVED', 'Approved'), ('REJECTED', 'Rejected')], max_length=10, unique=True)),
+                ('count', models.IntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('principal_repaid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_summary, migrations.RunPython.noop),
+    ]
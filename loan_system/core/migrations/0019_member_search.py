@@ -0,0 +1,44 @@
+from django.db import migrations
+
+SEARCH_FIELDS = ('username', 'first_name', 'last_name', 'email')
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE core_member_search USING fts5(username, name, email, tokenize='trigram')"
+        )
+        schema_editor.execute(
+            "INSERT INTO core_member_search (rowid, username, name, email) "
+            "SELECT id, username, TRIM(first_name || ' ' || last_name), email FROM auth_user"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        # Matches what icontains compiles to: UPPER("auth_user"."field"::text) LIKE UPPER(...)
+        for field in SEARCH_FIELDS:
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS core_user_{field}_trgm ON auth_user '
+                f'USING gin ((UPPER("{field}"::text)) gin_trgm_ops)'
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS core_member_search')
+    elif vendor == 'postgresql':
+        for field in SEARCH_FIELDS:
+            schema_editor.execute(f'DROP INDEX IF EXISTS core_user_{field}_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0018_loan_status_summary'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
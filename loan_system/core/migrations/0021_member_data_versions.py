@@ -0,0 +1,29 @@
+from django.db import migrations
+
+MEMBER_KINDS = ('savings', 'welfare', 'targets', 'loans')
+
+
+def create_member_versions(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    DataVersion = apps.get_model('core', 'DataVersion')
+    DataVersion.objects.bulk_create(
+        [
+            DataVersion(scope=f'{kind}:{user_id}')
+            for user_id in User.objects.values_list('pk', flat=True).iterator()
+            for kind in MEMBER_KINDS
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_data_versions'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_member_versions, migrations.RunPython.noop),
+    ]
@@ -1,30 +1,23 @@
-from django.db import models
+from django.db import connection, connections, models, transaction
 from django.contrib.auth.models import User
-from datetime import timedelta
-
-class Loan(models.Model):
-    STATUS_CHOICES = [
-        ('PENDING', 'Pending'),
-        ('APPROVED', 'Approved'),
-        ('REJECTED', 'Rejected'),
-    ]
-
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
-    amount = models.DecimalField(max_digits=10, decimal_places=2)
-    purpose = models.TextField()
-    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
-    date_applied = models.DateTimeField(auto_now_add=True)
-    due_date = models.DateField(null=True, blank=True)
-
+from django.utils import timezone
+from datetime import datetime, timedelta
+from decimal import Decimal
 
-    def __str__(self):
-        return f"{self.user.username} - {self.amount} KES ({self.status})"
+from .amortization import FLAT, REDUCING, build_schedule
 
 class Savings(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
-    date_saved = models.DateTimeField(auto_now_add=True)
+    date_saved = models.DateTimeField(default=timezone.now)
     description = models.CharField(max_length=255, blank=True)
+    mpesa_receipt = models.CharField(max_length=20, unique=True, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'date_saved'], name='savings_user_date_idx'),
+            models.Index(fields=['date_saved'], name='savings_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.amount} KES on {self.date_saved.date()}"
@@ -42,12 +35,93 @@ class SavingsTarget(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.month}/{self.year} target: {self.amount}"
 
+class LoanLimitExceeded(Exception):
+    def __init__(self, limit):
+        super().__init__(f"Loan limit of KES {limit:.2f} exceeded")
+        self.limit = limit
+
+
+class LoanManager(models.Manager):
+    def apply(self, user, amount, purpose, term_months=1):
+        """Create a PENDING loan for ``user`` if it fits within their available limit.
+
+        The member's balance row is locked for the check-and-insert, so two
+        applications submitted at the same time cannot both pass the limit.
+        Raises ``LoanLimitExceeded`` otherwise, and ``ValueError`` unless
+        ``amount`` is a positive number.
+        """
+        if not (Decimal(amount).is_finite() and amount > 0):
+            raise ValueError(f"Loan amount must be positive, not {amount}.")
+        MemberBalance.objects.for_user(user)
+        with transaction.atomic():
+            balance = MemberBalance.objects.lock(user)
+            if amount > balance.available_limit:
+                raise LoanLimitExceeded(balance.available_limit)
+            return self.create(
+                user=user,
+                amount=amount,
+                purpose=purpose,
+                term_months=term_months,
+                status='PENDING',
+                due_date=timezone.now() + timedelta(days=30),
+            )
+
+    def transition(self, loan_ids, status, by):
+        """Move every PENDING loan in ``loan_ids`` to ``status`` with one conditional UPDATE.
+
+        Loans that are no longer pending (e.g. approved by someone else a
+        moment earlier) are left alone. Returns ``{loan_id: result}`` where
+        result is the new status, ``'NOT_PENDING'`` or ``'NOT_FOUND'``.
+        """
+        if status not in ('APPROVED', 'REJECTED'):
+            raise ValueError(f"Cannot move loans to {status!r}.")
+        loan_ids = {int(pk) for pk in loan_ids}
+        now = timezone.now()
+        with transaction.atomic():
+            self.filter(pk__in=loan_ids, status='PENDING').update(
+                status=status, approved_by=by, approval_date=now,
+            )
+            # The UPDATE stamped our rows with this exact approval time and
+            # approver, so reading them back tells us which ones we won.
+            loans = list(self.filter(pk__in=loan_ids))
+            changed = [
+                loan for loan in loans
+                if loan.status == status and loan.approval_date == now and loan.approved_by_id == by.pk
+            ]
+
+            moved = sum((loan.amount for loan in changed), Decimal(0))
+            LoanStatusSummary.objects.add_many({
+                'PENDING': (-len(changed), -moved, 0),
+                status: (len(changed), moved, 0),
+            })
+
+            if status == 'APPROVED':
+                Installment.objects.schedule_reminders(Installment.objects.create_schedules(changed))
+            else:
+                released = {}
+                for loan in changed:
+                    released[loan.user_id] = released.get(loan.user_id, 0) - loan.amount
+                MemberBalance.objects.add_many('loan_exposure', released)
+            DataVersion.objects.bump(
+                DataVersion.scope_for(DataVersion.LOANS, user_id) for user_id in {loan.user_id for loan in changed}
+            )
+
+        results = dict.fromkeys(loan_ids, 'NOT_FOUND')
+        results.update((loan.pk, 'NOT_PENDING') for loan in loans)
+        results.update((loan.pk, status) for loan in changed)
+        return results
+
+
 class Loan(models.Model):
     STATUS_CHOICES = [
         ('PENDING', 'Pending'),
         ('APPROVED', 'Approved'),
         ('REJECTED', 'Rejected'),
     ]
+    INTEREST_METHOD_CHOICES = [
+        (REDUCING, 'Reducing balance'),
+        (FLAT, 'Flat rate'),
+    ]
 
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
@@ -57,15 +131,670 @@ class Loan(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
     approved_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='approved_loans')
     approval_date = models.DateTimeField(null=True, blank=True)
+    interest_rate = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('12.00'))  # % per year
+    term_months = models.PositiveSmallIntegerField(default=1)
+    interest_method = models.CharField(max_length=10, choices=INTEREST_METHOD_CHOICES, default=REDUCING)
+
+    objects = LoanManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'date_applied'], name='loan_status_date_idx'),
+            models.Index(fields=['user', 'status', 'date_applied'], name='loan_user_status_date_idx'),
+            models.Index(fields=['user', 'date_applied'], name='loan_user_date_idx'),
+            models.Index(fields=['date_applied'], name='loan_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.amount} KES ({self.status})"
+
+
+class LoanStatusSummaryManager(models.Manager):
+    def add_many(self, deltas):
+        """Apply ``{status: (count, amount, principal_repaid)}`` deltas to the counters."""
+        for status, (count, amount, repaid) in deltas.items():
+            if not (count or amount or repaid):
+                continue
+            changes = dict(
+                count=models.F('count') + count,
+                total=models.F('total') + amount,
+                principal_repaid=models.F('principal_repaid') + repaid,
+                updated_at=timezone.now(),
+            )
+            # The row for a status only has to be created once, so try the update first
+            if not self.filter(status=status).update(**changes):
+                self.bulk_create([LoanStatusSummary(status=status)], ignore_conflicts=True)
+                self.filter(status=status).update(**changes)
+
+    def add(self, status, count=0, amount=0, principal_repaid=0):
+        self.add_many({status: (count, amount, principal_repaid)})
+
+    def compute(self):
+        """Return ``{status: (count, amount, principal_repaid)}`` computed from the raw tables."""
+        figures = {
+            row['status']: (row['count'], row['total'], 0)
+            for row in Loan.objects.order_by().values('status').annotate(
+                count=models.Count('id'), total=models.Sum('amount'),
+            )
+        }
+        repaid = Installment.objects.order_by().values('loan__status').annotate(total=models.Sum('principal_paid'))
+        for row in repaid:
+            count, total, _ = figures[row['loan__status']]
+            figures[row['loan__status']] = (count, total, row['total'])
+        return figures
+
+    def cards(self):
+        """Counter rows with at least one loan, in ``Loan.STATUS_CHOICES`` order."""
+        statuses = [status for status, _ in Loan.STATUS_CHOICES]
+        return self.filter(status__in=statuses, count__gt=0).order_by(
+            models.Case(
+                *(models.When(status=status, then=i) for i, status in enumerate(statuses)),
+            )
+        ).values('status', 'count', 'total', 'principal_repaid')
+
+
+class LoanStatusSummary(models.Model):
+    """Number and total amount of loans in each status, for the admin dashboard.
+
+    Kept in step inside the same transaction as every loan write: the loan
+    signals cover single saves and deletes, ``LoanManager.transition`` moves
+    batches between statuses and ``InstallmentManager.record_payment`` adds
+    principal repaid. ``rebuild_loan_summary --verify`` checks it against the
+    loans themselves.
+    """
+
+    status = models.CharField(max_length=10, choices=Loan.STATUS_CHOICES, unique=True)
+    count = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    principal_repaid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = LoanStatusSummaryManager()
+
+    def __str__(self):
+        return f"{self.status}: {self.count} loan(s), {self.total} KES"
 
-from django.db import models
-from django.contrib.auth.models import User
-from django.utils import timezone
 
 class WelfareContribution(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     date_contributed = models.DateTimeField(default=timezone.now)
+    mpesa_receipt = models.CharField(max_length=20, unique=True, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date_contributed'], name='welfare_date_idx'),
+            models.Index(fields=['user', 'date_contributed'], name='welfare_user_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.amount} KES on {self.date_contributed.strftime('%B %Y')}"
+
+
+class MemberBalanceManager(models.Manager):
+    # Every method accepts either a User or a user id, so signal handlers can
+    # pass ``instance.user_id`` without loading the user.
+
+    def for_user(self, user):
+        balance, _ = self.get_or_create(user_id=getattr(user, 'pk', user))
+        return balance
+
+    def lock(self, user):
+        """Return the member's balance row, locked until the surrounding transaction ends.
+
+        SQLite has no row locks and ignores ``select_for_update``; writing to
+        the row first takes the database write lock instead (what ``BEGIN
+        IMMEDIATE`` would do), so concurrent callers queue up behind it.
+        """
+        user_id = getattr(user, 'pk', user)
+        if connection.features.has_select_for_update:
+            return self.select_for_update().get(user_id=user_id)
+        self.filter(user_id=user_id).update(updated_at=timezone.now())
+        return self.get(user_id=user_id)
+
+    def compute(self, user):
+        """Return the balance figures for ``user`` computed from the raw tables."""
+        savings = Savings.objects.filter(user=user).aggregate(total=models.Sum('amount'))['total'] or 0
+        welfare = WelfareContribution.objects.filter(user=user).aggregate(total=models.Sum('amount'))['total'] or 0
+        loans = Loan.objects.filter(
+            user=user, status__in=MemberBalance.EXPOSURE_STATUSES
+        ).aggregate(total=models.Sum('amount'))['total'] or 0
+        repaid = Installment.objects.filter(
+            loan__user=user, loan__status='APPROVED'
+        ).aggregate(total=models.Sum('principal_paid'))['total'] or 0
+        return {
+            'savings_total': savings,
+            'welfare_total': welfare,
+            'loan_exposure': loans - repaid,
+        }
+
+    def rebuild(self, user):
+        balance, _ = self.update_or_create(user_id=getattr(user, 'pk', user), defaults=self.compute(user))
+        return balance
+
+    def add_many(self, field, deltas):
+        """Increment ``field`` for many members at once from ``{user_id: amount}``."""
+        self.bulk_create([MemberBalance(user_id=user_id) for user_id in deltas], ignore_conflicts=True)
+        now = timezone.now()
+        for user_id, amount in deltas.items():
+            self.filter(user_id=user_id).update(updated_at=now, **{field: models.F(field) + amount})
+
+    def add(self, user, **deltas):
+        """Atomically increment the running totals for ``user``."""
+        user_id = getattr(user, 'pk', user)
+        self.get_or_create(user_id=user_id)
+        self.filter(user_id=user_id).update(
+            updated_at=timezone.now(),
+            **{field: models.F(field) + amount for field, amount in deltas.items()}
+        )
+
+
+class MemberBalance(models.Model):
+    # Loans that still count against a member's borrowing limit. Principal
+    # repaid on approved loans is taken off again.
+    EXPOSURE_STATUSES = ('PENDING', 'APPROVED')
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='balance')
+    savings_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    welfare_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    loan_exposure = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = MemberBalanceManager()
+
+    class Meta:
+        indexes = [
+            # The admin's savings-per-member ranking
+            models.Index(fields=['savings_total'], name='balance_savings_idx'),
+        ]
+
+    @property
+    def loan_limit(self):
+        return self.savings_total * 3
+
+    @property
+    def available_limit(self):
+        return max(self.loan_limit - self.loan_exposure, 0)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.savings_total} KES saved"
+
+
+class DataVersionManager(models.Manager):
+    BATCH_SIZE = 500
+
+    def bump(self, scopes):
+        """Move every scope in ``scopes`` to a new version."""
+        scopes = list(dict.fromkeys(scopes))
+        now = timezone.now()
+        for start in range(0, len(scopes), self.BATCH_SIZE):
+            batch = scopes[start:start + self.BATCH_SIZE]
+            rows = self.filter(scope__in=batch)
+            # A scope's row only has to be created once, so try the update first. Updating
+            # again after the insert keeps two writers racing to create it from sharing a version.
+            if rows.update(version=models.F('version') + 1, updated_at=now) < len(batch):
+                self.bulk_create([DataVersion(scope=scope) for scope in batch], ignore_conflicts=True)
+                rows.update(version=models.F('version') + 1, updated_at=now)
+
+    def create_for_members(self, user_ids):
+        """Create the members' own scopes at version 0, so the first write to each is a plain UPDATE."""
+        self.bulk_create(
+            [
+                DataVersion(scope=DataVersion.scope_for(kind, user_id))
+                for user_id in user_ids
+                for kind in DataVersion.MEMBER_KINDS
+            ],
+            batch_size=self.BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+    def stamp(self, scopes):
+        """``(etag, last_modified)`` for the data in ``scopes``.
+
+        A scope nothing was written to since it started being versioned is at
+        version 0 and has no modification time.
+        """
+        rows = {
+            scope: (version, updated_at)
+            for scope, version, updated_at in self.filter(scope__in=scopes).values_list('scope', 'version', 'updated_at')
+        }
+        etag = ';'.join(f'{scope}.{rows.get(scope, (0, None))[0]}' for scope in sorted(scopes))
+        return etag, max((updated_at for _, updated_at in rows.values()), default=None)
+
+
+class DataVersion(models.Model):
+    """A counter moved on every change to the data in ``scope``, behind the chart ETags.
+
+    Scopes are the ``MonthlyRollup`` series (``savings``, ``welfare``,
+    ``savings:<user id>``, ...), each member's targets (``targets:<user id>``)
+    and each member's loans and repayments (``loans:<user id>``).
+    """
+
+    TARGETS = 'targets'
+    LOANS = 'loans'
+    # Every scope a member has: their MonthlyRollup streams, targets and loans
+    MEMBER_KINDS = ('savings', 'welfare', TARGETS, LOANS)
+
+    scope = models.CharField(max_length=40, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    objects = DataVersionManager()
+
+    @staticmethod
+    def scope_for(kind, user=None):
+        user_id = getattr(user, 'pk', user)
+        return kind.lower() if user_id is None else f'{kind.lower()}:{user_id}'
+
+    def __str__(self):
+        return f"{self.scope} v{self.version}"
+
+
+class MonthlyRollupManager(models.Manager):
+    def add(self, stream, user, when, amount, entries=1):
+        """Apply ``amount`` to the member's and the SACCO-wide bucket for ``when``.
+
+        Pass ``user=None`` to touch only the SACCO-wide bucket.
+        """
+        when = timezone.localtime(when)
+        user_id = getattr(user, 'pk', user)
+        buckets = [None] if user_id is None else [user_id, None]
+        for bucket_user in buckets:
+            bucket = dict(user_id=bucket_user, stream=stream, year=when.year, month=when.month)
+            self.get_or_create(**bucket)
+            self.filter(**bucket).update(
+                total=models.F('total') + amount, entries=models.F('entries') + entries
+            )
+            if entries < 0:
+                self.filter(entries__lte=0, **bucket).delete()
+        DataVersion.objects.bump(DataVersion.scope_for(stream, bucket_user) for bucket_user in buckets)
+
+    def add_many(self, stream, deltas):
+        """Apply ``{(user_id, year, month): (amount, entries)}`` to member and SACCO-wide buckets."""
+        buckets = {}
+        for (user_id, year, month), (amount, entries) in deltas.items():
+            for key in ((user_id, year, month), (None, year, month)):
+                total, count = buckets.get(key, (0, 0))
+                buckets[key] = (total + amount, count + entries)
+
+        self.bulk_create(
+            [MonthlyRollup(user_id=u, stream=stream, year=y, month=m) for u, y, m in buckets],
+            ignore_conflicts=True,
+        )
+        for (user_id, year, month), (amount, entries) in buckets.items():
+            self.filter(user_id=user_id, stream=stream, year=year, month=month).update(
+                total=models.F('total') + amount, entries=models.F('entries') + entries
+            )
+        DataVersion.objects.bump(DataVersion.scope_for(stream, user_id) for user_id, _, _ in buckets)
+
+    def series(self, stream, user=None):
+        """Return ``year``/``month``/``total`` rows for one chart, oldest first."""
+        return self.filter(
+            stream=stream, user_id=getattr(user, 'pk', user)
+        ).order_by('year', 'month').values('year', 'month', 'total')
+
+
+class MonthlyRollup(models.Model):
+    """Per-month totals backing the charts; ``user`` is null for SACCO-wide rows."""
+
+    SAVINGS = 'SAVINGS'
+    WELFARE = 'WELFARE'
+    STREAM_CHOICES = [
+        (SAVINGS, 'Savings'),
+        (WELFARE, 'Welfare'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    stream = models.CharField(max_length=10, choices=STREAM_CHOICES)
+    year = models.IntegerField()
+    month = models.IntegerField()  # 1 - 12
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    entries = models.IntegerField(default=0)
+
+    objects = MonthlyRollupManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'stream', 'year', 'month'],
+                condition=models.Q(user__isnull=False),
+                name='rollup_member_month_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['stream', 'year', 'month'],
+                condition=models.Q(user__isnull=True),
+                name='rollup_global_month_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        owner = self.user.username if self.user_id else 'SACCO'
+        return f"{owner} - {self.stream} {self.month}/{self.year}: {self.total}"
+
+
+class InstallmentManager(models.Manager):
+    def create_schedules(self, loans):
+        """Write the repayment schedule of every loan in ``loans`` in one bulk insert.
+
+        Each loan's ``due_date`` is moved to its last installment.
+        """
+        installments = []
+        for loan in loans:
+            start = timezone.localtime(loan.approval_date or timezone.now()).date()
+            schedule = build_schedule(loan.amount, loan.interest_rate, loan.term_months, loan.interest_method, start)
+            installments.extend(
+                Installment(loan=loan, number=number, due_date=due, principal=principal, interest=interest)
+                for number, due, principal, interest in schedule
+            )
+            loan.due_date = timezone.make_aware(datetime.combine(schedule[-1][1], datetime.min.time()))
+        self.bulk_create(installments, batch_size=1000)
+        Loan.objects.bulk_update(loans, ['due_date'], batch_size=1000)
+        return installments
+
+    def schedule_reminders(self, installments):
+        """Queue a reminder email ``REMINDER_DAYS`` before each installment falls due."""
+        jobs = []
+        for installment in installments:
+            remind_on = installment.due_date - timedelta(days=Installment.REMINDER_DAYS)
+            jobs.append(Job(
+                task='core.tasks.send_installment_reminder',
+                payload={'installment_id': installment.pk},
+                run_at=timezone.make_aware(datetime.combine(remind_on, datetime.min.time())),
+                unique_key=f'installment-reminder:{installment.pk}',
+            ))
+        Job.objects.enqueue_many(jobs)
+
+    def record_payment(self, loan, amount, paid_at=None):
+        """Apply a repayment to ``loan``'s installments, oldest first, interest before principal.
+
+        Returns whatever is left of ``amount`` once every installment is settled.
+        """
+        paid_at = paid_at or timezone.now()
+        remaining = Decimal(amount)
+        principal_applied = Decimal(0)
+        with transaction.atomic():
+            for inst in self.select_for_update().filter(loan=loan, paid_at__isnull=True).order_by('number'):
+                if remaining <= 0:
+                    break
+                interest = min(remaining, inst.interest - inst.interest_paid)
+                remaining -= interest
+                principal = min(remaining, inst.principal - inst.principal_paid)
+                remaining -= principal
+                inst.interest_paid += interest
+                inst.principal_paid += principal
+                principal_applied += principal
+                if inst.interest_paid == inst.interest and inst.principal_paid == inst.principal:
+                    inst.paid_at = paid_at
+                inst.save(update_fields=['interest_paid', 'principal_paid', 'paid_at'])
+            if remaining < Decimal(amount):
+                DataVersion.objects.bump([DataVersion.scope_for(DataVersion.LOANS, loan.user_id)])
+            if principal_applied:
+                MemberBalance.objects.add(loan.user_id, loan_exposure=-principal_applied)
+                # ``loan`` may be an instance loaded before it was approved
+                status = Loan.objects.filter(pk=loan.pk).values_list('status', flat=True).get()
+                LoanStatusSummary.objects.add(status, principal_repaid=principal_applied)
+        return remaining
+
+    def outstanding_principal(self, **loan_filters):
+        """Principal still owed on approved loans matching ``loan_filters``.
+
+        Approved amounts minus principal repaid, as two indexed aggregates.
+        Loans approved before schedules existed count in full.
+        """
+        lent = Loan.objects.filter(status='APPROVED', **loan_filters).aggregate(
+            total=models.Sum('amount'))['total'] or 0
+        repaid = self.filter(
+            loan__status='APPROVED', **{f'loan__{key}': value for key, value in loan_filters.items()}
+        ).aggregate(total=models.Sum('principal_paid'))['total'] or 0
+        return lent - repaid
+
+    async def aoutstanding_principal(self, **loan_filters):
+        """Async version of ``outstanding_principal``."""
+        lent = await Loan.objects.filter(status='APPROVED', **loan_filters).aaggregate(
+            total=models.Sum('amount'))
+        repaid = await self.filter(
+            loan__status='APPROVED', **{f'loan__{key}': value for key, value in loan_filters.items()}
+        ).aaggregate(total=models.Sum('principal_paid'))
+        return (lent['total'] or 0) - (repaid['total'] or 0)
+
+
+class Installment(models.Model):
+    # Reminder emails go out this many days before an installment is due
+    REMINDER_DAYS = 3
+
+    loan = models.ForeignKey(Loan, on_delete=models.CASCADE, related_name='installments')
+    number = models.PositiveSmallIntegerField()
+    due_date = models.DateField()
+    principal = models.DecimalField(max_digits=10, decimal_places=2)
+    interest = models.DecimalField(max_digits=10, decimal_places=2)
+    principal_paid = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    interest_paid = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    paid_at = models.DateTimeField(null=True, blank=True)
+
+    objects = InstallmentManager()
+
+    class Meta:
+        unique_together = ('loan', 'number')
+        indexes = [
+            models.Index(fields=['due_date'], name='installment_unpaid_due_idx', condition=models.Q(paid_at__isnull=True)),
+        ]
+
+    @property
+    def amount_due(self):
+        return self.principal + self.interest - self.principal_paid - self.interest_paid
+
+    def __str__(self):
+        return f"Loan {self.loan_id} #{self.number} due {self.due_date}: {self.principal + self.interest} KES"
+
+
+class StatementRequestManager(models.Manager):
+    def request(self, user, year, fmt='html'):
+        """Queue ``user``'s statement for ``year`` unless it is already queued."""
+        request, _ = self.get_or_create(
+            user=user, year=year, format=fmt, status__in=StatementRequest.OPEN_STATUSES,
+            defaults={'status': StatementRequest.PENDING},
+        )
+        return request
+
+    def claim(self, limit=None):
+        """Mark up to ``limit`` pending requests as running and return them, oldest first."""
+        with transaction.atomic():
+            ids = self.filter(status=StatementRequest.PENDING).order_by('requested_at', 'id').values_list('id', flat=True)
+            ids = list(ids[:limit] if limit else ids)
+            self.filter(id__in=ids, status=StatementRequest.PENDING).update(status=StatementRequest.RUNNING)
+        return list(self.filter(id__in=ids, status=StatementRequest.RUNNING).order_by('requested_at', 'id'))
+
+
+class StatementRequest(models.Model):
+    """A member's annual statement waiting to be rendered by ``generate_statements``."""
+
+    PENDING = 'PENDING'
+    RUNNING = 'RUNNING'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+    OPEN_STATUSES = (PENDING, RUNNING)
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='statement_requests')
+    year = models.PositiveSmallIntegerField()
+    format = models.CharField(max_length=4, default='html')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    requested_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    objects = StatementRequestManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'requested_at'], name='statement_request_queue_idx'),
+        ]
+        constraints = [
+            # At most one queued request per member, year and format
+            models.UniqueConstraint(
+                fields=['user', 'year', 'format'],
+                condition=models.Q(status__in=['PENDING', 'RUNNING']),
+                name='statement_request_open_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} {self.year} statement ({self.status})"
+
+
+class JobManager(models.Manager):
+    def enqueue(self, task, payload=None, run_at=None, unique_key=None, max_attempts=None):
+        """Queue ``task`` to run with ``payload``.
+
+        The row is written in the caller's transaction, so workers only see
+        the job once that commits.
+
+        A ``unique_key`` makes the call idempotent: if a job with that key
+        already exists, in any status, it is returned instead.
+        """
+        fields = {
+            'task': task,
+            'payload': payload or {},
+            'run_at': run_at or timezone.now(),
+        }
+        if max_attempts is not None:
+            fields['max_attempts'] = max_attempts
+        if unique_key is None:
+            return self.create(**fields)
+        job, _ = self.get_or_create(unique_key=unique_key, defaults=fields)
+        return job
+
+    def enqueue_many(self, jobs):
+        """Queue several ``Job`` instances in one insert, skipping ``unique_key`` clashes."""
+        return self.bulk_create(jobs, batch_size=1000, ignore_conflicts=True)
+
+    def claim(self, worker, limit=1):
+        """Mark up to ``limit`` due jobs as running for ``worker`` and return them.
+
+        Where the database supports it the due rows are locked with SKIP LOCKED
+        so concurrent workers pass over each other's rows. Everywhere else
+        (SQLite) the conditional UPDATE only moves rows that are still QUEUED,
+        and reading them back by worker and claim time tells us which we won.
+        """
+        now = timezone.now()
+        with transaction.atomic(using=self.db):
+            due = self.filter(status=Job.QUEUED, run_at__lte=now).order_by('run_at', 'id')
+            if connections[self.db].features.has_select_for_update_skip_locked:
+                due = due.select_for_update(skip_locked=True)
+            ids = list(due.values_list('id', flat=True)[:limit])
+            self.filter(id__in=ids, status=Job.QUEUED).update(
+                status=Job.RUNNING, locked_by=worker, locked_at=now, attempts=models.F('attempts') + 1,
+            )
+        return list(
+            self.filter(id__in=ids, status=Job.RUNNING, locked_by=worker, locked_at=now).order_by('run_at', 'id')
+        )
+
+    def release(self, jobs):
+        """Hand claimed jobs that were never started back to the queue."""
+        return self.filter(id__in=[job.pk for job in jobs], status=Job.RUNNING).update(
+            status=Job.QUEUED, locked_by='', locked_at=None, attempts=models.F('attempts') - 1,
+        )
+
+    def recent(self, task, limit=10):
+        """The latest ``limit`` jobs of one task, newest first."""
+        return list(self.filter(task=task).order_by('-created_at', '-id')[:limit])
+
+    def requeue_stale(self, older_than, tasks=None, exclude_tasks=()):
+        """Put back jobs whose worker has held them since before ``older_than``, e.g. after a crash.
+
+        ``tasks`` and ``exclude_tasks`` limit this to some task names.
+        """
+        stale = self.filter(status=Job.RUNNING, locked_at__lt=older_than).exclude(task__in=exclude_tasks)
+        if tasks is not None:
+            stale = stale.filter(task__in=tasks)
+        failed = stale.filter(attempts__gte=models.F('max_attempts')).update(
+            status=Job.FAILED, finished_at=timezone.now(), last_error='Worker stopped responding.',
+        )
+        requeued = stale.update(status=Job.QUEUED, locked_by='', locked_at=None)
+        return requeued, failed
+
+
+class Job(models.Model):
+    """A unit of background work, run by ``runworker`` (see ``core.jobs``)."""
+
+    QUEUED = 'QUEUED'
+    RUNNING = 'RUNNING'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    unique_key = models.CharField(max_length=200, null=True, blank=True, unique=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = JobManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_queue_idx'),
+            models.Index(fields=['task', 'created_at'], name='job_task_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+
+class NotificationManager(models.Manager):
+    def unsent(self):
+        """Notifications not yet emailed to members who have an email address."""
+        return self.filter(emailed_at__isnull=True).exclude(user__email='')
+
+
+class Notification(models.Model):
+    """A warning sent to a member by the ``send_notifications`` batch run."""
+
+    MID_MONTH_WARNING = 'MID_MONTH'
+    OVERDUE_LOAN = 'OVERDUE'
+    KIND_CHOICES = [
+        (MID_MONTH_WARNING, 'No savings by mid-month'),
+        (OVERDUE_LOAN, 'Overdue loan'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # What the notification is about, e.g. the month or the loan and its oldest missed due date,
+    # so re-running the batch never warns twice about the same thing
+    key = models.CharField(max_length=50)
+    loan = models.ForeignKey(Loan, on_delete=models.CASCADE, null=True, blank=True)
+    subject = models.CharField(max_length=200)
+    message = models.TextField()
+    created_at = models.DateTimeField(default=timezone.now)
+    emailed_at = models.DateTimeField(null=True, blank=True)
+
+    objects = NotificationManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'kind', 'key'], name='notification_once'),
+        ]
+        indexes = [
+            models.Index(fields=['id'], name='notification_unsent_idx', condition=models.Q(emailed_at__isnull=True)),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} for {self.user.username} ({self.key})"
@@ -0,0 +1,189 @@
+"""Import M-PESA paybill statements into Savings and WelfareContribution.
+
+Statements are read one row at a time and written with ``bulk_create`` in
+batches, so memory use does not depend on the size of the file. Receipt
+numbers are stored on the rows, which makes re-importing a statement a no-op.
+"""
+import csv
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .models import MemberBalance, MonthlyRollup, Savings, WelfareContribution
+
+BATCH_SIZE = 1000
+
+STREAMS = {
+    'savings': (Savings, 'date_saved', 'savings_total', MonthlyRollup.SAVINGS),
+    'welfare': (WelfareContribution, 'date_contributed', 'welfare_total', MonthlyRollup.WELFARE),
+}
+
+# Statement header -> field name. Safaricom exports use slightly different
+# headings between the portal and the emailed statement.
+COLUMNS = {
+    'receipt no.': 'receipt',
+    'receipt no': 'receipt',
+    'completion time': 'completed_at',
+    'transaction status': 'status',
+    'paid in': 'amount',
+    'a/c no.': 'account',
+    'account no.': 'account',
+    'account': 'account',
+}
+REQUIRED = {'receipt', 'completed_at', 'amount', 'account'}
+
+TIME_FORMATS = ('%Y-%m-%d %H:%M:%S', '%d-%m-%Y %H:%M:%S', '%d/%m/%Y %H:%M:%S', '%d-%m-%Y %H:%M')
+
+
+class StatementError(ValueError):
+    pass
+
+
+class RejectSample:
+    """A ``csv.writer`` stand-in that keeps only the first few rejected rows."""
+
+    def __init__(self, limit=50):
+        self.limit = limit
+        self.rows = []
+
+    def writerow(self, row):
+        if len(self.rows) < self.limit:
+            self.rows.append(row)
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.duplicates = 0
+        self.rejected = 0
+
+    def __str__(self):
+        return f"{self.imported} imported, {self.duplicates} duplicate(s) skipped, {self.rejected} rejected"
+
+
+def parse_time(value):
+    for fmt in TIME_FORMATS:
+        try:
+            return timezone.make_aware(datetime.strptime(value.strip(), fmt))
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised time {value!r}")
+
+
+def read_statement(lines):
+    """Yield ``(raw_row, fields)`` pairs, skipping the preamble above the header row."""
+    reader = csv.reader(lines)
+    columns = None
+    for row in reader:
+        if columns is None:
+            names = [COLUMNS.get(cell.strip().lower()) for cell in row]
+            if REQUIRED.issubset(names):
+                columns = names
+            continue
+        if not any(cell.strip() for cell in row):
+            continue
+        yield row, {name: cell.strip() for name, cell in zip(columns, row) if name}
+    if columns is None:
+        raise StatementError("No statement header row found (expected Receipt No., Completion Time, Paid In, A/C No.).")
+
+
+def clean_row(fields, model=Savings):
+    """Return ``(receipt, account, amount, completed_at)`` or raise ``ValueError`` with a reason.
+
+    Receipts and amounts must also fit ``model``'s columns; SQLite would store
+    an oversized amount, but reading it back would then fail.
+    """
+    if fields.get('status', 'Completed').lower() != 'completed':
+        raise ValueError(f"transaction status is {fields['status']!r}")
+    receipt = fields.get('receipt', '').upper()
+    if not receipt:
+        raise ValueError("missing receipt number")
+    if len(receipt) > model._meta.get_field('mpesa_receipt').max_length:
+        raise ValueError(f"receipt number {receipt!r} is too long")
+    try:
+        amount = Decimal(fields.get('amount', '').replace(',', ''))
+    except InvalidOperation:
+        raise ValueError(f"invalid amount {fields.get('amount')!r}")
+    # NaN parses fine but cannot be compared, and Infinity cannot be stored
+    if not amount.is_finite():
+        raise ValueError(f"invalid amount {fields.get('amount')!r}")
+    if amount <= 0:
+        raise ValueError("not a credit")
+    try:
+        model._meta.get_field('amount').run_validators(amount)
+    except ValidationError:
+        raise ValueError(f"amount {fields.get('amount')!r} is too large or too precise")
+    account = fields.get('account', '')
+    if not account:
+        raise ValueError("missing account")
+    return receipt, account, amount, parse_time(fields.get('completed_at', ''))
+
+
+def import_statement(lines, stream='savings', rejects=None, batch_size=BATCH_SIZE):
+    """Import a paybill statement from an iterable of CSV lines.
+
+    ``rejects`` is an optional ``csv.writer`` that receives each bad row with
+    the reason appended. The whole import runs in one transaction and the
+    member balances and monthly rollups are updated once at the end.
+    """
+    model, date_field, balance_field, rollup_stream = STREAMS[stream]
+    result = ImportResult()
+    balance_deltas = {}
+    rollup_deltas = {}
+
+    def reject(raw, reason):
+        result.rejected += 1
+        if rejects is not None:
+            rejects.writerow(raw + [reason])
+
+    def flush(batch):
+        receipts = [receipt for receipt, *_ in batch]
+        existing = set(model.objects.filter(mpesa_receipt__in=receipts).values_list('mpesa_receipt', flat=True))
+        users = dict(
+            User.objects.filter(username__in={account for _, account, *_ in batch}).values_list('username', 'pk')
+        )
+
+        objs = []
+        for receipt, account, amount, completed_at, raw in batch:
+            # Earlier batches are already inserted, so ``existing`` also
+            # catches receipts repeated further down the same file.
+            if receipt in existing:
+                result.duplicates += 1
+                continue
+            existing.add(receipt)
+            user_id = users.get(account)
+            if user_id is None:
+                reject(raw, f"unknown account {account!r}")
+                continue
+            objs.append(model(user_id=user_id, amount=amount, mpesa_receipt=receipt, **{date_field: completed_at}))
+            balance_deltas[user_id] = balance_deltas.get(user_id, 0) + amount
+            local = timezone.localtime(completed_at)
+            total, entries = rollup_deltas.get((user_id, local.year, local.month), (0, 0))
+            rollup_deltas[(user_id, local.year, local.month)] = (total + amount, entries + 1)
+
+        model.objects.bulk_create(objs, batch_size=batch_size)
+        result.imported += len(objs)
+
+    with transaction.atomic():
+        batch = []
+        for raw, fields in read_statement(lines):
+            try:
+                receipt, account, amount, completed_at = clean_row(fields, model)
+            except ValueError as exc:
+                reject(raw, str(exc))
+                continue
+            batch.append((receipt, account, amount, completed_at, raw))
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+
+        MemberBalance.objects.add_many(balance_field, balance_deltas)
+        MonthlyRollup.objects.add_many(rollup_stream, rollup_deltas)
+
+    return result
@@ -0,0 +1,128 @@
+"""The periodic member warnings sent by ``send_notifications``.
+
+Each check is one set-based query over the whole membership: members with no
+savings by mid-month are found with an anti-join on ``savings_user_date_idx``
+and overdue loans through the partial index on unpaid installments, so the
+cost grows with the number of members to warn rather than with the size of
+the SACCO. Matches become ``Notification`` rows (duplicates are ignored, so
+the batch can safely run every day) and the unsent rows are then emailed in
+chunks over a single mail connection.
+"""
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Exists, F, Min, OuterRef, Sum
+from django.utils import timezone
+
+from .models import Installment, Loan, Notification, Savings
+from .reports import month_bounds
+from .services.savings import MID_MONTH_DAY
+
+CHUNK_SIZE = 200
+PAYMENT_HINT = "Please pay via M-PESA to Paybill 123456 using your username as the account number."
+
+
+def mid_month_warnings(today):
+    """Members who have not saved anything this month, once ``today`` is past mid-month."""
+    if today.day < MID_MONTH_DAY:
+        return []
+    start, end = month_bounds(today.year, today.month)
+    saved = Savings.objects.filter(user=OuterRef('pk'), date_saved__gte=start, date_saved__lt=end)
+    members = (
+        User.objects.filter(is_staff=False, is_active=True)
+        .exclude(Exists(saved))
+        .values_list('id', 'username')
+    )
+    key = f'{today:%Y-%m}'
+    return [
+        Notification(
+            user_id=user_id, kind=Notification.MID_MONTH_WARNING, key=key,
+            subject="Reminder: you have not saved this month",
+            message=(
+                f"Hi {username},\n\nWe have not received any savings from you in {today:%B %Y} yet. "
+                f"{PAYMENT_HINT}"
+            ),
+        )
+        for user_id, username in members.iterator(chunk_size=CHUNK_SIZE)
+    ]
+
+
+def overdue_loans(today):
+    """Approved loans with an installment (or, for loans without a schedule, a due date) before ``today``."""
+    missed = (
+        Installment.objects.filter(paid_at__isnull=True, due_date__lt=today, loan__status='APPROVED')
+        .values('loan_id', 'loan__user_id', 'loan__user__username', 'loan__purpose')
+        .annotate(
+            since=Min('due_date'),
+            owed=Sum(F('principal') + F('interest') - F('principal_paid') - F('interest_paid')),
+        )
+        .order_by()
+    )
+    rows = [
+        (row['loan_id'], row['loan__user_id'], row['loan__user__username'], row['loan__purpose'],
+         row['since'], row['owed'])
+        for row in missed
+    ]
+
+    # Loans approved before repayment schedules existed only have a final due date
+    start_of_today = timezone.make_aware(datetime.combine(today, datetime.min.time()))
+    unscheduled = (
+        Loan.objects.filter(status='APPROVED', due_date__lt=start_of_today)
+        .exclude(Exists(Installment.objects.filter(loan=OuterRef('pk'))))
+        .values_list('id', 'user_id', 'user__username', 'purpose', 'due_date', 'amount')
+    )
+    rows += [
+        (loan_id, user_id, username, purpose, timezone.localtime(due).date(), amount)
+        for loan_id, user_id, username, purpose, due, amount in unscheduled
+    ]
+
+    return [
+        Notification(
+            user_id=user_id, kind=Notification.OVERDUE_LOAN, loan_id=loan_id,
+            # A newly missed installment moves ``since`` only once the older one is paid,
+            # so a member is warned again after each catch-up, not on every run
+            key=f'loan-{loan_id}:{since:%Y-%m-%d}',
+            subject="Your loan repayment is overdue",
+            message=(
+                f"Hi {username},\n\nA repayment of KES {owed:,.2f} on your loan for \"{purpose}\" "
+                f"has been due since {since:%d %b %Y}. {PAYMENT_HINT}"
+            ),
+        )
+        for loan_id, user_id, username, purpose, since, owed in rows
+    ]
+
+
+def create(today=None):
+    """Record today's warnings. Returns the number found per kind, including earlier duplicates."""
+    today = today or timezone.localdate()
+    found = {}
+    for kind, check in ((Notification.MID_MONTH_WARNING, mid_month_warnings),
+                        (Notification.OVERDUE_LOAN, overdue_loans)):
+        notifications = check(today)
+        Notification.objects.bulk_create(notifications, batch_size=CHUNK_SIZE, ignore_conflicts=True)
+        found[kind] = len(notifications)
+    return found
+
+
+def send(chunk_size=CHUNK_SIZE):
+    """Email every unsent notification, ``chunk_size`` at a time. Returns the number sent."""
+    sent = 0
+    last_id = 0
+    with get_connection() as mail:
+        while True:
+            chunk = list(
+                Notification.objects.unsent().filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', 'subject', 'message', 'user__email')[:chunk_size]
+            )
+            if not chunk:
+                return sent
+            mail.send_messages([
+                EmailMessage(subject, message, to=[email], connection=mail)
+                for _, subject, message, email in chunk
+            ])
+            ids = [row[0] for row in chunk]
+            Notification.objects.filter(id__in=ids).update(emailed_at=timezone.now())
+            sent += len(ids)
+            last_id = ids[-1]
@@ -0,0 +1,162 @@
+"""Keyset (cursor) pagination for the list views.
+
+Pages are fetched with a ``WHERE (ordering) < (last row)`` filter instead of
+``OFFSET``, so every page costs the same as the first one. Cursors are opaque
+strings carried in the query string.
+"""
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+PAGE_SIZE = 25
+
+
+def encode_cursor(values):
+    def default(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        raise TypeError(f"Cannot encode {value!r} in a cursor")
+
+    raw = json.dumps(values, default=default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    return values
+
+
+def _row_value(row, field):
+    if isinstance(row, dict):
+        return row[field]
+    for part in field.split('__'):
+        row = getattr(row, part)
+    return row
+
+
+def _seek(ordering, values, forward):
+    """Build the row-value comparison ``(ordering) > values`` as ORed ``Q``s."""
+    condition = Q()
+    for i, term in enumerate(ordering):
+        field = term.lstrip('-')
+        descending = term.startswith('-')
+        lookup = 'lt' if descending == forward else 'gt'
+        clause = Q(**{f'{field}__{lookup}': values[i]})
+        for prev_term, prev_value in zip(ordering[:i], values[:i]):
+            clause &= Q(**{prev_term.lstrip('-'): prev_value})
+        condition |= clause
+    return condition
+
+
+def _reverse(term):
+    return term[1:] if term.startswith('-') else f'-{term}'
+
+
+class KeysetPage:
+    def __init__(self, object_list, ordering, has_next, has_previous, prefix, params):
+        self.object_list = object_list
+        self.ordering = ordering
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.prefix = prefix
+        self.params = params
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def _cursor(self, row):
+        return encode_cursor([_row_value(row, term.lstrip('-')) for term in self.ordering])
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    @property
+    def next_cursor(self):
+        return self._cursor(self.object_list[-1]) if self.has_next else None
+
+    @property
+    def previous_cursor(self):
+        return self._cursor(self.object_list[0]) if self.has_previous else None
+
+    def _querystring(self, param, cursor):
+        params = self.params.copy()
+        params.pop(f'{self.prefix}after', None)
+        params.pop(f'{self.prefix}before', None)
+        params[param] = cursor
+        return '?' + params.urlencode()
+
+    @property
+    def next_query(self):
+        return self._querystring(f'{self.prefix}after', self.next_cursor) if self.has_next else None
+
+    @property
+    def previous_query(self):
+        return self._querystring(f'{self.prefix}before', self.previous_cursor) if self.has_previous else None
+
+def _page_query(request, queryset, ordering, per_page, prefix):
+    """Return the sliced query for the requested page and which cursor it seeks from.
+
+    The cursor is ``'after'``, ``'before'`` or ``None`` for the first page.
+    """
+    after = decode_cursor(request.GET.get(f'{prefix}after', ''), len(ordering))
+    before = decode_cursor(request.GET.get(f'{prefix}before', ''), len(ordering)) if after is None else None
+
+    try:
+        if before is not None:
+            query = (
+                queryset.filter(_seek(ordering, before, forward=False))
+                .order_by(*[_reverse(term) for term in ordering])
+            )
+            return query[:per_page + 1], 'before'
+        if after is not None:
+            return queryset.filter(_seek(ordering, after, forward=True)).order_by(*ordering)[:per_page + 1], 'after'
+    except (ValidationError, ValueError, TypeError):
+        # A tampered cursor that doesn't parse for the column type.
+        pass
+    return queryset.order_by(*ordering)[:per_page + 1], None
+
+
+def _build_page(request, rows, ordering, per_page, prefix, cursor):
+    more = len(rows) > per_page
+    if cursor == 'before':
+        return KeysetPage(rows[:per_page][::-1], ordering, True, more, prefix, request.GET)
+    return KeysetPage(rows[:per_page], ordering, more, cursor == 'after', prefix, request.GET)
+
+
+def keyset_page(request, queryset, ordering, per_page=PAGE_SIZE, prefix=''):
+    """Return one ``KeysetPage`` of ``queryset`` ordered by ``ordering``.
+
+    ``ordering`` must end in a unique column (usually ``-id``) so the order is
+    total. The ``<prefix>after`` / ``<prefix>before`` query parameters select
+    the page following or preceding a cursor.
+    """
+    ordering = list(ordering)
+    query, cursor = _page_query(request, queryset, ordering, per_page, prefix)
+    return _build_page(request, list(query), ordering, per_page, prefix, cursor)
+
+
+async def akeyset_page(request, queryset, ordering, per_page=PAGE_SIZE, prefix=''):
+    """Async version of ``keyset_page`` for async views."""
+    ordering = list(ordering)
+    query, cursor = _page_query(request, queryset, ordering, per_page, prefix)
+    rows = [row async for row in query]
+    return _build_page(request, rows, ordering, per_page, prefix, cursor)
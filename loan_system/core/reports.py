@@ -0,0 +1,127 @@
+"""Grouped reporting queries shared by the admin views."""
+import calendar
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Loan, Savings, SavingsTarget, WelfareContribution
+from .search import filter_by_member
+
+LOAN_STATUSES = ('PENDING', 'APPROVED', 'REJECTED')
+
+
+def month_bounds(year, month):
+    """Return the aware ``[start, end)`` datetimes covering ``month`` of ``year``."""
+    start = timezone.make_aware(datetime(year, month, 1))
+    if month == 12:
+        end = timezone.make_aware(datetime(year + 1, 1, 1))
+    else:
+        end = timezone.make_aware(datetime(year, month + 1, 1))
+    return start, end
+
+
+def date_range_filter(field, start_date=None, end_date=None):
+    """Turn inclusive ``YYYY-MM-DD`` filter strings into half-open range lookups.
+
+    ``field__date__gte`` wraps the column in a function and can't use an
+    index, so the bounds are compared against the raw datetime column instead.
+    Malformed dates are ignored.
+    """
+    lookups = {}
+    try:
+        start = parse_date(start_date) if start_date else None
+        end = parse_date(end_date) if end_date else None
+    except ValueError:
+        return lookups
+    if start:
+        lookups[f'{field}__gte'] = timezone.make_aware(datetime.combine(start, time.min))
+    if end:
+        lookups[f'{field}__lt'] = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))
+    return lookups
+
+
+def _filter_member_dates(queryset, params, date_field):
+    queryset = filter_by_member(queryset, params.get('user'))
+    return queryset.filter(**date_range_filter(date_field, params.get('start_date'), params.get('end_date')))
+
+
+def filter_savings(params):
+    """Savings matching the admin ``user`` / ``start_date`` / ``end_date`` filters."""
+    return _filter_member_dates(Savings.objects.all(), params, 'date_saved')
+
+
+def filter_welfare(params):
+    """Welfare contributions matching the admin ``user`` / ``start_date`` / ``end_date`` filters."""
+    return _filter_member_dates(WelfareContribution.objects.all(), params, 'date_contributed')
+
+
+def filter_loans(params):
+    """Loans matching the admin ``status`` / ``user`` / ``start_date`` / ``end_date`` filters."""
+    queryset = _filter_member_dates(Loan.objects.all(), params, 'date_applied')
+    if params.get('status') in LOAN_STATUSES:
+        queryset = queryset.filter(status=params['status'])
+    return queryset
+
+
+def member_targets(year, month, users=None):
+    """Annotate members with their savings and target for one month.
+
+    Savings and target are both correlated subqueries, so only the members
+    actually fetched are looked up, each over that month's rows alone, and
+    a ``COUNT`` of the result (as a paginator runs) is a plain count of users.
+    """
+    start, end = month_bounds(year, month)
+    if users is None:
+        users = User.objects.filter(is_staff=False)
+
+    zero = Value(0, output_field=DecimalField(max_digits=10, decimal_places=2))
+    target = SavingsTarget.objects.filter(
+        user=OuterRef('pk'), year=year, month=month
+    ).values('amount')[:1]
+    saved = Savings.objects.filter(
+        user=OuterRef('pk'), date_saved__gte=start, date_saved__lt=end
+    ).values('user').annotate(total=Sum('amount')).values('total')
+
+    return users.annotate(
+        month_savings=Coalesce(Subquery(saved), zero),
+        month_target=Coalesce(Subquery(target), zero),
+    ).order_by('username', 'pk')
+
+
+def member_target_rows(users):
+    """Turn ``member_targets`` results into the ``user_data`` rows the templates expect."""
+    return [
+        {
+            'user': user,
+            'savings': user.month_savings,
+            'target': user.month_target,
+            'met_target': user.month_savings >= user.month_target and user.month_target > 0,
+        }
+        for user in users
+    ]
+
+
+def merge_monthly_series(savings, targets):
+    """Merge two ``{(year, month): amount}`` dicts into aligned chart series.
+
+    Every month present in either dict gets a label, and the side with no
+    entry for that month is filled with 0. Returns ``(labels, savings_values,
+    target_values)`` in chronological order.
+    """
+    labels, savings_values, target_values = [], [], []
+    for year, month in sorted(savings.keys() | targets.keys()):
+        labels.append(f"{calendar.month_abbr[month]} {year}")
+        savings_values.append(float(savings.get((year, month), 0)))
+        target_values.append(float(targets.get((year, month), 0)))
+    return labels, savings_values, target_values
+
+
+def chart_series(rows):
+    """Turn ``MonthlyRollup.objects.series`` rows into ``(labels, values)`` for a chart."""
+    labels = [f"{calendar.month_abbr[row['month']]} {row['year']}" for row in rows]
+    values = [float(row['total']) for row in rows]
+    return labels, values
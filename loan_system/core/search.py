@@ -0,0 +1,89 @@
+"""Indexed member search for the admin filters.
+
+``username__icontains`` compiles to ``LIKE '%term%'``, which no B-tree index
+can serve, so every search used to scan ``auth_user`` joined to the table
+being filtered. Instead, the search term is resolved to member ids through a
+substring index, and the list is filtered with ``user_id IN (...)``, which
+the ``(user, date)`` indexes on each table answer directly.
+
+On SQLite the index is the ``core_member_search`` FTS5 table with the
+trigram tokenizer, kept in step with ``User`` by ``core.signals`` and rebuilt
+by ``rebuild_member_search``. On PostgreSQL it is a set of ``pg_trgm`` GIN
+indexes on ``auth_user`` (see migration 0019), which serve the ``icontains``
+lookups as they are. Trigrams need at least three characters; shorter terms
+fall back to ``icontains`` on ``auth_user`` alone.
+"""
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+TABLE = 'core_member_search'
+FIELDS = ('username', 'first_name', 'last_name', 'email')
+MIN_TRIGRAM = 3
+
+
+def uses_fts():
+    return connection.vendor == 'sqlite'
+
+
+def _document(user):
+    return (user.pk, user.username, f'{user.first_name} {user.last_name}'.strip(), user.email)
+
+
+def index_members(users):
+    """Add or refresh ``users`` in the search table."""
+    if not uses_fts():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO {TABLE} (rowid, username, name, email) VALUES (%s, %s, %s, %s)',
+            [_document(user) for user in users],
+        )
+
+
+def remove_member(user_id):
+    if uses_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [user_id])
+
+
+def rebuild(batch_size=1000):
+    """Repopulate the search table from ``auth_user``. Returns the number of members indexed."""
+    if not uses_fts():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+    users = User.objects.only('pk', *FIELDS).order_by('pk')
+    batch, count = [], 0
+    for user in users.iterator(chunk_size=batch_size):
+        batch.append(user)
+        if len(batch) == batch_size:
+            index_members(batch)
+            count, batch = count + len(batch), []
+    index_members(batch)
+    return count + len(batch)
+
+
+def member_ids(term):
+    """A subquery of the ids of members whose username, name or email contains ``term``."""
+    term = term.strip()
+    if uses_fts() and len(term) >= MIN_TRIGRAM:
+        # Quoted as one FTS phrase, so the term is matched literally
+        phrase = '"{}"'.format(term.replace('"', '""'))
+        return RawSQL(f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s', [phrase])
+    condition = Q()
+    for field in FIELDS:
+        condition |= Q(**{f'{field}__icontains': term})
+    return User.objects.filter(condition).values('pk')
+
+
+def filter_by_member(queryset, term, field='user'):
+    """Filter ``queryset`` to rows whose ``field`` is a member matching ``term``.
+
+    The one search filter for the admin lists and exports; an empty term
+    leaves the queryset alone.
+    """
+    if not term or not term.strip():
+        return queryset
+    return queryset.filter(**{f'{field}__in': member_ids(term)})
@@ -0,0 +1,8 @@
+"""Queries and aggregates behind the views, one module per area.
+
+Views call these functions and render what they return instead of building
+querysets themselves, so the indexes, rollups and caches each page relies on
+live in one place. Functions returning a queryset leave paging to the view;
+``ServiceQueryTests`` pins down how many queries the others run.
+"""
+from . import loans, savings, targets, welfare  # noqa: F401
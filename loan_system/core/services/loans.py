@@ -0,0 +1,67 @@
+"""Loan applications, approvals and repayments."""
+from django.shortcuts import get_object_or_404
+
+from ..models import Installment, Loan, LoanStatusSummary, MemberBalance
+from ..reports import LOAN_STATUSES, filter_loans
+
+# Repayment periods offered on the loan application form
+LOAN_TERMS = (1, 3, 6, 12, 24)
+
+
+def limit(user):
+    """What the member may still borrow: three times their savings, less what they owe."""
+    return MemberBalance.objects.for_user(user).available_limit
+
+
+def apply(user, amount, purpose, term_months):
+    """Apply for a loan; raises ``LoanLimitExceeded`` if it is over the member's limit."""
+    if term_months not in LOAN_TERMS:
+        term_months = 1
+    return Loan.objects.apply(user, amount, purpose, term_months)
+
+
+def transition(loan_ids, status, by):
+    """Approve or reject pending loans; see ``LoanManager.transition``."""
+    return Loan.objects.transition(loan_ids, status, by)
+
+
+def record_repayment(loan_id, amount):
+    """Apply a repayment to an approved loan. Returns any amount beyond what was owed.
+
+    Raises ``Http404`` if the loan does not exist or is not approved.
+    """
+    loan = get_object_or_404(Loan, id=loan_id, status='APPROVED')
+    return Installment.objects.record_payment(loan, amount)
+
+
+def filtered(params):
+    """Loans matching the admin report filters, newest first."""
+    return filter_loans(params).order_by('-date_applied', '-id')
+
+
+def for_member(user, status=None):
+    loans = Loan.objects.filter(user=user)
+    if status in LOAN_STATUSES:
+        loans = loans.filter(status=status)
+    return loans
+
+
+def for_admin(status=None):
+    loans = Loan.objects.select_related('user')
+    if status in LOAN_STATUSES:
+        loans = loans.filter(status=status)
+    return loans
+
+
+async def summary():
+    """The admin dashboard cards: count and amount per status, and principal still owed.
+
+    Read from the ``LoanStatusSummary`` counters, a few rows, rather than
+    aggregated over every loan and installment.
+    """
+    by_status = [row async for row in LoanStatusSummary.objects.cards()]
+    approved = next((row for row in by_status if row['status'] == 'APPROVED'), None)
+    return {
+        'by_status': by_status,
+        'outstanding_principal': approved['total'] - approved['principal_repaid'] if approved else 0,
+    }
@@ -0,0 +1,123 @@
+"""Member savings: the dashboard, balances and the admin savings report."""
+import asyncio
+
+from django.core.paginator import Paginator
+from django.db.models import F, Sum
+
+from ..caching import aget_dashboard_context
+from ..models import DataVersion, MemberBalance, MonthlyRollup, Savings, SavingsTarget
+from ..reports import (
+    chart_series, filter_savings, member_target_rows, member_targets, merge_monthly_series, month_bounds,
+)
+from ..search import filter_by_member
+
+# From this day on, a member with no savings yet this month is warned
+MID_MONTH_DAY = 15
+MEMBERS_PER_PAGE = 50
+
+
+async def _dashboard_context(user, year, month):
+    month_start, month_end = month_bounds(year, month)
+    savings, target_obj = await asyncio.gather(
+        # Monthly savings
+        Savings.objects.filter(
+            user=user,
+            date_saved__gte=month_start,
+            date_saved__lt=month_end,
+        ).aaggregate(Sum('amount')),
+        # Monthly target
+        SavingsTarget.objects.filter(user=user, month=month, year=year).afirst(),
+    )
+
+    total_savings = savings['amount__sum'] or 0
+    target_savings = target_obj.amount if target_obj else 0
+    progress = (total_savings / target_savings) * 100 if target_savings else 0
+    remaining = max(target_savings - total_savings, 0)
+
+    return {
+        'total_savings': total_savings,
+        'target_savings': target_savings,
+        'progress': round(progress, 1),
+        'remaining': remaining,
+    }
+
+
+async def dashboard(user, now):
+    """The member dashboard for the month of ``now``, from the dashboard cache when possible."""
+    context = await aget_dashboard_context(
+        user.pk, now.year, now.month,
+        lambda: _dashboard_context(user, now.year, now.month),
+    )
+    # Mid-month warning depends on today's date, so it is not cached
+    return {**context, 'mid_month_warning': now.day >= MID_MONTH_DAY and context['total_savings'] == 0}
+
+
+def balance(user):
+    return MemberBalance.objects.for_user(user).savings_total
+
+
+def filtered(params):
+    """Savings matching the admin report filters, newest first."""
+    return filter_savings(params).order_by('-date_saved', '-id')
+
+
+async def atotal(savings):
+    if savings.query.where:
+        result = await savings.aaggregate(total=Sum('amount'))
+    else:
+        # Every row: add up the SACCO-wide monthly rollups rather than scan the table
+        result = await MonthlyRollup.objects.filter(
+            stream=MonthlyRollup.SAVINGS, user__isnull=True
+        ).aaggregate(total=Sum('total'))
+    return result['total'] or 0
+
+
+def per_member_totals(search=None):
+    """Total savings per member, optionally only members matching ``search``.
+
+    Read from the running ``MemberBalance`` totals, so a page costs a walk
+    down ``balance_savings_idx`` rather than summing every savings row.
+    """
+    balances = filter_by_member(MemberBalance.objects.filter(savings_total__gt=0), search)
+    return balances.values('user__username', total=F('savings_total'))
+
+
+def member_chart(user):
+    """The member's savings and targets per month, as aligned chart series."""
+    monthly_savings = {
+        (row['year'], row['month']): row['total']
+        for row in MonthlyRollup.objects.series(MonthlyRollup.SAVINGS, user=user)
+    }
+    monthly_targets = {
+        (row['year'], row['month']): row['amount']
+        for row in SavingsTarget.objects.filter(user=user).values('year', 'month', 'amount')
+    }
+    labels, savings_values, target_values = merge_monthly_series(monthly_savings, monthly_targets)
+    return {'labels': labels, 'savings': savings_values, 'targets': target_values}
+
+
+def member_chart_version(user):
+    """``(etag, last_modified)`` of ``member_chart(user)``."""
+    return DataVersion.objects.stamp([
+        DataVersion.scope_for(MonthlyRollup.SAVINGS, user),
+        DataVersion.scope_for(DataVersion.TARGETS, user),
+    ])
+
+
+def monthly_chart():
+    """SACCO-wide savings per month as ``(labels, values)``."""
+    return chart_series(MonthlyRollup.objects.series(MonthlyRollup.SAVINGS))
+
+
+def monthly_chart_version():
+    """``(etag, last_modified)`` of ``monthly_chart()``."""
+    return DataVersion.objects.stamp([DataVersion.scope_for(MonthlyRollup.SAVINGS)])
+
+
+def member_progress(year, month, page_number):
+    """One page of members with their savings and target for the month, in one query.
+
+    Returns the page and its ``user_data`` rows.
+    """
+    page = Paginator(member_targets(year, month), MEMBERS_PER_PAGE).get_page(page_number)
+    return page, member_target_rows(page)
@@ -0,0 +1,20 @@
+"""Monthly savings targets."""
+from ..models import SavingsTarget
+
+
+def for_month(user, year, month):
+    """The member's target for the month; a new, unsaved one if there is none yet."""
+    target = SavingsTarget.objects.filter(user=user, month=month, year=year).first()
+    return target or SavingsTarget(user=user, month=month, year=year)
+
+
+def set_target(user, year, month, amount):
+    target = for_month(user, year, month)
+    target.amount = amount
+    target.save()
+    return target
+
+
+def history(user):
+    """All of the member's targets, for paging."""
+    return SavingsTarget.objects.filter(user=user)
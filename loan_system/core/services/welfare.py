@@ -0,0 +1,46 @@
+"""Welfare contributions."""
+from django.db import transaction
+from django.db.models import Sum
+
+from ..models import DataVersion, MemberBalance, MonthlyRollup, WelfareContribution
+from ..reports import chart_series, filter_welfare
+
+
+def contribute(user, amount):
+    with transaction.atomic():
+        return WelfareContribution.objects.create(user=user, amount=amount)
+
+
+def member_total(user):
+    return MemberBalance.objects.for_user(user).welfare_total
+
+
+def member_history(user):
+    """The member's contributions, for paging."""
+    return WelfareContribution.objects.filter(user=user)
+
+
+def filtered(params):
+    """Contributions matching the admin report filters, newest first, with their members."""
+    return filter_welfare(params).select_related('user').order_by('-date_contributed', '-id')
+
+
+async def atotal(contributions):
+    if contributions.query.where:
+        result = await contributions.aaggregate(total=Sum('amount'))
+    else:
+        # Every row: add up the SACCO-wide monthly rollups rather than scan the table
+        result = await MonthlyRollup.objects.filter(
+            stream=MonthlyRollup.WELFARE, user__isnull=True
+        ).aaggregate(total=Sum('total'))
+    return result['total'] or 0
+
+
+def monthly_chart():
+    """SACCO-wide welfare contributions per month as ``(labels, values)``."""
+    return chart_series(MonthlyRollup.objects.series(MonthlyRollup.WELFARE))
+
+
+def monthly_chart_version():
+    """``(etag, last_modified)`` of ``monthly_chart()``."""
+    return DataVersion.objects.stamp([DataVersion.scope_for(MonthlyRollup.WELFARE)])
@@ -0,0 +1,215 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models import Sum
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import search
+from .metrics import record_query
+from .models import (
+    DataVersion, Installment, Loan, LoanStatusSummary, MemberBalance, MonthlyRollup, Savings, SavingsTarget, WelfareContribution,
+)
+
+
+# Keep MemberBalance in step with the raw tables. New rows are applied as an
+# increment; edits and deletes rebuild the member's row from the raw tables.
+
+@receiver(post_save, sender=Savings)
+def savings_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    with transaction.atomic():
+        if created:
+            MemberBalance.objects.add(instance.user_id, savings_total=instance.amount)
+        else:
+            MemberBalance.objects.rebuild(instance.user_id)
+
+
+@receiver(post_save, sender=WelfareContribution)
+def welfare_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    with transaction.atomic():
+        if created:
+            MemberBalance.objects.add(instance.user_id, welfare_total=instance.amount)
+        else:
+            MemberBalance.objects.rebuild(instance.user_id)
+
+
+@receiver(post_save, sender=Loan)
+def loan_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    with transaction.atomic():
+        if created and instance.status in MemberBalance.EXPOSURE_STATUSES:
+            MemberBalance.objects.add(instance.user_id, loan_exposure=instance.amount)
+        else:
+            MemberBalance.objects.rebuild(instance.user_id)
+
+
+@receiver(post_delete, sender=Savings)
+@receiver(post_delete, sender=WelfareContribution)
+@receiver(post_delete, sender=Loan)
+def balance_row_deleted(sender, instance, origin=None, **kwargs):
+    # Deleting a member cascades to their rows and their MemberBalance.
+    if deleting_member(origin):
+        return
+    MemberBalance.objects.rebuild(instance.user_id)
+
+
+def deleting_member(origin):
+    return isinstance(origin, User) or getattr(origin, 'model', None) is User
+
+
+# LoanStatusSummary counters for loans saved or deleted one at a time. Batch
+# transitions and repayments adjust the counters themselves.
+
+def _principal_repaid(loan_id):
+    return Installment.objects.filter(loan_id=loan_id).aggregate(total=Sum('principal_paid'))['total'] or 0
+
+
+@receiver(pre_save, sender=Loan)
+def loan_saving(sender, instance, raw=False, **kwargs):
+    instance._summary_previous = None
+    if raw or instance.pk is None:
+        return
+    instance._summary_previous = sender.objects.filter(pk=instance.pk).values_list('status', 'amount').first()
+
+
+@receiver(post_save, sender=Loan)
+def loan_summary_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_summary_previous', None)
+    if created:
+        LoanStatusSummary.objects.add(instance.status, count=1, amount=instance.amount)
+    elif previous is not None:
+        status, amount = previous
+        if (status, amount) == (instance.status, instance.amount):
+            return
+        repaid = _principal_repaid(instance.pk) if status != instance.status else 0
+        with transaction.atomic():
+            LoanStatusSummary.objects.add(status, count=-1, amount=-amount, principal_repaid=-repaid)
+            LoanStatusSummary.objects.add(instance.status, count=1, amount=instance.amount, principal_repaid=repaid)
+
+
+@receiver(pre_delete, sender=Loan)
+def loan_deleting(sender, instance, **kwargs):
+    # The installments go before the loan, so read what was repaid now. The
+    # stored status and amount count, not those of a possibly stale instance.
+    instance._summary_stored = (
+        sender.objects.filter(pk=instance.pk)
+        .annotate(repaid=Sum('installments__principal_paid'))
+        .values_list('status', 'amount', 'repaid')
+        .first()
+    )
+
+
+@receiver(post_delete, sender=Loan)
+def loan_summary_deleted(sender, instance, **kwargs):
+    stored = getattr(instance, '_summary_stored', None)
+    if stored is not None:
+        status, amount, repaid = stored
+        LoanStatusSummary.objects.add(status, count=-1, amount=-amount, principal_repaid=-(repaid or 0))
+
+
+# MonthlyRollup buckets are adjusted by deltas. Before an edit the stored row
+# is read back so its old contribution can be taken out of the right month.
+
+ROLLUP_STREAMS = {
+    Savings: (MonthlyRollup.SAVINGS, 'date_saved'),
+    WelfareContribution: (MonthlyRollup.WELFARE, 'date_contributed'),
+}
+
+
+@receiver(pre_save, sender=Savings)
+@receiver(pre_save, sender=WelfareContribution)
+def rollup_row_saving(sender, instance, raw=False, **kwargs):
+    instance._rollup_previous = None
+    if raw or instance.pk is None:
+        return
+    _, date_field = ROLLUP_STREAMS[sender]
+    instance._rollup_previous = (
+        sender.objects.filter(pk=instance.pk).values_list('user_id', date_field, 'amount').first()
+    )
+
+
+@receiver(post_save, sender=Savings)
+@receiver(post_save, sender=WelfareContribution)
+def rollup_row_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    stream, date_field = ROLLUP_STREAMS[sender]
+    previous = getattr(instance, '_rollup_previous', None)
+    with transaction.atomic():
+        if previous is not None:
+            user_id, when, amount = previous
+            MonthlyRollup.objects.add(stream, user_id, when, -amount, entries=-1)
+        MonthlyRollup.objects.add(stream, instance.user_id, getattr(instance, date_field), instance.amount)
+
+
+@receiver(post_delete, sender=Savings)
+@receiver(post_delete, sender=WelfareContribution)
+def rollup_row_deleted(sender, instance, origin=None, **kwargs):
+    stream, date_field = ROLLUP_STREAMS[sender]
+    # The member's own buckets go with the member; only the SACCO-wide one needs adjusting.
+    user_id = None if deleting_member(origin) else instance.user_id
+    MonthlyRollup.objects.add(stream, user_id, getattr(instance, date_field), -instance.amount, entries=-1)
+
+
+@receiver(post_save, sender=SavingsTarget)
+@receiver(post_delete, sender=SavingsTarget)
+def targets_changed(sender, instance, raw=False, origin=None, **kwargs):
+    # Rollup series are versioned by MonthlyRollupManager; targets are charted next to them
+    if not raw and not deleting_member(origin):
+        DataVersion.objects.bump([DataVersion.scope_for(DataVersion.TARGETS, instance.user_id)])
+
+
+@receiver(post_save, sender=Loan)
+@receiver(post_delete, sender=Loan)
+def loan_changed(sender, instance, raw=False, origin=None, **kwargs):
+    # Batch transitions and repayments bump the scope themselves
+    if not raw and not deleting_member(origin):
+        DataVersion.objects.bump([DataVersion.scope_for(DataVersion.LOANS, instance.user_id)])
+
+
+# The member search table (see core.search) follows auth_user.
+
+@receiver(post_save, sender=User)
+def member_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Logging in saves last_login and nothing else
+    if raw or (update_fields and not set(update_fields) & set(search.FIELDS)):
+        return
+    search.index_members([instance])
+
+
+@receiver(post_save, sender=User)
+def member_created(sender, instance, created, raw=False, **kwargs):
+    # Created up front, a member's first savings, target or loan only has to bump them
+    if created and not raw:
+        DataVersion.objects.create_for_members([instance.pk])
+
+
+@receiver(post_delete, sender=User)
+def member_deleted(sender, instance, **kwargs):
+    search.remove_member(instance.pk)
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    """Apply the database's ``PRAGMAS`` (default ``settings.SQLITE_PRAGMAS``) to each new SQLite connection."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = connection.settings_dict.get('PRAGMAS', getattr(settings, 'SQLITE_PRAGMAS', {}))
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    """Count this connection's queries towards the request metrics."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
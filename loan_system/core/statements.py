@@ -0,0 +1,187 @@
+"""Annual member statements.
+
+``collect`` gathers one member's savings, welfare contributions and loans for a
+calendar year with a handful of streamed queries, and ``render`` turns that
+into HTML or, when WeasyPrint is installed, PDF. Rendered statements are kept
+in the ``statements`` cache, keyed by member, year and format plus the
+``DataVersion`` of the member's savings, welfare and loans, so any new
+activity, including loan approvals and repayments, makes the next request
+regenerate them.
+
+Members don't wait for rendering: ``StatementRequest`` rows queue the work and
+``generate_statements`` renders the queue on a pool of worker processes.
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from decimal import Decimal
+
+import django
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connections
+from django.db.models import Sum
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import DataVersion, Installment, Loan, MonthlyRollup, Savings, StatementRequest, WelfareContribution
+from .reports import month_bounds
+
+CACHE_ALIAS = 'statements'
+FORMATS = {
+    'html': 'text/html; charset=utf-8',
+    'pdf': 'application/pdf',
+}
+CHUNK_SIZE = 500
+
+
+class StatementError(Exception):
+    pass
+
+
+def year_bounds(year):
+    return month_bounds(year, 1)[0], month_bounds(year + 1, 1)[0]
+
+
+def data_version(user_id):
+    """Moves whenever the member's savings, welfare, loans or repayments change."""
+    etag, _ = DataVersion.objects.stamp([
+        DataVersion.scope_for(MonthlyRollup.SAVINGS, user_id),
+        DataVersion.scope_for(MonthlyRollup.WELFARE, user_id),
+        DataVersion.scope_for(DataVersion.LOANS, user_id),
+    ])
+    return etag
+
+
+def cache_key(user_id, year, fmt, version=None):
+    if version is None:
+        version = data_version(user_id)
+    return f'statement:{user_id}:{year}:{fmt}:{version}'
+
+
+def cached(user_id, year, fmt='html', version=None):
+    """Return the rendered statement if it is cached and still current, else ``None``."""
+    return caches[CACHE_ALIAS].get(cache_key(user_id, year, fmt, version))
+
+
+def overview(user):
+    """Every year the member can get a statement for, newest first, with each format's state."""
+    # Every year with savings activity, plus the current one
+    years = {row['year'] for row in MonthlyRollup.objects.series(MonthlyRollup.SAVINGS, user=user)}
+    years.add(timezone.localtime().year)
+    version = data_version(user.pk)
+    queued = set(
+        StatementRequest.objects.filter(user=user, status__in=StatementRequest.OPEN_STATUSES)
+        .values_list('year', 'format')
+    )
+    return [
+        {
+            'year': year,
+            'formats': [
+                {
+                    'format': fmt,
+                    'ready': cached(user.pk, year, fmt, version) is not None,
+                    'queued': (year, fmt) in queued,
+                }
+                for fmt in FORMATS
+            ],
+        }
+        for year in sorted(years, reverse=True)
+    ]
+
+
+def collect(user, year):
+    """Return the context for ``user``'s statement for ``year``."""
+    start, end = year_bounds(year)
+    opening = Savings.objects.filter(user=user, date_saved__lt=start).aggregate(total=Sum('amount'))['total'] or 0
+
+    balance = Decimal(opening)
+    savings = []
+    rows = (
+        Savings.objects.filter(user=user, date_saved__gte=start, date_saved__lt=end)
+        .order_by('date_saved', 'id')
+        .values_list('date_saved', 'description', 'mpesa_receipt', 'amount')
+    )
+    for date_saved, description, receipt, amount in rows.iterator(chunk_size=CHUNK_SIZE):
+        balance += amount
+        savings.append({
+            'date': date_saved, 'description': description, 'receipt': receipt,
+            'amount': amount, 'balance': balance,
+        })
+
+    welfare = list(
+        WelfareContribution.objects.filter(user=user, date_contributed__gte=start, date_contributed__lt=end)
+        .order_by('date_contributed', 'id')
+        .values('date_contributed', 'mpesa_receipt', 'amount')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    loans = list(
+        Loan.objects.filter(user=user, date_applied__gte=start, date_applied__lt=end)
+        .order_by('date_applied', 'id')
+        .values('date_applied', 'purpose', 'amount', 'status', 'term_months', 'interest_rate')
+    )
+    repaid = Installment.objects.filter(loan__user=user, paid_at__gte=start, paid_at__lt=end).aggregate(
+        principal=Sum('principal_paid'), interest=Sum('interest_paid'),
+    )
+
+    return {
+        'member': user,
+        'year': year,
+        'generated_at': timezone.now(),
+        'opening_balance': opening,
+        'closing_balance': balance,
+        'savings': savings,
+        'savings_total': balance - opening,
+        'welfare': welfare,
+        'welfare_total': sum((row['amount'] for row in welfare), Decimal(0)),
+        'loans': loans,
+        'principal_repaid': repaid['principal'] or 0,
+        'interest_paid': repaid['interest'] or 0,
+        'outstanding_principal': Installment.objects.outstanding_principal(user=user),
+    }
+
+
+def render(context, fmt='html'):
+    if fmt not in FORMATS:
+        raise StatementError(f"Unknown statement format {fmt!r}.")
+    html = render_to_string('core/statement.html', context)
+    if fmt == 'html':
+        return html.encode()
+    try:
+        from weasyprint import HTML
+    except ImportError:
+        raise StatementError("PDF statements need WeasyPrint (pip install weasyprint).")
+    return HTML(string=html).write_pdf()
+
+
+def build(user, year, fmt='html'):
+    """Render ``user``'s statement for ``year`` and cache it. Returns the output."""
+    key = cache_key(user.pk, year, fmt)
+    output = render(collect(user, year), fmt)
+    caches[CACHE_ALIAS].set(key, output)
+    return output
+
+
+def _build_job(user_id, year, fmt):
+    """Build one queued statement, returning ``(size, error)`` instead of raising."""
+    try:
+        return len(build(User.objects.get(pk=user_id), year, fmt)), None
+    except Exception as exc:
+        return 0, f'{type(exc).__name__}: {exc}'
+
+
+def build_many(jobs, workers):
+    """Render ``(user_id, year, fmt)`` jobs on ``workers`` processes.
+
+    Yields ``(job, size, error)`` as each finishes. With ``workers=0`` the
+    statements are rendered in this process, one after another.
+    """
+    if not workers:
+        for job in jobs:
+            yield (job, *_build_job(*job))
+        return
+
+    # Forked children must not share this process's connections
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        futures = {pool.submit(_build_job, *job): job for job in jobs}
+        for future in as_completed(futures):
+            yield (futures[future], *future.result())
@@ -0,0 +1,76 @@
+"""Serve collected static files with far-future caching and precompressed bodies.
+
+Runs when the app server answers ``STATIC_URL`` itself (gunicorn or uvicorn
+with no web server in front, as at the branches). Fingerprinted names never
+change content, so they are cached for a year and marked immutable, and
+browsers stop revalidating them on every page; anything else gets a short
+lifetime. The ``.br``/``.gz`` copies written by ``core.storage`` are sent to
+clients that accept them.
+"""
+import mimetypes
+import os
+import posixpath
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+HASHED_MAX_AGE = 60 * 60 * 24 * 365
+UNHASHED_MAX_AGE = 60 * 5
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _hashed_names():
+    return set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+
+def _accepted_encodings(header):
+    """The content codings in an ``Accept-Encoding`` header, less any refused with ``q=0``."""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        quality = params.strip().removeprefix('q=')
+        try:
+            refused = params and float(quality) == 0
+        except ValueError:
+            refused = False
+        if not refused:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def serve(request, path):
+    name = posixpath.normpath(path).lstrip('/')
+    try:
+        fullpath = staticfiles_storage.path(name)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+
+    encoding = None
+    accepted = _accepted_encodings(request.headers.get('Accept-Encoding', ''))
+    for coding, extension in ENCODINGS:
+        if coding in accepted and os.path.isfile(fullpath + extension):
+            fullpath, encoding = fullpath + extension, coding
+            break
+
+    mtime = os.stat(fullpath).st_mtime
+    if not was_modified_since(request.headers.get('If-Modified-Since'), mtime):
+        response = HttpResponseNotModified()
+    else:
+        content_type, _ = mimetypes.guess_type(name)
+        response = FileResponse(open(fullpath, 'rb'), content_type=content_type or 'application/octet-stream')
+        response.headers['Last-Modified'] = http_date(mtime)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+
+    if name in _hashed_names():
+        patch_cache_control(response, public=True, max_age=HASHED_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=UNHASHED_MAX_AGE)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,54 @@
+"""Static file storage that fingerprints and precompresses at ``collectstatic``.
+
+Every hashed file that compresses well gets a ``.gz`` sibling, and a ``.br``
+one when the ``brotli`` package is installed, so ``core.static.serve`` (or a
+web server's ``gzip_static``) can hand out the compressed bytes without
+compressing on each request.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # optional; gzip alone still covers every browser
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.map', '.svg', '.json', '.txt', '.html', '.xml')
+MIN_SIZE = 1024
+
+
+def compress(data):
+    """``(extension, compressed bytes)`` for each encoding available."""
+    # mtime=0 keeps the output identical between builds
+    encoded = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        encoded.append(('.br', brotli.compress(data)))
+    return encoded
+
+
+class PrecompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if not dry_run:
+            # The final names only; CSS files are rehashed over several passes
+            for name in sorted(set(self.hashed_files.values())):
+                self.precompress(name)
+
+    def precompress(self, name):
+        """Write compressed copies of ``name``. Returns the extensions written."""
+        if not name.endswith(COMPRESSIBLE):
+            return []
+        with self.open(name) as original:
+            data = original.read()
+        if len(data) < MIN_SIZE:
+            return []
+        written = []
+        for extension, compressed in compress(data):
+            # Not worth a second file, or a Content-Encoding header, if it barely shrinks
+            if len(compressed) < len(data) * 0.9:
+                with open(self.path(name + extension), 'wb') as out:
+                    out.write(compressed)
+                written.append(extension)
+        return written
@@ -0,0 +1,52 @@
+"""Background tasks run by ``runworker``. See ``core.jobs``."""
+import os
+from datetime import timedelta
+
+from django.core.mail import send_mail
+
+from .jobs import task
+from .models import Installment
+from .mpesa import RejectSample, StatementError, import_statement
+
+
+# A statement of a few hundred thousand rows can take well over the default
+# ten minutes, and must not be picked up by a second worker meanwhile
+@task(max_attempts=3, stale_after=timedelta(hours=2))
+def import_mpesa_statement(path, stream):
+    """Import an uploaded paybill statement spooled to ``path``, then delete it."""
+    rejects = RejectSample()
+    try:
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            result = import_statement(f, stream=stream, rejects=rejects)
+    except (StatementError, UnicodeDecodeError) as exc:
+        # A malformed file won't import on a retry either
+        os.remove(path)
+        return {'error': f"Could not read statement: {exc}"}
+    os.remove(path)
+    return {
+        'summary': str(result),
+        'imported': result.imported,
+        'duplicates': result.duplicates,
+        'rejected': result.rejected,
+        'rejects': rejects.rows,
+    }
+
+
+@task()
+def send_installment_reminder(installment_id):
+    """Remind a member that a loan installment falls due soon."""
+    installment = Installment.objects.select_related('loan__user').get(pk=installment_id)
+    user = installment.loan.user
+    if installment.paid_at is not None:
+        return {'skipped': 'already paid'}
+    if not user.email:
+        return {'skipped': 'no email address'}
+    send_mail(
+        f"Loan installment due on {installment.due_date:%d %b %Y}",
+        f"Hi {user.username},\n\nInstallment {installment.number} of your loan for "
+        f"\"{installment.loan.purpose}\" (KES {installment.amount_due}) is due on "
+        f"{installment.due_date:%d %b %Y}. Please pay via M-PESA to Paybill 123456.",
+        None,
+        [user.email],
+    )
+    return {'sent': user.email}
@@ -0,0 +1,26 @@
+from django import template
+from django.utils.html import format_html
+
+from ..assets import ASSETS, asset_url
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def asset(context, name):
+    """Include a vendored stylesheet or script, once per page.
+
+    Templates that draw charts include Chart.js themselves; later includes of
+    the same asset on the page (from ``base.html`` or another include) render
+    nothing, so the browser never downloads or runs it twice.
+    """
+    if name not in ASSETS:
+        raise template.TemplateSyntaxError(f'Unknown asset {name!r}')
+    # The bottom of the render context lives for the whole page, includes and all
+    included = context.render_context.dicts[0].setdefault('included_assets', set())
+    if name in included:
+        return ''
+    included.add(name)
+    if name.endswith('.css'):
+        return format_html('<link rel="stylesheet" href="{}">', asset_url(name))
+    return format_html('<script src="{}"></script>', asset_url(name))
@@ -1,3 +1,5 @@
+import calendar
+
 from django import template
 
 register = template.Library()
@@ -8,3 +10,10 @@ def abs_val(value):
         return abs(int(value))
     except (TypeError, ValueError):
         return value
+
+@register.filter
+def get_month_name(value):
+    try:
+        return calendar.month_name[int(value)]
+    except (TypeError, ValueError, IndexError):
+        return value
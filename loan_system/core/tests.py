@@ -1,3 +1,1714 @@
-from django.test import TestCase
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+import csv
+import gzip
+import json
+import os
+import re
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.management import CommandError, call_command
+from django.core import mail
+from django.core.cache import caches
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.test import LiveServerTestCase, TestCase, TransactionTestCase, override_settings
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import assets, caching, jobs, metrics, notifications, search, services, statements, tasks
+from .amortization import FLAT, REDUCING, build_schedule
+from .models import (
+    Installment, Job, Loan, LoanStatusSummary, MemberBalance, MonthlyRollup, Notification, Savings, SavingsTarget,
+    StatementRequest, WelfareContribution,
+)
+from .mpesa import RejectSample, import_statement
+from .pagination import PAGE_SIZE, encode_cursor
+from .reports import member_target_rows, member_targets, merge_monthly_series
+from .urls import urlpatterns
+
+
+class MemberBalanceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='member')
+
+    def balance(self):
+        return MemberBalance.objects.get(user=self.user)
+
+    def test_savings_and_welfare_are_applied_incrementally(self):
+        Savings.objects.create(user=self.user, amount=Decimal('100.00'))
+        Savings.objects.create(user=self.user, amount=Decimal('250.50'))
+        WelfareContribution.objects.create(user=self.user, amount=Decimal('40.00'))
+
+        balance = self.balance()
+        self.assertEqual(balance.savings_total, Decimal('350.50'))
+        self.assertEqual(balance.welfare_total, Decimal('40.00'))
+        self.assertEqual(balance.loan_limit, Decimal('1051.50'))
+
+    def test_edits_and_deletes_rebuild_the_balance(self):
+        saving = Savings.objects.create(user=self.user, amount=Decimal('100.00'))
+        saving.amount = Decimal('60.00')
+        saving.save()
+        self.assertEqual(self.balance().savings_total, Decimal('60.00'))
+
+        saving.delete()
+        self.assertEqual(self.balance().savings_total, Decimal('0.00'))
+
+    def test_loan_exposure_follows_status(self):
+        loan = Loan.objects.create(user=self.user, amount=Decimal('500.00'), purpose='Stock')
+        self.assertEqual(self.balance().loan_exposure, Decimal('500.00'))
+
+        loan.status = 'REJECTED'
+        loan.save()
+        self.assertEqual(self.balance().loan_exposure, Decimal('0.00'))
+
+    def test_deleting_member_removes_balance(self):
+        Savings.objects.create(user=self.user, amount=Decimal('100.00'))
+        self.user.delete()
+        self.assertFalse(MemberBalance.objects.exists())
+
+    def test_apply_loan_reads_limit_from_balance(self):
+        Savings.objects.create(user=self.user, amount=Decimal('100.00'))
+        self.client.force_login(self.user)
+
+        with self.assertNumQueries(3):  # session, user, balance
+            response = self.client.get(reverse('apply_loan'))
+        self.assertEqual(response.context['loan_limit'], Decimal('300.00'))
+
+
+class RebuildBalancesCommandTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='member')
+        Savings.objects.create(user=self.user, amount=Decimal('100.00'))
+        Loan.objects.create(user=self.user, amount=Decimal('200.00'), purpose='Fees')
+
+    def test_verify_passes_when_in_sync(self):
+        out = StringIO()
+        call_command('rebuild_balances', '--verify', stdout=out)
+        self.assertIn('match', out.getvalue())
+
+    def test_rebuild_repairs_drift(self):
+        MemberBalance.objects.filter(user=self.user).update(savings_total=0)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_balances', '--verify', stdout=StringIO())
+
+        call_command('rebuild_balances', stdout=StringIO())
+        balance = MemberBalance.objects.get(user=self.user)
+        self.assertEqual(balance.savings_total, Decimal('100.00'))
+        self.assertEqual(balance.loan_exposure, Decimal('200.00'))
+
+
+class MemberTargetReportTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.year, self.month = now.year, now.month
+        self.staff = User.objects.create_user(username='admin', is_staff=True)
+
+    def make_member(self, name, saved=None, target=None):
+        user = User.objects.create_user(username=name)
+        if saved is not None:
+            Savings.objects.create(user=user, amount=Decimal(saved))
+        if target is not None:
+            SavingsTarget.objects.create(user=user, year=self.year, month=self.month, amount=Decimal(target))
+        return user
+
+    def test_rows_match_per_member_figures(self):
+        self.make_member('alice', saved='500', target='400')
+        self.make_member('bob', saved='100', target='400')
+        self.make_member('carol')
+        old = self.make_member('dave', target='100')
+        saving = Savings.objects.create(user=old, amount=Decimal('900'))
+        Savings.objects.filter(pk=saving.pk).update(date_saved=timezone.now() - timedelta(days=40))
+
+        rows = {r['user'].username: r for r in member_target_rows(member_targets(self.year, self.month))}
+
+        self.assertEqual(set(rows), {'alice', 'bob', 'carol', 'dave'})
+        self.assertEqual((rows['alice']['savings'], rows['alice']['target']), (Decimal('500'), Decimal('400')))
+        self.assertTrue(rows['alice']['met_target'])
+        self.assertFalse(rows['bob']['met_target'])
+        self.assertEqual((rows['carol']['savings'], rows['carol']['target']), (0, 0))
+        self.assertFalse(rows['carol']['met_target'])
+        self.assertEqual(rows['dave']['savings'], 0)
+
+    def test_admin_savings_query_count_does_not_grow_with_members(self):
+        self.client.force_login(self.staff)
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse('admin_savings'))
+            self.assertEqual(response.status_code, 200)
+            return len(ctx.captured_queries)
+
+        self.make_member('m0', saved='10', target='20')
+        baseline = count_queries()
+        for i in range(1, 30):
+            self.make_member(f'm{i}', saved='10', target='20')
+        self.assertEqual(count_queries(), baseline)
+
+    def test_progress_page_counts_members_without_joining_savings(self):
+        for i in range(3):
+            self.make_member(f'm{i}', saved='10', target='20')
+
+        with CaptureQueriesContext(connection) as ctx:
+            page, rows = services.savings.member_progress(self.year, self.month, 1)
+
+        count_sql, page_sql = (q['sql'] for q in ctx.captured_queries)
+        self.assertNotIn('core_savings', count_sql)
+        self.assertNotIn('JOIN', page_sql)
+        self.assertEqual(page.paginator.count, 3)
+        self.assertEqual([row['savings'] for row in rows], [Decimal('10')] * 3)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='member')
+        self.staff = User.objects.create_user(username='admin', is_staff=True)
+
+    def walk(self, url, key, param='after'):
+        """Follow the "next" links of a paginated view and return every row."""
+        rows, query, pages = [], '', 0
+        while query is not None:
+            response = self.client.get(url + query)
+            self.assertEqual(response.status_code, 200)
+            page = response.context[key]
+            self.assertLessEqual(len(page), PAGE_SIZE)
+            rows.extend(page)
+            query = page.next_query
+            pages += 1
+        return rows, pages
+
+    def test_user_loans_pages_cover_every_loan_once(self):
+        loans = Loan.objects.bulk_create(
+            Loan(user=self.user, amount=Decimal(i + 1), purpose='x') for i in range(60)
+        )
+        # Several loans share a timestamp, so the id tie-breaker matters.
+        Loan.objects.filter(pk__in=[l.pk for l in loans[:30]]).update(date_applied=timezone.now())
+        self.client.force_login(self.user)
+
+        rows, pages = self.walk(reverse('user_loans') + '?status=PENDING', 'user_loans')
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(rows), 60)
+        self.assertEqual(len({l.pk for l in rows}), 60)
+        expected = list(Loan.objects.order_by('-date_applied', '-id'))
+        self.assertEqual(rows, expected)
+
+    def test_previous_link_returns_to_earlier_page(self):
+        Loan.objects.bulk_create(Loan(user=self.user, amount=1, purpose='x') for _ in range(30))
+        self.client.force_login(self.staff)
+        url = reverse('admin_dashboard')
+
+        first = self.client.get(url).context['all_loans']
+        second = self.client.get(url + first.next_query).context['all_loans']
+        back = self.client.get(url + second.previous_query).context['all_loans']
+
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous)
+
+    def test_per_user_totals_paginate_by_total(self):
+        for i in range(30):
+            member = User.objects.create_user(username=f'm{i:02}')
+            Savings.objects.create(user=member, amount=Decimal(f'{(i % 7) * 100 + 0.5}'))
+        self.client.force_login(self.staff)
+
+        rows, _ = self.walk(reverse('admin_savings'), 'per_user')
+
+        self.assertEqual(len(rows), 30)
+        self.assertEqual(
+            [(r['total'], r['user__username']) for r in rows],
+            sorted(((r['total'], r['user__username']) for r in rows), key=lambda r: (-r[0], r[1])),
+        )
+
+    def test_bad_cursor_falls_back_to_first_page(self):
+        SavingsTarget.objects.create(user=self.user, month=1, year=2024, amount=100)
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse('target_history') + '?after=not-a-cursor')
+
+        self.assertEqual(len(response.context['targets']), 1)
+        self.assertContains(response, 'January')
+
+    def test_cursor_values_of_the_wrong_type_fall_back_to_first_page(self):
+        SavingsTarget.objects.create(user=self.user, month=1, year=2024, amount=100)
+        Loan.objects.create(user=self.user, amount=100, purpose='x')
+        self.client.force_login(self.user)
+
+        for name, values, key in (
+            ('target_history', ['x', 'y', 'z'], 'targets'),
+            ('user_loans', ['2020-01-01', 'abc'], 'user_loans'),
+            ('user_loans', [None, {}], 'user_loans'),
+        ):
+            with self.subTest(view=name, values=values):
+                response = self.client.get(reverse(name) + '?after=' + encode_cursor(values))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.context[key]), 1)
+
+
+class QueryPlanTests(TestCase):
+    """Hot views must search tables through an index, never scan them.
+
+    SQLite reports ``SCAN`` for a bare table scan and also for walking a
+    whole index; only ``SEARCH ... USING INDEX`` with a key or range is a
+    bounded lookup. Deliberate scans are listed in ``ALLOWED_SCANS`` by path.
+    """
+
+    ALLOWED_SCANS = {
+        # The unfiltered keyset page walks welfare_date_idx newest first and
+        # stops after the LIMIT, so it reads one page of rows, not the table
+        ('/admin-welfare/', 'SCAN core_welfarecontribution USING INDEX welfare_date_idx'),
+        # The target progress list pages through members by username, stopping
+        # after the page, and its paginator counts them; that count is the one
+        # full pass left, over auth_user rather than any per-transaction table
+        ('/admin-savings/', 'SCAN auth_user USING INDEX sqlite_autoindex_auth_user_1'),
+        ('/admin-savings/', 'SCAN auth_user'),
+    }
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='member')
+        self.staff = User.objects.create_user(username='admin', is_staff=True)
+        Savings.objects.create(user=self.user, amount=100)
+        SavingsTarget.objects.create(user=self.user, month=1, year=2024, amount=100)
+        Loan.objects.create(user=self.user, amount=100, purpose='x')
+        WelfareContribution.objects.create(user=self.user, amount=100)
+
+    def full_scans(self, user, url):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        scans = []
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                for row in cursor.fetchall():
+                    detail = row[-1]
+                    # FTS5 shows every MATCH as a SCAN; "M" in the index string means the full-text index answers it
+                    if 'VIRTUAL TABLE INDEX' in detail and ':M' in detail:
+                        continue
+                    if detail.startswith('SCAN ') and (url.split('?')[0], detail) not in self.ALLOWED_SCANS:
+                        scans.append((detail, query['sql']))
+        return scans
+
+    def test_member_views_use_indexes(self):
+        for name in ('dashboard', 'savings', 'apply_loan', 'user_loans', 'target_history'):
+            with self.subTest(view=name):
+                self.assertEqual(self.full_scans(self.user, reverse(name)), [])
+
+    def test_admin_views_use_indexes(self):
+        for url in (
+            reverse('admin_dashboard'),
+            reverse('admin_dashboard') + '?status=APPROVED',
+            reverse('admin_savings'),
+            reverse('admin_savings') + '?start_date=2024-01-01&end_date=2024-12-31',
+            reverse('admin_savings') + '?user=member',
+            reverse('admin_welfare'),
+            reverse('admin_welfare') + '?start_date=2024-01-01&end_date=2024-12-31',
+            reverse('admin_welfare') + '?user=member',
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.full_scans(self.staff, url), [])
+
+    def test_unfiltered_totals_come_from_the_rollups(self):
+        self.client.force_login(self.staff)
+        for name, table in (('admin_savings', 'core_savings'), ('admin_welfare', 'core_welfarecontribution')):
+            with self.subTest(view=name):
+                with CaptureQueriesContext(connection) as ctx:
+                    response = self.client.get(reverse(name))
+                self.assertEqual(response.context['total_amount'], 100)
+                grand_totals = [q for q in ctx.captured_queries if q['sql'].startswith(f'SELECT (CAST(SUM("{table}"')]
+                self.assertEqual(grand_totals, [])
+
+
+class MemberSearchTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(
+            username='alice.w', first_name='Alice', last_name='Wanjiru', email='alice@example.com',
+        )
+        self.bob = User.objects.create_user(username='bob', email='bob@mail.test')
+        for user in (self.alice, self.bob):
+            Savings.objects.create(user=user, amount=100)
+
+    def members(self, term):
+        return sorted(s.user.username for s in search.filter_by_member(Savings.objects.all(), term))
+
+    def test_substring_name_and_email_matches(self):
+        self.assertEqual(self.members('LICE'), ['alice.w'])
+        self.assertEqual(self.members('wanjiru'), ['alice.w'])
+        self.assertEqual(self.members('mail.test'), ['bob'])
+        self.assertEqual(self.members('b'), ['bob'])  # too short for trigrams
+        self.assertEqual(self.members('"x'), [])
+        self.assertEqual(self.members(''), ['alice.w', 'bob'])
+
+    def test_index_follows_member_changes(self):
+        self.bob.username = 'robert'
+        self.bob.save()
+        self.assertEqual(self.members('robert'), ['robert'])
+        self.assertEqual(self.members('bob'), ['robert'])  # still in the email
+
+        self.bob.delete()
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {search.TABLE}')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search.TABLE}')
+        call_command('rebuild_member_search', stdout=StringIO())
+        self.assertEqual(self.members('alice'), ['alice.w'])
+
+    def test_search_uses_indexes(self):
+        queryset = search.filter_by_member(Savings.objects.order_by('-date_saved'), 'alice')
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = [row[-1] for row in cursor.fetchall()]
+        self.assertFalse([step for step in plan if step.startswith('SCAN') and 'VIRTUAL TABLE' not in step], plan)
+
+    def test_admin_lists_filter_through_the_index(self):
+        self.client.force_login(User.objects.create_user(username='admin', is_staff=True))
+        WelfareContribution.objects.create(user=self.alice, amount=50)
+
+        response = self.client.get(reverse('admin_savings'), {'user': 'wanjiru'})
+        self.assertEqual([row['user__username'] for row in response.context['per_user']], ['alice.w'])
+        self.assertEqual(response.context['total_amount'], Decimal('100'))
+        response = self.client.get(reverse('admin_welfare'), {'user': 'wanjiru'})
+        self.assertEqual(response.context['total_amount'], Decimal('50'))
+
+
+class MonthlyRollupTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice')
+        self.bob = User.objects.create_user(username='bob')
+
+    def series(self, stream, user=None):
+        return [(r['year'], r['month'], r['total']) for r in MonthlyRollup.objects.series(stream, user)]
+
+    def test_new_rows_update_member_and_global_buckets(self):
+        jan = timezone.make_aware(datetime(2024, 1, 10))
+        feb = timezone.make_aware(datetime(2024, 2, 3))
+        WelfareContribution.objects.create(user=self.alice, amount=50, date_contributed=jan)
+        WelfareContribution.objects.create(user=self.bob, amount=20, date_contributed=jan)
+        WelfareContribution.objects.create(user=self.alice, amount=30, date_contributed=feb)
+
+        self.assertEqual(self.series(MonthlyRollup.WELFARE, self.alice), [(2024, 1, 50), (2024, 2, 30)])
+        self.assertEqual(self.series(MonthlyRollup.WELFARE), [(2024, 1, 70), (2024, 2, 30)])
+        self.assertEqual(self.series(MonthlyRollup.SAVINGS), [])
+
+    def test_edits_move_amount_between_months_and_deletes_remove_it(self):
+        jan = timezone.make_aware(datetime(2024, 1, 10))
+        contribution = WelfareContribution.objects.create(user=self.alice, amount=50, date_contributed=jan)
+
+        contribution.date_contributed = jan + timedelta(days=40)
+        contribution.amount = 60
+        contribution.save()
+        self.assertEqual(self.series(MonthlyRollup.WELFARE, self.alice), [(2024, 2, 60)])
+
+        contribution.delete()
+        self.assertFalse(MonthlyRollup.objects.exists())
+
+    def test_deleting_member_keeps_global_totals_consistent(self):
+        Savings.objects.create(user=self.alice, amount=100)
+        Savings.objects.create(user=self.bob, amount=40)
+        self.alice.delete()
+
+        call_command('rebuild_rollups', '--verify', stdout=StringIO())
+        self.assertEqual([r[2] for r in self.series(MonthlyRollup.SAVINGS)], [40])
+
+    def test_rebuild_command_repairs_drift(self):
+        Savings.objects.create(user=self.alice, amount=100)
+        MonthlyRollup.objects.all().delete()
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rollups', '--verify', stdout=StringIO())
+
+        call_command('rebuild_rollups', stdout=StringIO())
+        call_command('rebuild_rollups', '--verify', stdout=StringIO())
+        self.assertEqual(len(self.series(MonthlyRollup.SAVINGS, self.alice)), 1)
+
+    def test_admin_charts_read_rollups(self):
+        jan = timezone.make_aware(datetime(2024, 1, 10))
+        WelfareContribution.objects.create(user=self.alice, amount=50, date_contributed=jan)
+        self.client.force_login(User.objects.create_user(username='admin', is_staff=True))
+
+        response = self.client.get(reverse('admin_welfare_chart'))
+
+        self.assertEqual(response.json(), {'labels': ['Jan 2024'], 'values': [50.0]})
+
+
+class MonthlySeriesMergeTests(TestCase):
+    def test_months_from_either_side_are_kept_and_zero_filled(self):
+        labels, saved, targets = merge_monthly_series(
+            {(2024, 1): Decimal('100'), (2024, 3): Decimal('50')},
+            {(2024, 2): Decimal('80'), (2024, 3): Decimal('60')},
+        )
+        self.assertEqual(labels, ['Jan 2024', 'Feb 2024', 'Mar 2024'])
+        self.assertEqual(saved, [100.0, 0.0, 50.0])
+        self.assertEqual(targets, [0.0, 80.0, 60.0])
+
+    def test_long_history_is_merged_in_order(self):
+        savings = {(y, m): Decimal(m) for y in range(2010, 2024) for m in range(1, 13)}
+        targets = {(y, m): Decimal(10) for y in range(2012, 2026) for m in range(1, 13) if m % 2}
+
+        labels, saved, target_values = merge_monthly_series(savings, targets)
+
+        self.assertEqual(len(labels), 14 * 12 + 2 * 6)
+        self.assertEqual(labels[0], 'Jan 2010')
+        self.assertEqual(labels[-1], 'Nov 2025')
+        self.assertEqual(sum(saved), float(sum(savings.values())))
+        self.assertEqual(sum(target_values), float(sum(targets.values())))
+
+    def test_dashboard_chart_for_member_with_ten_years_of_history(self):
+        user = User.objects.create_user(username='veteran')
+        SavingsTarget.objects.bulk_create(
+            SavingsTarget(user=user, year=y, month=m, amount=500) for y in range(2014, 2025) for m in range(1, 13)
+        )
+        MonthlyRollup.objects.bulk_create(
+            MonthlyRollup(user=user, stream=MonthlyRollup.SAVINGS, year=y, month=m, total=400, entries=1)
+            for y in range(2013, 2025) for m in range(1, 13)
+        )
+        self.client.force_login(user)
+
+        chart = self.client.get(reverse('dashboard_chart')).json()
+
+        # 2013 has savings but no targets and must still be charted.
+        self.assertEqual(len(chart['labels']), 12 * 12)
+        self.assertEqual(chart['labels'][0], 'Jan 2013')
+        self.assertEqual(chart['targets'][:12], [0.0] * 12)
+        self.assertEqual(chart['savings'][-1], 400.0)
+
+
+STATEMENT = """Organisation Name:,Demo SACCO
+Paybill:,123456
+Receipt No.,Completion Time,Initiation Time,Details,Transaction Status,Paid In,Withdrawn,Balance,A/C No.
+QAB1,2024-03-01 09:00:00,2024-03-01 09:00:00,Pay Bill,Completed,"1,000.00",,1000.00,alice
+QAB2,2024-03-02 10:00:00,2024-03-02 10:00:00,Pay Bill,Completed,250.00,,1250.00,bob
+QAB3,2024-04-02 10:00:00,2024-04-02 10:00:00,Pay Bill,Completed,300.00,,1550.00,alice
+QAB1,2024-03-01 09:00:00,2024-03-01 09:00:00,Pay Bill,Completed,"1,000.00",,1000.00,alice
+QAB4,2024-03-03 10:00:00,2024-03-03 10:00:00,Pay Bill,Completed,90.00,,1640.00,nobody
+QAB5,2024-03-04 10:00:00,2024-03-04 10:00:00,Pay Bill,Completed,abc,,1640.00,bob
+QAB6,2024-03-05 10:00:00,2024-03-05 10:00:00,Pay Bill,Failed,50.00,,1640.00,bob
+"""
+
+
+class MpesaImportTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice')
+        self.bob = User.objects.create_user(username='bob')
+
+    def test_valid_rows_are_imported_and_bad_rows_rejected(self):
+        rejects = RejectSample()
+
+        result = import_statement(STATEMENT.splitlines(), rejects=rejects, batch_size=2)
+
+        self.assertEqual((result.imported, result.duplicates, result.rejected), (3, 1, 3))
+        self.assertEqual(
+            sorted(r[-1] for r in rejects.rows),
+            ["invalid amount 'abc'", "transaction status is 'Failed'", "unknown account 'nobody'"],
+        )
+        saving = Savings.objects.get(mpesa_receipt='QAB1')
+        self.assertEqual((saving.user, saving.amount, saving.date_saved.day), (self.alice, Decimal('1000.00'), 1))
+        self.assertEqual(MemberBalance.objects.get(user=self.alice).savings_total, Decimal('1300.00'))
+        call_command('rebuild_balances', '--verify', stdout=StringIO())
+        call_command('rebuild_rollups', '--verify', stdout=StringIO())
+
+    def test_non_finite_amounts_are_rejected_not_fatal(self):
+        rejects = RejectSample()
+        lines = [
+            'Receipt No.,Completion Time,Transaction Status,Paid In,A/C No.',
+            'QN1,2024-03-01 09:00:00,Completed,NaN,alice',
+            'QN2,2024-03-01 09:00:00,Completed,sNaN,alice',
+            'QN3,2024-03-01 09:00:00,Completed,Infinity,alice',
+            'QN4,2024-03-01 09:00:00,Completed,-Inf,bob',
+            'QN5,2024-03-01 09:00:00,Completed,10.00,bob',
+        ]
+
+        result = import_statement(lines, rejects=rejects)
+
+        self.assertEqual((result.imported, result.rejected), (1, 4))
+        self.assertEqual(
+            [r[-1] for r in rejects.rows],
+            ["invalid amount 'NaN'", "invalid amount 'sNaN'", "invalid amount 'Infinity'", "invalid amount '-Inf'"],
+        )
+        self.assertEqual(Savings.objects.get().mpesa_receipt, 'QN5')
+
+    def test_rows_that_do_not_fit_the_columns_are_rejected(self):
+        rejects = RejectSample()
+        lines = [
+            'Receipt No.,Completion Time,Transaction Status,Paid In,A/C No.',
+            'QN1,2024-03-01 09:00:00,Completed,"123,456,789,012.00",alice',
+            'QN2,2024-03-01 09:00:00,Completed,10.005,alice',
+            'QN3ABCDEFGHIJKLMNOPQRSTUVWXYZ,2024-03-01 09:00:00,Completed,10.00,alice',
+            'QN4,2024-03-01 09:00:00,Completed,"99,999,999.99",bob',
+        ]
+
+        result = import_statement(lines, rejects=rejects)
+
+        self.assertEqual((result.imported, result.rejected), (1, 3))
+        self.assertEqual(
+            [r[-1] for r in rejects.rows],
+            [
+                "amount '123,456,789,012.00' is too large or too precise",
+                "amount '10.005' is too large or too precise",
+                "receipt number 'QN3ABCDEFGHIJKLMNOPQRSTUVWXYZ' is too long",
+            ],
+        )
+        self.assertEqual(MemberBalance.objects.get(user__username='bob').savings_total, Decimal('99999999.99'))
+
+    def test_reimport_is_idempotent(self):
+        import_statement(STATEMENT.splitlines(), stream='welfare')
+        result = import_statement(STATEMENT.splitlines(), stream='welfare')
+
+        self.assertEqual((result.imported, result.duplicates), (0, 4))
+        self.assertEqual(WelfareContribution.objects.count(), 3)
+        self.assertEqual(MemberBalance.objects.get(user=self.bob).welfare_total, Decimal('250.00'))
+
+    def test_command_writes_reject_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'statement.csv')
+            with open(path, 'w') as f:
+                f.write(STATEMENT)
+            out = StringIO()
+            call_command('import_mpesa', path, stdout=out)
+
+            self.assertIn('3 imported', out.getvalue())
+            with open(path + '.rejects.csv', newline='') as f:
+                self.assertEqual(len(list(csv.reader(f))), 3)
+
+    def test_staff_upload_is_queued_and_imported_by_a_worker(self):
+        self.client.force_login(User.objects.create_user(username='admin', is_staff=True))
+        upload = SimpleUploadedFile('statement.csv', STATEMENT.encode(), content_type='text/csv')
+
+        with tempfile.TemporaryDirectory() as tmp, override_settings(JOB_SPOOL_DIR=tmp):
+            response = self.client.post(reverse('admin_import_statement'), {'statement': upload, 'stream': 'savings'})
+
+            self.assertRedirects(response, reverse('admin_import_statement'))
+            self.assertFalse(Savings.objects.exists())
+            self.assertEqual(len(os.listdir(tmp)), 1)
+
+            self.assertEqual(jobs.work(once=True), 1)
+            self.assertEqual(os.listdir(tmp), [])
+
+        self.assertEqual(Savings.objects.count(), 3)
+        response = self.client.get(reverse('admin_import_statement'))
+        self.assertEqual(len(response.context['rejects']), 3)
+        self.assertContains(response, '3 imported')
+
+
+@jobs.task(name='tests.flaky', max_attempts=2)
+def flaky(fail):
+    if fail:
+        raise ValueError("boom")
+    return {'ok': True}
+
+
+class JobQueueTests(TestCase):
+    def test_claimed_jobs_are_not_claimed_twice(self):
+        first = jobs.enqueue(flaky, fail=False)
+        later = jobs.enqueue(flaky, run_at=timezone.now() + timedelta(hours=1), fail=False)
+
+        claimed = Job.objects.claim('worker-a', limit=5)
+
+        self.assertEqual([job.pk for job in claimed], [first.pk])
+        self.assertEqual((claimed[0].status, claimed[0].attempts), (Job.RUNNING, 1))
+        self.assertEqual(Job.objects.claim('worker-b', limit=5), [])
+        jobs.run(claimed[0])
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.result), (Job.DONE, {'ok': True}))
+        self.assertEqual(Job.objects.get(pk=later.pk).status, Job.QUEUED)
+
+    def test_failures_back_off_then_give_up(self):
+        job = jobs.enqueue(flaky, fail=True)
+
+        jobs.run(Job.objects.claim('worker')[0])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertGreaterEqual(job.run_at, timezone.now() + timedelta(seconds=jobs.RETRY_BASE - 1))
+        self.assertEqual(job.last_error, 'ValueError: boom')
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        jobs.run(Job.objects.claim('worker')[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_unique_key_enqueues_once(self):
+        for _ in range(2):
+            jobs.enqueue(flaky, unique_key='only-once', fail=False)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_stale_jobs_are_requeued(self):
+        job = jobs.enqueue(flaky, fail=False)
+        Job.objects.claim('crashed-worker')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - jobs.STALE_AFTER * 2)
+
+        self.assertEqual(jobs.work(once=True), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.DONE, 2))
+
+    def test_a_requeued_job_does_not_save_the_slow_workers_outcome(self):
+        job = jobs.enqueue(flaky, fail=False)
+        slow = Job.objects.claim('slow-worker')[0]
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - jobs.STALE_AFTER * 2)
+        self.assertEqual(jobs.requeue_stale(), (1, 0))
+        Job.objects.claim('other-worker')
+
+        with self.assertLogs('core.jobs', 'WARNING'):
+            jobs.run(slow)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by, job.attempts), (Job.RUNNING, 'other-worker', 2))
+
+    def test_stale_window_is_per_task(self):
+        job = jobs.enqueue(tasks.import_mpesa_statement, path='/nonexistent', stream='savings')
+        Job.objects.claim('worker')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - jobs.STALE_AFTER * 2)
+
+        self.assertEqual(jobs.requeue_stale(), (0, 0))
+        self.assertEqual(jobs.requeue_stale(timezone.now() + timedelta(hours=2)), (1, 0))
+
+    def test_approval_schedules_installment_reminders(self):
+        member = User.objects.create_user(username='member', email='member@example.com')
+        staff = User.objects.create_user(username='admin', is_staff=True)
+        Savings.objects.create(user=member, amount=Decimal('1000'))
+        loan = Loan.objects.create(user=member, amount=Decimal('900'), purpose='Stock', term_months=3)
+
+        Loan.objects.transition([loan.pk], 'APPROVED', staff)
+
+        reminders = Job.objects.filter(task=tasks.send_installment_reminder.task_name).order_by('run_at')
+        self.assertEqual(reminders.count(), 3)
+        first = loan.installments.get(number=1)
+        self.assertEqual(
+            timezone.localtime(reminders[0].run_at).date(),
+            first.due_date - timedelta(days=Installment.REMINDER_DAYS),
+        )
+
+        Job.objects.filter(pk=reminders[0].pk).update(run_at=timezone.now())
+        jobs.work(once=True)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn(first.due_date.strftime('%d %b %Y'), mail.outbox[0].subject)
+
+
+class NotificationTests(TestCase):
+    TODAY = date(2025, 3, 20)
+
+    def setUp(self):
+        self.saver = User.objects.create_user(username='saver', email='saver@example.com')
+        Savings.objects.create(user=self.saver, amount=100, date_saved=timezone.make_aware(datetime(2025, 3, 2)))
+        User.objects.create_user(username='staff', is_staff=True)
+        User.objects.create_user(username='gone', is_active=False)
+
+    def members(self, count, prefix='idle'):
+        return [
+            User.objects.create_user(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com') for i in range(count)
+        ]
+
+    def test_mid_month_warning_for_members_without_savings(self):
+        idle = self.members(2)
+        Savings.objects.create(user=idle[0], amount=100, date_saved=timezone.make_aware(datetime(2025, 2, 27)))
+
+        self.assertEqual(notifications.mid_month_warnings(date(2025, 3, 14)), [])
+        out = StringIO()
+        call_command('send_notifications', '--date', '2025-03-20', stdout=out)
+
+        self.assertIn('2 member(s) without savings', out.getvalue())
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['idle0@example.com', 'idle1@example.com'])
+        self.assertFalse(Notification.objects.unsent().exists())
+
+        # A second run the same month warns nobody again
+        call_command('send_notifications', '--date', '2025-03-21', stdout=StringIO())
+        self.assertEqual(Notification.objects.count(), 2)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_overdue_loans(self):
+        staff = User.objects.get(username='staff')
+        scheduled = Loan.objects.create(user=self.saver, amount=Decimal('300'), purpose='Stock', term_months=3)
+        Loan.objects.transition([scheduled.pk], 'APPROVED', staff)
+        first = scheduled.installments.get(number=1)
+        Installment.objects.filter(loan=scheduled).update(due_date=F('due_date') - timedelta(days=400))
+        legacy = Loan.objects.create(
+            user=self.saver, amount=Decimal('50'), purpose='Old', status='APPROVED',
+            due_date=timezone.make_aware(datetime(2025, 1, 1)),
+        )
+        Loan.objects.create(user=self.saver, amount=Decimal('50'), purpose='Pending', due_date=legacy.due_date)
+
+        found = {n.loan_id: n for n in notifications.overdue_loans(timezone.localdate())}
+
+        self.assertEqual(set(found), {scheduled.pk, legacy.pk})
+        self.assertEqual(found[scheduled.pk].key, f'loan-{scheduled.pk}:{first.due_date - timedelta(days=400):%Y-%m-%d}')
+        self.assertIn('KES 50.00', found[legacy.pk].message)
+
+        Installment.objects.record_payment(scheduled, Decimal('1000'))
+        self.assertEqual([n.loan_id for n in notifications.overdue_loans(timezone.localdate())], [legacy.pk])
+
+    def test_query_count_does_not_grow_with_membership(self):
+        def queries():
+            Notification.objects.all().delete()
+            with CaptureQueriesContext(connection) as ctx:
+                notifications.create(self.TODAY)
+                notifications.send(chunk_size=1000)
+            return len(ctx.captured_queries)
+
+        self.members(2)
+        small = queries()
+        self.members(30, prefix='more')
+        self.assertEqual(queries(), small)
+
+
+class ServiceQueryTests(TestCase):
+    """Each service call runs a fixed number of queries, however big the SACCO is."""
+
+    EXPECTED = {
+        'savings.dashboard': 3,
+        'savings.balance': 1,
+        'savings.atotal': 1,
+        'savings.member_chart': 2,
+        'savings.member_chart_version': 1,
+        'savings.monthly_chart': 1,
+        'savings.member_progress': 2,
+        'savings.per_member_totals': 1,
+        'targets.for_month': 1,
+        'targets.history': 1,
+        'loans.limit': 1,
+        'loans.for_member': 1,
+        'loans.for_admin': 1,
+        'loans.summary': 1,
+        'welfare.member_total': 1,
+        'welfare.member_history': 1,
+        'welfare.filtered': 1,
+        'welfare.atotal': 1,
+        'welfare.monthly_chart': 1,
+        'welfare.monthly_chart_version': 1,
+    }
+
+    def setUp(self):
+        self.staff = User.objects.create_user(username='admin', is_staff=True)
+        self.member = self.add_members(1)[0]
+
+    def add_members(self, count):
+        start = User.objects.count()
+        members = [User.objects.create_user(username=f'member{start + i}') for i in range(count)]
+        for member in members:
+            for month in (1, 2, 3):
+                when = timezone.make_aware(datetime(2025, month, 10))
+                Savings.objects.create(user=member, amount=Decimal('1000'), date_saved=when)
+                WelfareContribution.objects.create(user=member, amount=Decimal('100'), date_contributed=when)
+                SavingsTarget.objects.create(user=member, year=2025, month=month, amount=Decimal('800'))
+            loan = Loan.objects.create(user=member, amount=Decimal('600'), purpose='Stock', term_months=3)
+            Loan.objects.create(user=member, amount=Decimal('100'), purpose='Rent')
+            services.loans.transition([loan.pk], 'APPROVED', self.staff)
+        return members
+
+    def calls(self):
+        member = self.member
+        now = timezone.make_aware(datetime(2025, 3, 20))
+        return {
+            'savings.dashboard': lambda: async_to_sync(services.savings.dashboard)(member, now),
+            'savings.balance': lambda: services.savings.balance(member),
+            'savings.atotal': lambda: async_to_sync(services.savings.atotal)(services.savings.filtered({})),
+            'savings.member_chart': lambda: services.savings.member_chart(member),
+            'savings.member_chart_version': lambda: services.savings.member_chart_version(member),
+            'savings.monthly_chart': services.savings.monthly_chart,
+            'savings.member_progress': lambda: services.savings.member_progress(2025, 3, 1),
+            'savings.per_member_totals': lambda: list(services.savings.per_member_totals()),
+            'targets.for_month': lambda: services.targets.for_month(member, 2025, 3),
+            'targets.history': lambda: list(services.targets.history(member)),
+            'loans.limit': lambda: services.loans.limit(member),
+            'loans.for_member': lambda: list(services.loans.for_member(member, 'APPROVED')),
+            'loans.for_admin': lambda: [loan.user.username for loan in services.loans.for_admin('APPROVED')],
+            'loans.summary': async_to_sync(services.loans.summary),
+            'welfare.member_total': lambda: services.welfare.member_total(member),
+            'welfare.member_history': lambda: list(services.welfare.member_history(member)),
+            'welfare.filtered': lambda: [c.user.username for c in services.welfare.filtered({})],
+            'welfare.atotal': lambda: async_to_sync(services.welfare.atotal)(services.welfare.filtered({})),
+            'welfare.monthly_chart': services.welfare.monthly_chart,
+            'welfare.monthly_chart_version': services.welfare.monthly_chart_version,
+        }
+
+    def test_query_counts(self):
+        for name, call in self.calls().items():
+            with self.subTest(name), self.assertNumQueries(self.EXPECTED[name]):
+                call()
+
+    def test_query_counts_do_not_grow_with_membership(self):
+        self.add_members(15)
+        self.test_query_counts()
+
+    def test_results(self):
+        context = async_to_sync(services.savings.dashboard)(self.member, timezone.make_aware(datetime(2025, 3, 20)))
+        self.assertEqual((context['total_savings'], context['progress']), (Decimal('1000'), 125.0))
+        self.assertFalse(context['mid_month_warning'])
+
+        summary = async_to_sync(services.loans.summary)()
+        by_status = {row['status']: (row['count'], row['total']) for row in summary['by_status']}
+        self.assertEqual(by_status, {'APPROVED': (1, Decimal('600')), 'PENDING': (1, Decimal('100'))})
+        self.assertEqual(summary['outstanding_principal'], Decimal('600'))
+        self.assertEqual(services.loans.limit(self.member), Decimal('8300'))
+        self.assertEqual(services.welfare.monthly_chart(), (['Jan 2025', 'Feb 2025', 'Mar 2025'], [100.0] * 3))
+        self.assertEqual(services.savings.member_chart(self.member)['targets'], [800.0] * 3)
+
+
+class ChartEndpointTests(TestCase):
+    def setUp(self):
+        self.member = User.objects.create_user(username='member')
+        self.staff = User.objects.create_user(username='staff', is_staff=True)
+        Savings.objects.create(user=self.member, amount=Decimal('250'), date_saved=timezone.make_aware(datetime(2025, 1, 10)))
+        self.client.force_login(self.member)
+
+    def test_member_chart(self):
+        response = self.client.get(reverse('dashboard_chart'))
+
+        self.assertEqual(response.json(), {'labels': ['Jan 2025'], 'savings': [250.0], 'targets': [0.0]})
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+        self.assertTrue(response.has_header('Last-Modified'))
+
+    def test_unchanged_chart_is_revalidated_without_rebuilding_it(self):
+        etag = self.client.get(reverse('dashboard_chart'))['ETag']
+
+        with self.assertNumQueries(3):  # session, user and the version stamp
+            response = self.client.get(reverse('dashboard_chart'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_savings_and_targets_change_the_etag(self):
+        seen = {self.client.get(reverse('dashboard_chart'))['ETag']}
+
+        Savings.objects.create(user=self.member, amount=Decimal('100'))
+        seen.add(self.client.get(reverse('dashboard_chart'), HTTP_IF_NONE_MATCH=seen.copy().pop())['ETag'])
+        SavingsTarget.objects.create(user=self.member, year=2025, month=1, amount=Decimal('500'))
+        response = self.client.get(reverse('dashboard_chart'), HTTP_IF_NONE_MATCH=', '.join(seen))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['targets'][0], 500.0)
+        self.assertNotIn(response['ETag'], seen)
+        self.assertEqual(len(seen), 2)
+
+    def test_other_members_writes_leave_the_etag_alone(self):
+        etag = self.client.get(reverse('dashboard_chart'))['ETag']
+        Savings.objects.create(user=self.staff, amount=Decimal('100'))
+        self.assertEqual(self.client.get(reverse('dashboard_chart'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_admin_charts_follow_the_sacco_wide_series(self):
+        self.client.force_login(self.staff)
+        feb = timezone.make_aware(datetime(2025, 2, 1))
+        WelfareContribution.objects.create(user=self.member, amount=Decimal('50'), date_contributed=feb)
+        etag = self.client.get(reverse('admin_welfare_chart'))['ETag']
+        self.assertEqual(self.client.get(reverse('admin_welfare_chart'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        WelfareContribution.objects.create(user=self.staff, amount=Decimal('20'), date_contributed=feb)
+        response = self.client.get(reverse('admin_welfare_chart'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json(), {'labels': ['Feb 2025'], 'values': [70.0]})
+
+        self.assertEqual(self.client.get(reverse('admin_savings_chart')).json()['values'], [250.0])
+
+    def test_admin_charts_are_staff_only(self):
+        self.assertEqual(self.client.get(reverse('admin_savings_chart')).status_code, 302)
+
+    def test_rebuilding_rollups_invalidates_every_chart(self):
+        etag = self.client.get(reverse('dashboard_chart'))['ETag']
+        call_command('rebuild_rollups', stdout=StringIO())
+        self.assertEqual(self.client.get(reverse('dashboard_chart'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class AdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='root', is_staff=True, is_superuser=True)
+        self.alice = User.objects.create_user(username='alice', first_name='Alice', last_name='Wanjiru')
+        self.client.force_login(self.admin)
+
+    def add_loans(self, count):
+        start = User.objects.count()
+        for i in range(count):
+            member = User.objects.create_user(username=f'member{start + i}')
+            Loan.objects.create(user=member, amount=Decimal('100'), purpose='Stock')
+            Savings.objects.create(user=member, amount=Decimal('50'))
+
+    def test_changelists_run_the_same_queries_for_any_number_of_rows(self):
+        for name in ('core_loan_changelist', 'core_savings_changelist'):
+            with self.subTest(name):
+                self.add_loans(2)
+                with CaptureQueriesContext(connection) as few:
+                    self.assertEqual(self.client.get(reverse(f'admin:{name}')).status_code, 200)
+                self.add_loans(20)
+                with CaptureQueriesContext(connection) as many:
+                    self.client.get(reverse(f'admin:{name}'))
+                self.assertEqual(len(many), len(few))
+
+    def test_change_form_does_not_list_every_member(self):
+        self.add_loans(5)
+        loan = Loan.objects.create(user=self.alice, amount=Decimal('300'), purpose='Fees')
+
+        body = self.client.get(reverse('admin:core_loan_change', args=[loan.pk])).content.decode()
+
+        self.assertIn('admin-autocomplete', body)
+        self.assertNotIn('member3', body)
+
+    def test_search_matches_names_through_the_member_index(self):
+        self.add_loans(3)
+        Loan.objects.create(user=self.alice, amount=Decimal('300'), purpose='Fees')
+
+        response = self.client.get(reverse('admin:core_loan_changelist'), {'q': 'wanjiru'})
+
+        self.assertEqual([loan.user for loan in response.context['cl'].result_list], [self.alice])
+
+    def test_date_drill_down_lists_years_without_scanning_the_table(self):
+        for year in (2022, 2024):
+            Savings.objects.create(user=self.alice, amount=Decimal('10'), date_saved=timezone.make_aware(datetime(year, 5, 1)))
+
+        with CaptureQueriesContext(connection) as queries:
+            body = self.client.get(reverse('admin:core_savings_changelist')).content.decode()
+
+        self.assertFalse([q['sql'] for q in queries if 'DISTINCT' in q['sql']])
+        for year in (2022, 2023, 2024):
+            self.assertIn(f'?date_saved__year={year}', body)
+        drill_down = self.client.get(reverse('admin:core_savings_changelist'), {'date_saved__year': '2024'})
+        self.assertIn('date_saved__month=5', drill_down.content.decode())
+
+    def test_bulk_actions_move_only_pending_loans(self):
+        pending = Loan.objects.create(user=self.alice, amount=Decimal('300'), purpose='Fees', term_months=3)
+        rejected = Loan.objects.create(user=self.alice, amount=Decimal('200'), purpose='Rent', status='REJECTED')
+
+        response = self.client.post(reverse('admin:core_loan_changelist'), {
+            'action': 'approve_loans', '_selected_action': [pending.pk, rejected.pk],
+        }, follow=True)
+
+        pending.refresh_from_db()
+        rejected.refresh_from_db()
+        self.assertEqual((pending.status, pending.approved_by), ('APPROVED', self.admin))
+        self.assertEqual(rejected.status, 'REJECTED')
+        self.assertEqual(pending.installments.count(), 3)
+        self.assertEqual(LoanStatusSummary.objects.get(status='APPROVED').count, 1)
+        self.assertEqual(
+            [str(message) for message in response.context['messages']],
+            ['1 loan(s) approved.', '1 loan(s) were not pending and were skipped.'],
+        )
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='admin', is_staff=True)
+        self.alice = User.objects.create_user(username='alice')
+        self.bob = User.objects.create_user(username='bob')
+        self.client.force_login(self.staff)
+
+    def read(self, response):
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        return list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+
+    def test_savings_export_applies_admin_filters(self):
+        Savings.objects.create(user=self.alice, amount=100, date_saved=timezone.make_aware(datetime(2024, 1, 5)))
+        Savings.objects.create(user=self.alice, amount=200, date_saved=timezone.make_aware(datetime(2024, 2, 5)))
+        Savings.objects.create(user=self.bob, amount=300, date_saved=timezone.make_aware(datetime(2024, 1, 6)))
+
+        rows = self.read(self.client.get(
+            reverse('export_savings') + '?user=ali&start_date=2024-01-01&end_date=2024-01-31'
+        ))
+
+        self.assertEqual(rows[0][0], 'Username')
+        self.assertEqual(rows[1:], [['alice', '100.00', '2024-01-05 00:00:00', '', '']])
+
+    def test_loans_export_filters_by_status(self):
+        Loan.objects.create(user=self.alice, amount=100, purpose='Fees')
+        Loan.objects.create(user=self.bob, amount=200, purpose='Stock', status='APPROVED', approved_by=self.staff)
+
+        rows = self.read(self.client.get(reverse('export_loans') + '?status=APPROVED'))
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual([rows[1][0], rows[1][3], rows[1][6]], ['bob', 'APPROVED', 'admin'])
+
+    def test_text_that_looks_like_a_formula_is_quoted(self):
+        for purpose in ('=HYPERLINK("http://x","y")', '+1', '-2+3', '@SUM(A1)', 'School fees'):
+            Loan.objects.create(user=self.alice, amount=100, purpose=purpose)
+
+        rows = self.read(self.client.get(reverse('export_loans')))
+
+        self.assertEqual(
+            sorted(row[2] for row in rows[1:]),
+            sorted(["'=HYPERLINK(\"http://x\",\"y\")", "'+1", "'-2+3", "'@SUM(A1)", 'School fees']),
+        )
+        self.assertEqual({row[1] for row in rows[1:]}, {'100.00'})
+
+    def test_welfare_export_runs_one_query_for_all_rows(self):
+        WelfareContribution.objects.bulk_create(WelfareContribution(user=self.alice, amount=10) for _ in range(50))
+
+        response = self.client.get(reverse('export_welfare'))
+        with self.assertNumQueries(1):
+            rows = self.read(response)
+
+        self.assertEqual(len(rows), 51)
+
+    def test_exports_require_staff(self):
+        self.client.force_login(self.alice)
+        for name in ('export_savings', 'export_loans', 'export_welfare'):
+            with self.subTest(name=name):
+                self.assertEqual(self.client.get(reverse(name)).status_code, 302)
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'dashboard': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'dashboard-tests'},
+})
+class DashboardCacheTests(TestCase):
+    def setUp(self):
+        caches['dashboard'].clear()
+        self.user = User.objects.create_user(username='member')
+        self.client.force_login(self.user)
+
+    def get(self):
+        return self.client.get(reverse('dashboard'))
+
+    def test_second_load_is_served_from_cache(self):
+        Savings.objects.create(user=self.user, amount=100)
+        hits = caching.stats['hits']
+
+        self.get()
+        with self.assertNumQueries(3):  # session, user and the data version
+            response = self.get()
+
+        self.assertEqual(caching.stats['hits'], hits + 1)
+        self.assertEqual(response.context['total_savings'], Decimal('100'))
+
+    def test_writes_invalidate_the_cached_dashboard(self):
+        self.get()
+        Savings.objects.create(user=self.user, amount=100)
+        self.assertEqual(self.get().context['total_savings'], Decimal('100'))
+
+        now = timezone.localtime()
+        SavingsTarget.objects.create(user=self.user, year=now.year, month=now.month, amount=400)
+        self.assertEqual(self.get().context['progress'], 25.0)
+
+    def test_a_build_overtaken_by_a_write_is_not_served_afterwards(self):
+        now = timezone.localtime()
+
+        async def build_then_save():
+            # The figures were read before another request's savings committed
+            await Savings.objects.acreate(user=self.user, amount=100)
+            return {'total_savings': Decimal('0'), 'target_savings': 0, 'progress': 0, 'remaining': 0}
+
+        async_to_sync(caching.aget_dashboard_context)(self.user.pk, now.year, now.month, build_then_save)
+
+        self.assertEqual(self.get().context['total_savings'], Decimal('100'))
+
+    def test_import_invalidates_imported_members(self):
+        self.get()
+        now = timezone.localtime().strftime('%Y-%m-%d %H:%M:%S')
+        import_statement([
+            'Receipt No.,Completion Time,Transaction Status,Paid In,A/C No.',
+            f'QX1,{now},Completed,75.00,member',
+        ])
+        self.assertEqual(self.get().context['total_savings'], Decimal('75'))
+
+    def test_entries_are_per_member(self):
+        other = User.objects.create_user(username='other')
+        Savings.objects.create(user=other, amount=500)
+        self.get()
+
+        self.client.force_login(other)
+        self.assertEqual(self.get().context['total_savings'], Decimal('500'))
+
+
+class AmortizationTests(TestCase):
+    def test_reducing_balance_schedule(self):
+        schedule = build_schedule(Decimal('12000'), Decimal('12'), 12, REDUCING, date(2024, 1, 31))
+
+        self.assertEqual(len(schedule), 12)
+        self.assertEqual(sum(p for _, _, p, _ in schedule), Decimal('12000'))
+        # Equal payments of 1066.19 apart from the final rounding adjustment.
+        payments = {p + i for _, _, p, i in schedule[:-1]}
+        self.assertEqual(payments, {Decimal('1066.19')})
+        self.assertEqual(schedule[0][3], Decimal('120.00'))
+        self.assertEqual([d for _, d, _, _ in schedule[:2]], [date(2024, 2, 29), date(2024, 3, 31)])
+
+    def test_flat_rate_schedule(self):
+        schedule = build_schedule(Decimal('1000'), Decimal('12'), 3, FLAT, date(2024, 1, 1))
+
+        self.assertEqual([p for _, _, p, _ in schedule], [Decimal('333.33'), Decimal('333.33'), Decimal('333.34')])
+        self.assertEqual({i for _, _, _, i in schedule}, {Decimal('10.00')})
+
+    def test_loans_smaller_than_the_term_never_go_negative(self):
+        for method in (FLAT, REDUCING):
+            schedule = build_schedule(Decimal('0.13'), 0, 24, method, date(2024, 1, 1))
+            parts = [p for _, _, p, _ in schedule]
+            self.assertEqual(sum(parts), Decimal('0.13'), method)
+            self.assertGreaterEqual(min(parts), 0, method)
+
+        schedule = build_schedule(Decimal('0.13'), 0, 24, FLAT, date(2024, 1, 1))
+        self.assertEqual([p for _, _, p, _ in schedule], [Decimal('0.00')] * 11 + [Decimal('0.01')] * 13)
+
+    def test_zero_rate_and_bad_terms(self):
+        schedule = build_schedule(Decimal('100'), 0, 4, REDUCING, date(2024, 1, 1))
+        self.assertEqual(sum(p for _, _, p, _ in schedule), Decimal('100'))
+        self.assertEqual({i for _, _, _, i in schedule}, {Decimal('0')})
+        with self.assertRaises(ValueError):
+            build_schedule(Decimal('100'), 12, 0)
+
+
+class LoanRepaymentTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='admin', is_staff=True)
+        self.member = User.objects.create_user(username='member')
+        Savings.objects.create(user=self.member, amount=Decimal('1000'))
+        self.loan = Loan.objects.create(user=self.member, amount=Decimal('1200'), purpose='Stock', term_months=3)
+        self.client.force_login(self.staff)
+
+    def test_approval_writes_schedule(self):
+        self.client.post(reverse('approve_loan', args=[self.loan.id]))
+
+        installments = list(self.loan.installments.order_by('number'))
+        self.assertEqual(len(installments), 3)
+        self.assertEqual(sum(i.principal for i in installments), Decimal('1200'))
+        self.loan.refresh_from_db()
+        self.assertEqual(self.loan.due_date.date(), installments[-1].due_date)
+
+        # Approving again must not duplicate the schedule.
+        self.client.post(reverse('approve_loan', args=[self.loan.id]))
+        self.assertEqual(self.loan.installments.count(), 3)
+
+    def test_repayments_reduce_exposure_and_outstanding_principal(self):
+        self.client.post(reverse('approve_loan', args=[self.loan.id]))
+        first = self.loan.installments.get(number=1)
+
+        self.client.post(reverse('record_repayment', args=[self.loan.id]), {'amount': str(first.amount_due)})
+
+        first.refresh_from_db()
+        self.assertIsNotNone(first.paid_at)
+        outstanding = Decimal('1200') - first.principal
+        self.assertEqual(Installment.objects.outstanding_principal(), outstanding)
+        self.assertEqual(Installment.objects.outstanding_principal(user=self.member), outstanding)
+        self.assertEqual(MemberBalance.objects.get(user=self.member).loan_exposure, outstanding)
+        call_command('rebuild_balances', '--verify', stdout=StringIO())
+
+    def test_invalid_repayments_are_refused(self):
+        self.client.post(reverse('approve_loan', args=[self.loan.id]))
+        url = reverse('record_repayment', args=[self.loan.id])
+
+        for data in ({}, {'amount': ''}, {'amount': 'abc'}, {'amount': '0'}, {'amount': '-50'}, {'amount': 'NaN'}, {'amount': 'Infinity'}):
+            with self.subTest(data=data):
+                response = self.client.post(url, data, follow=True)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, "greater than zero")
+        self.assertFalse(self.loan.installments.filter(paid_at__isnull=False).exists())
+
+    def test_repayment_needs_an_approved_loan(self):
+        # Still pending
+        response = self.client.post(reverse('record_repayment', args=[self.loan.id]), {'amount': '100'})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(reverse('record_repayment', args=[self.loan.id + 100]), {'amount': '100'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_overpayment_is_reported_back(self):
+        self.client.post(reverse('approve_loan', args=[self.loan.id]))
+        leftover = Installment.objects.record_payment(self.loan, Decimal('5000'))
+
+        self.assertFalse(self.loan.installments.filter(paid_at__isnull=True).exists())
+        self.assertGreater(leftover, 0)
+        self.assertEqual(Installment.objects.outstanding_principal(), 0)
+
+    def test_limit_counts_existing_exposure(self):
+        self.client.force_login(self.member)
+
+        response = self.client.get(reverse('apply_loan'))
+        self.assertEqual(response.context['loan_limit'], Decimal('1800'))
+
+        self.client.post(reverse('apply_loan'), {'amount': '1900', 'purpose': 'More', 'term_months': '6'})
+        self.assertEqual(Loan.objects.filter(user=self.member).count(), 1)
+
+        self.client.post(reverse('apply_loan'), {'amount': '1800', 'purpose': 'More', 'term_months': '6'})
+        self.assertEqual(Loan.objects.get(purpose='More').term_months, 6)
+
+    def test_first_application_of_a_new_member_stays_within_budget(self):
+        member = User.objects.create_user(username='newcomer')
+        Savings.objects.create(user=member, amount=Decimal('1000'))
+        self.client.force_login(member)
+
+        response = self.client.post(reverse('apply_loan'), {'amount': '500', 'purpose': 'First', 'term_months': '3'})
+
+        self.assertRedirects(response, reverse('user_loans'))
+        self.assertTrue(Loan.objects.filter(user=member, purpose='First').exists())
+
+    def test_applications_must_be_for_a_positive_amount(self):
+        self.client.force_login(self.member)
+
+        for amount in ('-100000', '0', 'abc', '', 'NaN'):
+            with self.subTest(amount=amount):
+                response = self.client.post(
+                    reverse('apply_loan'), {'amount': amount, 'purpose': 'Bad', 'term_months': '1'}, follow=True,
+                )
+                self.assertContains(response, "greater than zero")
+        self.assertFalse(Loan.objects.filter(purpose='Bad').exists())
+        self.assertEqual(MemberBalance.objects.get(user=self.member).available_limit, Decimal('1800'))
+
+        with self.assertRaises(ValueError):
+            Loan.objects.apply(self.member, Decimal('-1'), 'Bad')
+
+
+class BatchLoanTransitionTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='admin', is_staff=True)
+        self.member = User.objects.create_user(username='member')
+        self.loans = [
+            Loan.objects.create(user=self.member, amount=Decimal('100'), purpose=f'Loan {i}') for i in range(5)
+        ]
+        self.client.force_login(self.staff)
+
+    def post(self, action, ids):
+        response = self.client.post(
+            reverse('batch_loan_action'),
+            {'action': action, 'loan_ids': [str(pk) for pk in ids]},
+            HTTP_ACCEPT='application/json',
+        )
+        return response.json()['results']
+
+    def test_batch_approval_reports_per_id_results(self):
+        Loan.objects.filter(pk=self.loans[0].pk).update(status='REJECTED')
+        ids = [loan.pk for loan in self.loans] + [999999]
+
+        results = self.post('approve', ids)
+
+        self.assertEqual(results[str(self.loans[0].pk)], 'NOT_PENDING')
+        self.assertEqual(results['999999'], 'NOT_FOUND')
+        self.assertEqual([results[str(loan.pk)] for loan in self.loans[1:]], ['APPROVED'] * 4)
+        approved = Loan.objects.filter(status='APPROVED')
+        self.assertEqual(set(approved.values_list('approved_by', flat=True)), {self.staff.pk})
+        self.assertEqual(Installment.objects.filter(loan__in=approved).count(), 4)
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        def queries(ids):
+            with CaptureQueriesContext(connection) as ctx:
+                Loan.objects.transition(ids, 'REJECTED', self.staff)
+            return len(ctx.captured_queries)
+
+        small = queries([self.loans[0].pk])
+        self.assertEqual(queries([loan.pk for loan in self.loans[1:]]), small)
+
+    def test_second_transition_is_a_no_op(self):
+        self.assertEqual(self.post('reject', [self.loans[0].pk]), {str(self.loans[0].pk): 'REJECTED'})
+        self.assertEqual(self.post('approve', [self.loans[0].pk]), {str(self.loans[0].pk): 'NOT_PENDING'})
+        self.assertFalse(Installment.objects.exists())
+        self.assertEqual(MemberBalance.objects.get(user=self.member).loan_exposure, Decimal('400'))
+        call_command('rebuild_balances', '--verify', stdout=StringIO())
+
+    def test_single_approve_view_uses_the_same_guard(self):
+        self.client.post(reverse('reject_loan', args=[self.loans[0].pk]))
+        self.client.post(reverse('approve_loan', args=[self.loans[0].pk]))
+        self.assertEqual(Loan.objects.get(pk=self.loans[0].pk).status, 'REJECTED')
+
+    def test_management_command(self):
+        out = StringIO()
+        call_command('process_loans', 'approve', *[str(loan.pk) for loan in self.loans[:2]], '--by', 'admin', stdout=out)
+
+        self.assertIn('2 of 2 loan(s) approved', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('process_loans', 'approve', '1', '--by', 'member', stdout=StringIO())
+
+
+class LoanStatusSummaryTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='admin', is_staff=True)
+        self.member = User.objects.create_user(username='member')
+        Savings.objects.create(user=self.member, amount=Decimal('10000'))
+
+    def verify(self):
+        call_command('rebuild_loan_summary', '--verify', stdout=StringIO())
+
+    def cards(self):
+        return {row['status']: (row['count'], row['total']) for row in LoanStatusSummary.objects.cards()}
+
+    def test_counters_follow_every_loan_write(self):
+        loans = [Loan.objects.apply(self.member, Decimal(amount), 'Stock', 3) for amount in ('300', '600', '900')]
+        self.verify()
+        self.assertEqual(self.cards(), {'PENDING': (3, Decimal('1800'))})
+
+        Loan.objects.transition([loans[0].pk, loans[1].pk], 'APPROVED', self.staff)
+        Loan.objects.transition([loans[2].pk], 'REJECTED', self.staff)
+        Installment.objects.record_payment(loans[0], Decimal('150'))
+        self.verify()
+        self.assertEqual(list(self.cards()), ['APPROVED', 'REJECTED'])
+
+        loans[2].amount = Decimal('950')
+        loans[2].status = 'PENDING'
+        loans[2].save()
+        loans[1].status = 'REJECTED'
+        loans[1].save()
+        self.verify()
+
+        loans[0].delete()
+        self.verify()
+        User.objects.get(pk=self.member.pk).delete()
+        self.verify()
+        self.assertEqual(self.cards(), {})
+
+    def test_admin_dashboard_reads_the_counters(self):
+        loan = Loan.objects.apply(self.member, Decimal('1200'), 'Stock', 3)
+        Loan.objects.apply(self.member, Decimal('100'), 'Rent', 1)
+        Loan.objects.transition([loan.pk], 'APPROVED', self.staff)
+        Installment.objects.record_payment(loan, Decimal('500'))
+        self.client.force_login(self.staff)
+
+        response = self.client.get(reverse('admin_dashboard'))
+
+        self.assertEqual(response.context['outstanding_principal'], Installment.objects.outstanding_principal())
+        self.assertEqual([row['status'] for row in response.context['loan_counts']], ['PENDING', 'APPROVED'])
+
+    def test_verify_reports_drift_and_rebuild_repairs_it(self):
+        Loan.objects.apply(self.member, Decimal('300'), 'Stock', 3)
+        LoanStatusSummary.objects.filter(status='PENDING').update(count=7)
+
+        with self.assertRaises(CommandError):
+            self.verify()
+        out = StringIO()
+        call_command('rebuild_loan_summary', stdout=out)
+        self.assertIn('Rebuilt 1', out.getvalue())
+        self.verify()
+
+
+class ConcurrentLoanApplicationTests(TransactionTestCase):
+    def test_parallel_applications_never_exceed_limit(self):
+        out = StringIO()
+        call_command(
+            'stress_loan_applications', '--threads', '8', '--applications', '40',
+            '--savings', '100', '--amount', '70', stdout=out,
+        )
+
+        # 3 x 100 allows four 70 KES loans and no more. Without the lock,
+        # SQLite fails lock upgrades with "database is locked" instead.
+        self.assertIn('4 accepted, 36 rejected, 0 errors', out.getvalue())
+        self.assertEqual(Loan.objects.count(), 4)
+        call_command('rebuild_balances', '--verify', stdout=StringIO())
+
+
+class SqliteTuningTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_new_connections_get_configured_pragmas(self):
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma('busy_timeout'), settings.SQLITE_PRAGMAS['busy_timeout'])
+
+
+class DatabaseLoadTestCommandTests(TransactionTestCase):
+    def test_compares_stock_and_tuned_journal_modes(self):
+        out = StringIO()
+        call_command(
+            'load_test_database', '--readers', '3', '--writers', '1', '--seconds', '0.5', stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn('stock (delete)', output)
+        self.assertIn('tuned (wal)', output)
+        self.assertIn('Tuned vs stock', output)
+        self.assertFalse(User.objects.filter(username='load-test-member').exists())
+        self.assertFalse(Savings.objects.exists())
+
+
+class BenchmarkServersCommandTests(LiveServerTestCase):
+    def test_reports_latency_for_every_async_page(self):
+        out = StringIO()
+        call_command(
+            'benchmark_servers', '--target', f'live={self.live_server_url}',
+            '--requests', '4', '--concurrency', '2', stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn('live p50/p99 ms', output)
+        for url_name in ('dashboard', 'user_loans', 'target_history', 'admin_dashboard', 'admin_savings', 'admin_welfare'):
+            self.assertIn(url_name, output)
+
+    def test_rejects_malformed_targets(self):
+        with self.assertRaises(CommandError):
+            call_command('benchmark_servers', '--target', self.live_server_url, stdout=StringIO())
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        metrics.reset()
+        self.member = User.objects.create_user(username='member')
+        self.staff = User.objects.create_user(username='staff', is_staff=True)
+
+    def test_server_timing_reports_queries_and_render_time(self):
+        self.client.force_login(self.member)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('dashboard'))
+
+        timing = response['Server-Timing']
+        self.assertIn(f'desc="{len(queries)} queries"', timing)
+        self.assertRegex(timing, r'render;dur=\d+\.\d, total;dur=\d+\.\d')
+
+    def test_metrics_endpoint_exposes_per_view_summaries_to_staff(self):
+        self.client.force_login(self.member)
+        self.client.get(reverse('dashboard'))
+        self.client.get(reverse('user_loans'))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 302)
+
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('metrics'))
+
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        body = response.content.decode()
+        self.assertIn('# TYPE sacco_request_queries summary', body)
+        self.assertIn('sacco_request_duration_seconds{view="dashboard",quantile="0.99"}', body)
+        self.assertIn('sacco_request_db_seconds_count{view="user_loans"} 1', body)
+        self.assertIn('sacco_request_render_seconds_count{view="metrics"} 1', body)
+
+    @override_settings(QUERY_BUDGETS={'dashboard': 2})
+    def test_exceeding_a_query_budget_fails_under_tests(self):
+        self.client.force_login(self.member)
+        with self.assertRaisesMessage(metrics.QueryBudgetExceeded, 'over its budget of 2'):
+            self.client.get(reverse('dashboard'))
+
+    @override_settings(QUERY_BUDGETS={'dashboard': 2}, QUERY_BUDGET_STRICT=False)
+    def test_exceeding_a_query_budget_warns_in_production(self):
+        self.client.force_login(self.member)
+        with self.assertLogs('core.metrics', 'WARNING') as logs:
+            response = self.client.get(reverse('dashboard'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('dashboard ran', logs.output[0])
+
+
+class StaticAssetTests(TestCase):
+    def setUp(self):
+        self.member = User.objects.create_user(username='member')
+        self.client.force_login(self.member)
+
+    def test_chart_pages_load_chart_js_once_and_other_pages_not_at_all(self):
+        dashboard = self.client.get(reverse('dashboard')).content.decode()
+        self.assertEqual(dashboard.count('chart.js'), 1)
+        self.assertEqual(dashboard.count('bootstrap-icons.css'), 1)
+
+        loans = self.client.get(reverse('user_loans')).content.decode()
+        self.assertNotIn('chart.js', loans)
+
+    def test_asset_tag_renders_each_asset_once(self):
+        html = Template(
+            "{% load assets %}{% asset 'chart.js' %}{% asset 'bootstrap.css' %}{% asset 'chart.js' %}"
+        ).render(Context())
+        self.assertEqual(html.count('<script'), 1)
+        self.assertEqual(html.count('<link rel="stylesheet"'), 1)
+
+    def test_assets_fall_back_to_the_pinned_cdn_until_vendored(self):
+        with mock.patch.object(assets, 'is_vendored', return_value=False):
+            self.assertEqual(assets.asset_url('chart.js'), 'https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.js')
+        with mock.patch.object(assets, 'is_vendored', return_value=True):
+            self.assertEqual(assets.asset_url('chart.js'), '/static/core/vendor/chart.js-4.4.0/chart.umd.js')
+
+    def test_vendored_pages_reference_no_external_hosts(self):
+        for path in assets.VENDOR_FILES:
+            self.assertIsNotNone(finders.find(path), path)
+
+        html = self.client.get(reverse('dashboard')).content.decode()
+
+        self.assertIn('/static/core/vendor/bootstrap-5.3.3/bootstrap.min.css', html)
+        self.assertEqual(re.findall(r'(?:src|href)="((?:https?:)?//[^"]*)"', html), [])
+
+    def test_collected_files_are_fingerprinted_precompressed_and_cached_forever(self):
+        with tempfile.TemporaryDirectory() as root, override_settings(STATIC_ROOT=root, STORAGES={
+            **settings.STORAGES,
+            'staticfiles': {'BACKEND': 'core.storage.PrecompressedManifestStaticFilesStorage'},
+        }):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            font = staticfiles_storage.stored_name('core/vendor/bootstrap-icons-1.11.3/fonts/bootstrap-icons.woff2')
+            self.assertNotEqual(font, 'core/vendor/bootstrap-icons-1.11.3/fonts/bootstrap-icons.woff2')
+            with staticfiles_storage.open(
+                staticfiles_storage.stored_name('core/vendor/bootstrap-icons-1.11.3/bootstrap-icons.css')
+            ) as icons:
+                self.assertIn(os.path.basename(font), icons.read().decode())
+            hashed = staticfiles_storage.stored_name('admin/css/base.css')
+            self.assertTrue(os.path.exists(os.path.join(root, hashed + '.gz')))
+            with open(os.path.join(root, hashed), 'rb') as original:
+                content = original.read()
+
+            response = self.client.get(f'/static/{hashed}', HTTP_ACCEPT_ENCODING='gzip, deflate')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(response['Content-Type'], 'text/css')
+            self.assertIn('immutable', response['Cache-Control'])
+            self.assertIn('max-age=31536000', response['Cache-Control'])
+            self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), content)
+
+            response = self.client.get('/static/admin/css/base.css', HTTP_ACCEPT_ENCODING='gzip;q=0')
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertEqual(response['Cache-Control'], 'public, max-age=300')
+            self.assertEqual(self.client.get('/static/../manage.py').status_code, 404)
+
+
+class GenerateSaccoDataTests(TestCase):
+    def test_generates_consistent_history_for_each_member(self):
+        call_command('generate_sacco_data', '--members', '3', '--years', '1', stdout=StringIO())
+
+        members = User.objects.filter(username__startswith='synthetic-')
+        self.assertEqual(members.count(), 3)
+        self.assertEqual(SavingsTarget.objects.filter(user__in=members).count(), 36)
+        self.assertTrue(Savings.objects.filter(user__in=members).exists())
+        self.assertFalse(Savings.objects.filter(date_saved__gt=timezone.now() + timedelta(days=28)).exists())
+        for loan in Loan.objects.filter(status='APPROVED'):
+            self.assertEqual(loan.installments.count(), loan.term_months)
+        call_command('rebuild_balances', '--verify', stdout=StringIO())
+        call_command('rebuild_rollups', '--verify', stdout=StringIO())
+
+    def test_refuses_to_mix_with_an_earlier_run_unless_cleared(self):
+        call_command('generate_sacco_data', '--members', '2', '--years', '1', stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('generate_sacco_data', '--members', '2', '--years', '1', stdout=StringIO())
+
+        call_command('generate_sacco_data', '--members', '4', '--years', '1', '--clear', stdout=StringIO())
+        self.assertEqual(User.objects.filter(username__startswith='synthetic-').count(), 4)
+
+
+class BenchmarkViewsCommandTests(TestCase):
+    def setUp(self):
+        call_command('generate_sacco_data', '--members', '2', '--years', '1', stdout=StringIO())
+        member = User.objects.get(username='synthetic-00000')
+        Loan.objects.create(user=member, amount=100, purpose='Pending', status='PENDING')
+        approved = Loan.objects.create(user=member, amount=100, purpose='Approved', status='PENDING')
+        Loan.objects.transition([approved.pk], 'APPROVED', User.objects.create_user(username='admin', is_staff=True))
+
+    def run_benchmark(self, *args):
+        out = StringIO()
+        call_command('benchmark_views', '--repeat', '1', *args, stdout=out)
+        return out.getvalue()
+
+    def test_records_every_view_and_rolls_back_its_writes(self):
+        pending = Loan.objects.filter(status='PENDING').count()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'baseline.json')
+            self.run_benchmark('--output', path)
+            with open(path) as f:
+                views = json.load(f)['views']
+
+        self.assertEqual(set(views), {pattern.name for pattern in urlpatterns})
+        self.assertEqual(set(views['dashboard']), {'queries', 'time_ms', 'peak_kib'})
+        self.assertEqual(Loan.objects.filter(status='PENDING').count(), pending)
+        self.assertFalse(User.objects.filter(username='benchmark-staff').exists())
+        self.assertFalse(Session.objects.exists())
+
+    def test_fails_when_a_view_runs_more_queries_than_the_baseline(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'baseline.json')
+            self.run_benchmark('--output', path)
+            with open(path) as f:
+                baseline = json.load(f)
+            baseline['views']['dashboard']['queries'] = 1
+            with open(path, 'w') as f:
+                json.dump(baseline, f)
+
+            with self.assertRaisesMessage(CommandError, 'dashboard queries: 1 ->'):
+                self.run_benchmark('--baseline', path)
+
+
+class StatementTests(TestCase):
+    def setUp(self):
+        caches[statements.CACHE_ALIAS].clear()
+        self.member = User.objects.create_user(username='member')
+        self.client.force_login(self.member)
+
+    def save(self, amount, year, month):
+        Savings.objects.create(
+            user=self.member, amount=amount, description='Deposit',
+            date_saved=timezone.make_aware(datetime(year, month, 10)),
+        )
+
+    def test_collects_running_balance_from_the_opening_balance(self):
+        self.save(100, 2024, 12)
+        self.save(50, 2025, 1)
+        self.save(25, 2025, 12)
+        self.save(999, 2026, 1)
+        WelfareContribution.objects.create(
+            user=self.member, amount=200, date_contributed=timezone.make_aware(datetime(2025, 6, 1)),
+        )
+
+        context = statements.collect(self.member, 2025)
+
+        self.assertEqual(context['opening_balance'], Decimal('100'))
+        self.assertEqual([row['balance'] for row in context['savings']], [Decimal('150'), Decimal('175')])
+        self.assertEqual(context['savings_total'], Decimal('75'))
+        self.assertEqual(context['welfare_total'], Decimal('200'))
+
+    def test_requests_are_queued_once_and_served_when_rendered(self):
+        url = reverse('statement_download', args=[2025])
+        self.assertRedirects(self.client.get(url), reverse('statements'))
+
+        self.client.post(reverse('statements'), {'year': 2025, 'format': 'html'})
+        self.client.post(reverse('statements'), {'year': 2025, 'format': 'html'})
+        self.assertEqual(StatementRequest.objects.filter(status=StatementRequest.PENDING).count(), 1)
+
+        self.save(100, 2025, 3)
+        call_command('generate_statements', '--workers', '0', stdout=StringIO())
+
+        self.assertEqual(StatementRequest.objects.get().status, StatementRequest.DONE)
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'text/html; charset=utf-8')
+        self.assertContains(response, 'SACCO Annual Statement 2025')
+        self.assertContains(response, '100.00')
+
+    def test_new_activity_invalidates_the_cached_statement(self):
+        statements.build(self.member, 2025)
+        self.assertIsNotNone(statements.cached(self.member.pk, 2025))
+
+        self.save(100, 2025, 3)
+
+        self.assertIsNone(statements.cached(self.member.pk, 2025))
+
+    def test_loan_approval_and_repayment_invalidate_the_cached_statement(self):
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        year = timezone.localtime().year
+        loan = Loan.objects.create(user=self.member, amount=Decimal('600'), purpose='Stock', term_months=3)
+        self.assertIn(b'<td>Pending</td>', statements.build(self.member, year))
+
+        services.loans.transition([loan.pk], 'APPROVED', staff)
+
+        self.assertIsNone(statements.cached(self.member.pk, year))
+        output = statements.build(self.member, year)
+        self.assertIn(b'<td>Approved</td>', output)
+        self.assertIn(b'Principal outstanding today</td><td class="amount">600<', output)
+
+        services.loans.record_repayment(loan.pk, Decimal('100'))
+        self.assertIsNone(statements.cached(self.member.pk, year))
+
+    def test_pdf_needs_weasyprint(self):
+        try:
+            import weasyprint  # noqa: F401
+        except ImportError:
+            with self.assertRaises(statements.StatementError):
+                statements.render(statements.collect(self.member, 2025), 'pdf')
+
+
+class RunWorkerCommandTests(TransactionTestCase):
+    def test_processes_share_the_queue(self):
+        Job.objects.bulk_create([Job(task='tests.flaky', payload={'fail': False}) for _ in range(6)])
+
+        out = StringIO()
+        call_command('runworker', '--processes', '2', '--batch', '2', '--once', stdout=out)
+
+        self.assertIn('Ran 6 job(s)', out.getvalue())
+        self.assertEqual(Job.objects.filter(status=Job.DONE, attempts=1).count(), 6)
+
+
+class BulkStatementTests(TransactionTestCase):
+    def test_year_end_run_renders_every_member_on_a_process_pool(self):
+        caches[statements.CACHE_ALIAS].clear()
+        members = [User.objects.create_user(username=f'member{i}') for i in range(4)]
+        User.objects.create_user(username='staff', is_staff=True)
+        for member in members:
+            Savings.objects.create(user=member, amount=100, date_saved=timezone.make_aware(datetime(2025, 5, 1)))
+
+        out = StringIO()
+        call_command('generate_statements', '--year', '2025', '--all-members', '--workers', '2', stdout=out)
+
+        self.assertIn('Rendered 4 statement(s)', out.getvalue())
+        self.assertEqual(StatementRequest.objects.filter(status=StatementRequest.DONE).count(), 4)
+        for member in members:
+            self.assertIn(b'member', statements.cached(member.pk, 2025))
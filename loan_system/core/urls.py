@@ -9,10 +9,14 @@ urlpatterns = [
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/chart/', views.dashboard_chart, name='dashboard_chart'),
     path('apply-loan/', views.apply_loan, name='apply_loan'),
     path('admin-dashboard/', views.admin_dashboard, name='admin_dashboard'),
+    path('admin-dashboard/export/', views.export_loans, name='export_loans'),
     path('admin-dashboard/approve/<int:loan_id>/', views.approve_loan, name='approve_loan'),
     path('admin-dashboard/reject/<int:loan_id>/', views.reject_loan, name='reject_loan'),
+    path('admin-dashboard/batch/', views.batch_loan_action, name='batch_loan_action'),
+    path('admin-dashboard/repay/<int:loan_id>/', views.record_repayment, name='record_repayment'),
     path('savings/', views.savings_view, name='savings'),
     path('reset-password/', auth_views.PasswordResetView.as_view(template_name='core/password_reset.html'), name='reset_password'),
     path('reset-password-sent/', auth_views.PasswordResetDoneView.as_view(template_name='core/password_reset_sent.html'), name='password_reset_done'),
@@ -22,8 +26,16 @@ urlpatterns = [
     path('target-history/', views.target_history, name='target_history'),
     path('loans/', views.user_loans, name='user_loans'),
     path('admin-savings/', views.admin_savings_view, name='admin_savings'),
+    path('admin-savings/chart/', views.admin_savings_chart, name='admin_savings_chart'),
+    path('admin-savings/export/', views.export_savings, name='export_savings'),
+    path('admin-savings/import/', views.admin_import_statement, name='admin_import_statement'),
     path('welfare/', views.welfare_contribution_view, name='welfare_contribution'),
+    path('statements/', views.statements_view, name='statements'),
+    path('statements/<int:year>/', views.statement_download, name='statement_download'),
     path('admin-welfare/', views.admin_welfare_view, name='admin_welfare'),
+    path('admin-welfare/chart/', views.admin_welfare_chart, name='admin_welfare_chart'),
+    path('admin-welfare/export/', views.export_welfare, name='export_welfare'),
+    path('metrics', views.metrics_view, name='metrics'),
     
     
   
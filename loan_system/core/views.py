@@ -1,20 +1,42 @@
 # core/views.py (CLEANED AND FIXED)
 
+from django.conf import settings
 from django.shortcuts import render, redirect
+from django.urls import reverse
+from django.http import HttpResponse, JsonResponse
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.utils import timezone
-from django.db.models import Sum, Count
-from django.db.models.functions import TruncMonth
-from decimal import Decimal
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from asgiref.sync import sync_to_async
+from decimal import Decimal, InvalidOperation
 from datetime import datetime
-import calendar
-from datetime import timedelta
-
-from .models import Loan, Savings, SavingsTarget
+import asyncio
+import os
+import uuid
+
+from . import statements
+from .models import Job, LoanLimitExceeded, StatementRequest
+from .exports import stream_csv
+from .jobs import enqueue
+from .metrics import prometheus_text
+from .mpesa import STREAMS
+from .pagination import akeyset_page, keyset_page
+from .services import loans, savings, targets, welfare
+from .services.loans import LOAN_TERMS
+from .tasks import import_mpesa_statement
+
+
+async def arender(request, template_name, context=None):
+    # Hand templates the user auser() already loaded instead of the lazy one,
+    # and render on the sync thread: context processors (messages, session)
+    # still touch the database synchronously.
+    request.user = await request.auser()
+    return await sync_to_async(render)(request, template_name, context)
 
 # ---------------------------
 # AUTHENTICATION VIEWS
@@ -54,69 +76,13 @@ def logout_view(request):
 # USER DASHBOARD
 # ---------------------------
 @login_required
-def dashboard(request):
-    if request.user.is_staff:
+async def dashboard(request):
+    user = await request.auser()
+    if user.is_staff:
         return redirect('admin_dashboard')
 
-    now = datetime.now()
-    month = now.month
-    year = now.year
-
-    # Monthly savings
-    total_savings = Savings.objects.filter(
-        user=request.user,
-        date_saved__month=month,
-        date_saved__year=year
-    ).aggregate(Sum('amount'))['amount__sum'] or 0
-
-    # Monthly target
-    target_obj = SavingsTarget.objects.filter(user=request.user, month=month, year=year).first()
-    target_savings = target_obj.amount if target_obj else 0
-    progress = (total_savings / target_savings) * 100 if target_savings else 0
-    remaining = max(target_savings - total_savings, 0)
-
-    # Mid-month warning
-    mid_month_warning = False
-    if now.day >= 15 and total_savings == 0:
-        mid_month_warning = True
-
-    # Chart data
-    monthly_data = (
-        Savings.objects
-        .filter(user=request.user)
-        .annotate(month=TruncMonth('date_saved'))
-        .values('month')
-        .annotate(total=Sum('amount'))
-        .order_by('month')
-    )
-
-    targets_data = SavingsTarget.objects.filter(user=request.user).order_by('year', 'month')
-
-    labels = []
-    savings_values = []
-    target_values = []
-
-    for t in targets_data:
-        label = f"{calendar.month_abbr[t.month]} {t.year}"
-        labels.append(label)
-
-        matching = next(
-            (s['total'] for s in monthly_data if s['month'].month == t.month and s['month'].year == t.year),
-            0
-        )
-        savings_values.append(float(matching))
-        target_values.append(float(t.amount))
-
-    return render(request, 'core/dashboard.html', {
-        'total_savings': total_savings,
-        'target_savings': target_savings,
-        'progress': round(progress, 1),
-        'remaining': remaining,
-        'mid_month_warning': mid_month_warning,
-        'chart_labels': labels,
-        'chart_savings': savings_values,
-        'chart_targets': target_values,
-    })
+    context = await savings.dashboard(user, timezone.localtime())
+    return await arender(request, 'core/dashboard.html', context)
 
 # ---------------------------
 # SAVINGS VIEWS
@@ -127,10 +93,8 @@ def savings_view(request):
         amount = Decimal(request.POST['amount'])
         messages.success(request, f"Please complete payment of {amount} KES via M-PESA to Paybill 123456, Account: {request.user.username}")
 
-    total_savings = Savings.objects.filter(user=request.user).aggregate(Sum('amount'))['amount__sum'] or 0
-
     return render(request, 'core/savings.html', {
-        'total_savings': total_savings
+        'total_savings': savings.balance(request.user),
     })
 
 # ---------------------------
@@ -139,340 +103,348 @@ def savings_view(request):
 @login_required
 def set_target(request):
     now = datetime.now()
-    current_month = now.month
-    current_year = now.year
-
-    target = SavingsTarget.objects.filter(
-        user=request.user,
-        month=current_month,
-        year=current_year
-    ).first()
-
-    if not target:
-        target = SavingsTarget(user=request.user, month=current_month, year=current_year)
 
     if request.method == 'POST':
         amount = Decimal(request.POST['amount'])
-        target.amount = amount
-        target.save()
+        targets.set_target(request.user, now.year, now.month, amount)
         messages.success(request, f"Target set to {amount} KES for {now.strftime('%B %Y')}")
         return redirect('dashboard')
 
+    target = targets.for_month(request.user, now.year, now.month)
     return render(request, 'core/set_target.html', {'target': target})
 
 @login_required
-def target_history(request):
-    targets = SavingsTarget.objects.filter(user=request.user).order_by('-year', '-month')
-    return render(request, 'core/target_history.html', {'targets': targets})
+async def target_history(request):
+    user = await request.auser()
+    page = await akeyset_page(request, targets.history(user), ['-year', '-month', '-id'])
+    return await arender(request, 'core/target_history.html', {'targets': page})
 
 # ---------------------------
-# LOAN VIEWS
+# STATEMENTS
 # ---------------------------
-from datetime import timedelta
-from decimal import Decimal
-from django.utils import timezone
-from django.contrib.auth.decorators import login_required
-from django.shortcuts import render, redirect
-from django.contrib import messages
-from django.db.models import Sum
-from .models import Loan, Savings
+@login_required
+def statements_view(request):
+    if request.user.is_staff:
+        return redirect('admin_dashboard')
 
-from django.contrib.auth.decorators import login_required
-from django.shortcuts import render, redirect
-from django.contrib import messages
-from django.utils import timezone
-from django.db.models import Sum
-from decimal import Decimal
-from datetime import timedelta
+    if request.method == 'POST':
+        year = int(request.POST['year'])
+        fmt = request.POST.get('format', 'html')
+        if fmt in statements.FORMATS:
+            StatementRequest.objects.request(request.user, year, fmt)
+            messages.success(request, f"Your {year} statement is being prepared. Check back in a few minutes.")
+        return redirect('statements')
 
-from .models import Loan, Savings
+    return render(request, 'core/statements.html', {'rows': statements.overview(request.user)})
+
+@login_required
+def statement_download(request, year):
+    fmt = request.GET.get('format', 'html')
+    output = statements.cached(request.user.pk, year, fmt) if fmt in statements.FORMATS else None
+    if output is None:
+        messages.error(request, f"Your {year} statement is not ready yet.")
+        return redirect('statements')
+
+    response = HttpResponse(output, content_type=statements.FORMATS[fmt])
+    disposition = 'attachment' if fmt == 'pdf' else 'inline'
+    response['Content-Disposition'] = f'{disposition}; filename="statement-{year}.{fmt}"'
+    return response
+
+# ---------------------------
+# LOAN VIEWS
+# ---------------------------
+def _positive_amount(value):
+    """``value`` as a finite, positive ``Decimal``, or ``None`` if it is not one."""
+    try:
+        amount = Decimal(value)
+    except (InvalidOperation, TypeError):
+        return None
+    return amount if amount.is_finite() and amount > 0 else None
 
 @login_required
 def apply_loan(request):
     if request.user.is_staff:
         return redirect('admin_dashboard')
 
-    # Calculate total user savings
-    user_savings = Savings.objects.filter(user=request.user).aggregate(Sum('amount'))['amount__sum'] or 0
-    loan_limit = user_savings * 3
+    # Loan limit comes from the member's running balance, less what they already owe
+    loan_limit = loans.limit(request.user)
 
     if request.method == 'POST':
-        amount = Decimal(request.POST.get('amount'))
+        amount = _positive_amount(request.POST.get('amount'))
+        if amount is None:
+            messages.error(request, "Enter a loan amount greater than zero.")
+            return redirect('apply_loan')
         purpose = request.POST.get('purpose')
+        term_months = int(request.POST.get('term_months') or 1)
 
-        if amount > loan_limit:
-            messages.error(request, f"You have exceeded your loan limit of KES {loan_limit:.2f}")
+        try:
+            loans.apply(request.user, amount, purpose, term_months)
+        except LoanLimitExceeded as exc:
+            messages.error(request, f"You have exceeded your loan limit of KES {exc.limit:.2f}")
             return redirect('apply_loan')
 
-        Loan.objects.create(
-            user=request.user,
-            amount=amount,
-            purpose=purpose,
-            status='PENDING',
-            due_date=timezone.now().date() + timedelta(days=30)
-        )
-
         messages.success(request, "Loan application submitted successfully.")
         return redirect('user_loans')
 
     return render(request, 'core/apply_loan.html', {
-        'loan_limit': loan_limit
+        'loan_limit': loan_limit,
+        'loan_terms': LOAN_TERMS,
     })
 
 
 
 @staff_member_required
 def approve_loan(request, loan_id):
-    loan = Loan.objects.get(id=loan_id)
-    loan.status = 'APPROVED'
-    loan.approved_by = request.user
-    loan.approval_date = timezone.now()
-    loan.save()
-    messages.success(request, "Loan approved.")
+    results = loans.transition([loan_id], 'APPROVED', request.user)
+    if results[loan_id] == 'APPROVED':
+        messages.success(request, "Loan approved.")
+    else:
+        messages.error(request, "Loan is no longer pending.")
     return redirect('admin_dashboard')
 
 @staff_member_required
 def reject_loan(request, loan_id):
-    loan = Loan.objects.get(id=loan_id)
-    loan.status = 'REJECTED'
-    loan.approved_by = request.user
-    loan.approval_date = timezone.now()
-    loan.save()
-    messages.info(request, "Loan rejected.")
+    results = loans.transition([loan_id], 'REJECTED', request.user)
+    if results[loan_id] == 'REJECTED':
+        messages.info(request, "Loan rejected.")
+    else:
+        messages.error(request, "Loan is no longer pending.")
+    return redirect('admin_dashboard')
+
+@staff_member_required
+def batch_loan_action(request):
+    """Approve or reject all ticked loans in one go."""
+    if request.method != 'POST':
+        return redirect('admin_dashboard')
+
+    status = {'approve': 'APPROVED', 'reject': 'REJECTED'}.get(request.POST.get('action'))
+    loan_ids = [pk for pk in request.POST.getlist('loan_ids') if pk.isdigit()]
+    if status is None or not loan_ids:
+        results = {}
+    else:
+        results = loans.transition(loan_ids, status, request.user)
+
+    if request.headers.get('Accept', '').startswith('application/json'):
+        return JsonResponse({'results': {str(pk): result for pk, result in results.items()}})
+
+    done = sum(1 for result in results.values() if result == status)
+    if done:
+        messages.success(request, f"{done} loan(s) {status.lower()}.")
+    if len(results) > done:
+        messages.warning(request, f"{len(results) - done} loan(s) were no longer pending and were skipped.")
     return redirect('admin_dashboard')
 
+@staff_member_required
+def record_repayment(request, loan_id):
+    if request.method == 'POST':
+        amount = _positive_amount(request.POST.get('amount'))
+        if amount is None:
+            messages.error(request, "Enter a repayment amount greater than zero.")
+            return redirect(f"{reverse('admin_dashboard')}?status=APPROVED")
+        overpaid = loans.record_repayment(loan_id, amount)
+        if overpaid:
+            messages.warning(request, f"Loan fully repaid; KES {overpaid} was more than the balance due.")
+        else:
+            messages.success(request, f"Repayment of KES {amount} recorded.")
+    return redirect(f"{reverse('admin_dashboard')}?status=APPROVED")
+
 # ---------------------------
 # ADMIN DASHBOARD
 # ---------------------------
 @staff_member_required
-def admin_dashboard(request):
+async def admin_dashboard(request):
     status_filter = request.GET.get('status') or 'PENDING'  # Default to PENDING
 
-    if status_filter in ['PENDING', 'APPROVED', 'REJECTED']:
-        all_loans = Loan.objects.filter(status=status_filter).order_by('-date_applied')
-    else:
-        all_loans = Loan.objects.all().order_by('-date_applied')
-
-    loan_counts = Loan.objects.values('status').annotate(count=Count('id'))
-    loan_amounts_by_status = Loan.objects.values('status').annotate(total=Sum('amount'))
+    # The page and the summary cards don't depend on each other
+    all_loans, summary = await asyncio.gather(
+        akeyset_page(request, loans.for_admin(status_filter), ['-date_applied', '-id']),
+        loans.summary(),
+    )
 
-    return render(request, 'core/admin_dashboard.html', {
+    return await arender(request, 'core/admin_dashboard.html', {
         'all_loans': all_loans,
-        'loan_counts': loan_counts,
-        'loan_amounts': loan_amounts_by_status,
+        'loan_counts': summary['by_status'],
+        'loan_amounts': summary['by_status'],
+        'outstanding_principal': summary['outstanding_principal'],
         'selected_status': status_filter,
     })
 
-from django.shortcuts import render
-from .models import Loan
-
 @login_required
-def user_loans(request):
-    if request.user.is_staff:
+async def user_loans(request):
+    user = await request.auser()
+    if user.is_staff:
         return redirect('admin_dashboard')
 
     status_filter = request.GET.get('status', 'PENDING')  # Default is PENDING
 
-    user_loans = Loan.objects.filter(user=request.user).order_by('-date_applied')
-    if status_filter in ['PENDING', 'APPROVED', 'REJECTED']:
-        user_loans = user_loans.filter(status=status_filter)
+    user_loans = await akeyset_page(request, loans.for_member(user, status_filter), ['-date_applied', '-id'])
 
-    return render(request, 'core/user_loans.html', {
+    return await arender(request, 'core/user_loans.html', {
         'user_loans': user_loans,
         'selected_status': status_filter,
     })
 
-
-
-from django.contrib.admin.views.decorators import staff_member_required
-from django.shortcuts import render
-from django.db.models import Sum
-from django.db.models.functions import TruncMonth
-from django.utils import timezone
-from django.contrib.auth.models import User
-import calendar
-
-from .models import Savings, SavingsTarget
-
 @staff_member_required
-def admin_savings_view(request):
+async def admin_savings_view(request):
     now = timezone.now()
     month = now.month
     year = now.year
 
     # Get filters from request
     user_filter = request.GET.get('user')
-    start_date = request.GET.get('start_date')
-    end_date = request.GET.get('end_date')
-
-    # Base savings queryset
-    savings_list = Savings.objects.all().order_by('-date_saved')
-
-    # Apply filters
-    if user_filter:
-        savings_list = savings_list.filter(user__username__icontains=user_filter)
-    if start_date:
-        savings_list = savings_list.filter(date_saved__date__gte=start_date)
-    if end_date:
-        savings_list = savings_list.filter(date_saved__date__lte=end_date)
-
-    # Total savings from filtered list
-    total_amount = savings_list.aggregate(Sum('amount'))['amount__sum'] or 0
-
-    # Total savings per user (filtered if user search is applied)
-    per_user_qs = Savings.objects.all()
-    if user_filter:
-        per_user_qs = per_user_qs.filter(user__username__icontains=user_filter)
-
-    per_user = per_user_qs.values('user__username').annotate(total=Sum('amount')).order_by('-total')
-
-    # Chart: Monthly savings data
-    monthly_data = (
-        Savings.objects
-        .annotate(month=TruncMonth('date_saved'))
-        .values('month')
-        .annotate(total=Sum('amount'))
-        .order_by('month')
-    )
 
-    chart_labels = [entry['month'].strftime('%b %Y') for entry in monthly_data]
-    chart_data = [float(entry['total']) for entry in monthly_data]
-
-    # Users and their targets
-    users = User.objects.filter(is_staff=False)
-    user_data = []
-
-    for user in users:
-        user_month_savings = Savings.objects.filter(
-            user=user,
-            date_saved__month=month,
-            date_saved__year=year
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
-
-        target = SavingsTarget.objects.filter(user=user, month=month, year=year).first()
-        target_amount = target.amount if target else 0
-        met_target = user_month_savings >= target_amount and target_amount > 0
-
-        user_data.append({
-            'user': user,
-            'savings': user_month_savings,
-            'target': target_amount,
-            'met_target': met_target,
-        })
+    # Savings matching the user and date filters
+    savings_list = savings.filtered(request.GET)
+
+    total_amount, per_user, (members_page, user_data) = await asyncio.gather(
+        # Total savings from filtered list
+        savings.atotal(savings_list),
+        # Total savings per user (filtered if user search is applied)
+        akeyset_page(
+            request,
+            savings.per_member_totals(user_filter),
+            ['-total', 'user__username'],
+            prefix='per_user_',
+        ),
+        # Users and their targets for the current month, one query per page.
+        # Paginator has no async API yet.
+        sync_to_async(savings.member_progress)(year, month, request.GET.get('members_page')),
+    )
 
-    return render(request, 'core/admin_savings.html', {
+    return await arender(request, 'core/admin_savings.html', {
         'savings_list': savings_list,
         'total_amount': total_amount,
         'per_user': per_user,
-        'chart_labels': chart_labels,
-        'chart_data': chart_data,
         'user_data': user_data,
+        'members_page': members_page,
         'month': now.strftime('%B'),
         'year': year,
     })
-from django.contrib.admin.views.decorators import staff_member_required
-from django.db.models.functions import TruncMonth
-from django.db.models import Sum
-from django.shortcuts import render
-from .models import WelfareContribution
-
-@staff_member_required
-def admin_welfare_view(request):
-    contributions = WelfareContribution.objects.all().order_by('-date_contributed')
-
-    monthly_summary = (
-        WelfareContribution.objects
-        .annotate(month=TruncMonth('date_contributed'))
-        .values('month')
-        .annotate(total=Sum('amount'))
-        .order_by('month')
-    )
-
-    return render(request, 'core/admin_welfare.html', {
-        'contributions': contributions,
-        'monthly_summary': monthly_summary
-    })
 @login_required
 def welfare_contribution_view(request):
     if request.method == 'POST':
         amount = Decimal(request.POST['amount'])
-        WelfareContribution.objects.create(user=request.user, amount=amount)
+        welfare.contribute(request.user, amount)
         messages.success(request, f"Please complete payment of {amount} KES via M-PESA to Paybill 123456, Account: {request.user.username}")
         return redirect('welfare_contribution')
 
-    user_contributions = WelfareContribution.objects.filter(user=request.user).order_by('-date_contributed')
-    total_contributed = user_contributions.aggregate(Sum('amount'))['amount__sum'] or 0
-
     return render(request, 'core/welfare_contribution.html', {
-        'user_contributions': user_contributions,
-        'total_contributed': total_contributed,
+        'user_contributions': keyset_page(
+            request, welfare.member_history(request.user), ['-date_contributed', '-id'],
+        ),
+        'total_contributed': welfare.member_total(request.user),
     })
+# ---------------------------
+# REPORT EXPORTS
+# ---------------------------
+@staff_member_required
+def export_savings(request):
+    return stream_csv(
+        'savings.csv',
+        ['Username', 'Amount (KES)', 'Date Saved', 'M-PESA Receipt', 'Description'],
+        savings.filtered(request.GET),
+        ['user__username', 'amount', 'date_saved', 'mpesa_receipt', 'description'],
+    )
 
-from django.utils import timezone
-from .models import WelfareContribution
-from django.contrib import messages
-from django.contrib.auth.decorators import login_required
-from django.shortcuts import render, redirect
-from decimal import Decimal
-
-@login_required
-def welfare_contribute(request):
-    now = timezone.now()
-    current_month = now.strftime('%B %Y')
+@staff_member_required
+def export_loans(request):
+    return stream_csv(
+        'loans.csv',
+        ['Username', 'Amount (KES)', 'Purpose', 'Status', 'Date Applied', 'Due Date', 'Approved By', 'Approval Date'],
+        loans.filtered(request.GET),
+        ['user__username', 'amount', 'purpose', 'status', 'date_applied', 'due_date',
+         'approved_by__username', 'approval_date'],
+    )
 
-    if request.method == 'POST':
-        amount = Decimal(request.POST['amount'])
-        WelfareContribution.objects.create(user=request.user, amount=amount)
-        messages.success(request, f"Your contribution of KES {amount} has been recorded. Thank you!")
-        return redirect('welfare_contribute')
+@staff_member_required
+def export_welfare(request):
+    return stream_csv(
+        'welfare.csv',
+        ['Username', 'Amount (KES)', 'Date Contributed', 'M-PESA Receipt'],
+        welfare.filtered(request.GET),
+        ['user__username', 'amount', 'date_contributed', 'mpesa_receipt'],
+    )
 
-    return render(request, 'core/welfare_contribute.html', {
-        'current_month': current_month
+@staff_member_required
+def admin_import_statement(request):
+    if request.method == 'POST' and request.FILES.get('statement'):
+        stream = request.POST.get('stream')
+        if stream not in STREAMS:
+            stream = 'savings'
+        # Large statements take a while to import, so keep the upload and let a worker do it
+        os.makedirs(settings.JOB_SPOOL_DIR, exist_ok=True)
+        path = os.path.join(settings.JOB_SPOOL_DIR, f'statement-{uuid.uuid4().hex}.csv')
+        with open(path, 'wb') as f:
+            for chunk in request.FILES['statement'].chunks():
+                f.write(chunk)
+        enqueue(import_mpesa_statement, path=path, stream=stream)
+        messages.success(request, "Statement queued for import. Its result will appear below.")
+        return redirect('admin_import_statement')
+
+    jobs = Job.objects.recent(import_mpesa_statement.task_name)
+    latest = jobs[0].result if jobs and jobs[0].result else {}
+    return render(request, 'core/admin_import.html', {
+        'jobs': jobs,
+        'rejects': latest.get('rejects', []),
     })
-from django.contrib.admin.views.decorators import staff_member_required
-from .models import WelfareContribution
-from django.db.models.functions import TruncMonth
-from django.db.models import Sum
-from django.utils import timezone
 
 @staff_member_required
-def admin_welfare_view(request):
+async def admin_welfare_view(request):
     # Filters
-    user_filter = request.GET.get('user')
-    start_date = request.GET.get('start_date')
-    end_date = request.GET.get('end_date')
-
-    contributions = WelfareContribution.objects.all().order_by('-date_contributed')
-
-    if user_filter:
-        contributions = contributions.filter(user__username__icontains=user_filter)
-    if start_date:
-        contributions = contributions.filter(date_contributed__date__gte=start_date)
-    if end_date:
-        contributions = contributions.filter(date_contributed__date__lte=end_date)
-
-    # Monthly summary chart data
-    monthly_summary = (
-        WelfareContribution.objects
-        .annotate(month=TruncMonth('date_contributed'))
-        .values('month')
-        .annotate(total=Sum('amount'))
-        .order_by('month')
-    )
+    contributions = welfare.filtered(request.GET)
 
-    chart_labels = [entry['month'].strftime('%b %Y') for entry in monthly_summary]
-    chart_data = [float(entry['total']) for entry in monthly_summary]
-
-    total_amount = contributions.aggregate(Sum('amount'))['amount__sum'] or 0
+    total_amount, contributions = await asyncio.gather(
+        welfare.atotal(contributions),
+        akeyset_page(request, contributions, ['-date_contributed', '-id']),
+    )
 
-    return render(request, 'core/admin_welfare.html', {
+    return await arender(request, 'core/admin_welfare.html', {
         'contributions': contributions,
-        'chart_labels': chart_labels,
-        'chart_data': chart_data,
         'total_amount': total_amount,
     })
 
+# ---------------------------
+# CHART DATA
+# ---------------------------
+# The pages fetch their charts from these endpoints. Each response carries
+# an ETag from the DataVersion of the data behind it, so the browser
+# revalidates with If-None-Match and gets a 304 until that data changes.
+
+def versioned(stamp):
+    """``condition()`` with the ETag and Last-Modified from ``stamp(request)``, read once per request."""
+    def read(request):
+        if not hasattr(request, '_data_stamp'):
+            request._data_stamp = stamp(request)
+        return request._data_stamp
+
+    return condition(
+        etag_func=lambda request, *args, **kwargs: read(request)[0],
+        last_modified_func=lambda request, *args, **kwargs: read(request)[1],
+    )
 
+@login_required
+@cache_control(private=True, no_cache=True)
+@versioned(lambda request: savings.member_chart_version(request.user))
+def dashboard_chart(request):
+    return JsonResponse(savings.member_chart(request.user))
 
+@staff_member_required
+@cache_control(private=True, no_cache=True)
+@versioned(lambda request: savings.monthly_chart_version())
+def admin_savings_chart(request):
+    labels, values = savings.monthly_chart()
+    return JsonResponse({'labels': labels, 'values': values})
 
+@staff_member_required
+@cache_control(private=True, no_cache=True)
+@versioned(lambda request: welfare.monthly_chart_version())
+def admin_welfare_chart(request):
+    labels, values = welfare.monthly_chart()
+    return JsonResponse({'labels': labels, 'values': values})
 
+# ---------------------------
+# METRICS
+# ---------------------------
+@staff_member_required
+def metrics_view(request):
+    return HttpResponse(prometheus_text(), content_type='text/plain; version=0.0.4; charset=utf-8')
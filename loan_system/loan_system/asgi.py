@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'loan_system.settings')
+# Read by the settings to turn off persistent database connections
+os.environ['SACCO_ASGI'] = '1'
 
 application = get_asgi_application()
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,6 +43,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,7 +57,8 @@ ROOT_URLCONF = 'loan_system.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, timing renders for core.middleware.RequestMetricsMiddleware
+        'BACKEND': 'core.metrics.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -73,13 +77,117 @@ WSGI_APPLICATION = 'loan_system.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# loan_system/asgi.py sets SACCO_ASGI=1. Under ASGI a request's sync code runs
+# on whichever thread is free, and a persistent connection left on each of
+# them is never reused or closed, so Django's advice is CONN_MAX_AGE = 0 there.
+SERVED_OVER_ASGI = os.environ.get('SACCO_ASGI') == '1'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Keep connections open between requests instead of reconnecting each
+        # time; WSGI only, see SERVED_OVER_ASGI.
+        'CONN_MAX_AGE': 0 if SERVED_OVER_ASGI else 60,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Take the write lock when an atomic block starts so busy_timeout
+            # applies; upgrading a read lock mid-transaction fails immediately.
+            'transaction_mode': 'IMMEDIATE',
+        },
+        # Test on a file rather than shared-cache :memory: so threaded tests
+        # see the same locking behaviour as production.
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
+# Applied to every new SQLite connection by core.signals.tune_sqlite, unless
+# its database sets its own PRAGMAS (as load_test_database's scratch databases
+# do). WAL lets readers carry on while M-PESA imports write; busy_timeout makes
+# writers wait for the lock instead of failing with "database is locked".
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,  # ms
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -20000,  # KiB
+}
+
+# Set SACCO_DATABASE=postgres to run on PostgreSQL with a psycopg connection
+# pool (pip install "psycopg[binary,pool]"). Pooled connections can't be
+# combined with CONN_MAX_AGE, so it stays at 0 there.
+if os.environ.get('SACCO_DATABASE') == 'postgres':
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('POSTGRES_DB', 'sacco'),
+        'USER': os.environ.get('POSTGRES_USER', 'sacco'),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+        'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        'OPTIONS': {
+            'pool': {
+                'min_size': int(os.environ.get('POSTGRES_POOL_MIN', 2)),
+                'max_size': int(os.environ.get('POSTGRES_POOL_MAX', 20)),
+            },
+        },
+    }
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The "dashboard" alias holds per-member dashboard figures (see core/caching.py).
+# It needs to be shared between worker processes, so use a file or database
+# cache in production. The test run disables it; cache tests opt in to locmem.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'dashboard': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'dashboard',
+        'TIMEOUT': 60 * 60 * 24,
+    },
+    # Rendered annual statements, shared with the generate_statements workers
+    'statements': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'statements',
+        'TIMEOUT': 60 * 60 * 24 * 90,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+TESTING = 'test' in sys.argv[1:2]
+
+if TESTING:
+    CACHES['dashboard'] = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+    CACHES['statements']['LOCATION'] = BASE_DIR / 'cache' / 'test-statements'
+
+
+# Query budgets
+# Most queries any one request to these URL names may run, counted by
+# core.middleware.RequestMetricsMiddleware (session and user lookups included).
+# Going over logs a warning, and fails the request under tests.
+QUERY_BUDGETS = {
+    'dashboard': 8,
+    'dashboard_chart': 5,
+    'target_history': 5,
+    'user_loans': 5,
+    'savings': 5,
+    'set_target': 5,
+    'apply_loan': 15,
+    'welfare_contribution': 17,
+    'admin_dashboard': 9,
+    'admin_savings': 9,
+    'admin_welfare': 7,
+    'admin_savings_chart': 4,
+    'admin_welfare_chart': 4,
+    'metrics': 3,
+}
+QUERY_BUDGET_STRICT = TESTING
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -116,6 +224,17 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# collectstatic fingerprints and precompresses everything (see core.storage);
+# core.static serves the result with far-future cache headers
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'core.storage.PrecompressedManifestStaticFilesStorage'},
+}
+if TESTING:
+    # Tests render pages without running collectstatic first
+    STORAGES['staticfiles'] = {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -123,3 +242,6 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Password reset using console backend
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+# Uploads waiting for a background job (see core.tasks), e.g. M-PESA statements
+JOB_SPOOL_DIR = BASE_DIR / 'spool'